@@ -0,0 +1,122 @@
+"""Frame-time benchmark for raster images and surface plots drawn by GraphCanvas.
+
+Compares redrawing the whole figure with updating the persistent
+raster image artists, and the levels of detail of surface plots.
+Run from the repository root:
+
+    python -m benchmarks.benchmark_graph_canvas [sizes ...]
+
+Each size n creates a random n x n scan. The median and maximum
+frame times in ms are printed for each case.
+"""
+import os
+import sys
+import time
+
+import matplotlib
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+
+from sicm_analyzer.graph_canvas import GraphCanvas, RASTER_IMAGE, SURFACE_PLOT, INTERACTIVE_SURFACE_FACES
+from sicm_analyzer.sicm_data import ScanBackstepMode
+from sicm_analyzer.view import View
+
+DEFAULT_SIZES = (128, 512, 1024)
+FRAMES = 20
+SURFACE_FRAMES = 5
+
+
+def get_scan(n: int) -> ScanBackstepMode:
+    scan = ScanBackstepMode()
+    scan.z = np.random.default_rng(0).normal(size=(n, n))
+    scan.x_px = scan.x_px_raw = scan.y_px = scan.y_px_raw = n
+    scan.x_size_raw = scan.y_size_raw = 10.0
+    scan.reshape_xy_meshgrids()
+    return scan
+
+
+def time_frames(func, frames: int = FRAMES) -> list[float]:
+    """Calls func for each frame and returns frame times in ms."""
+    times = []
+    for frame in range(frames):
+        start = time.perf_counter()
+        func(frame)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def benchmark_raster_image(n: int) -> dict[str, list[float]]:
+    canvas = GraphCanvas()
+    canvas.resize(800, 600)
+    scan = get_scan(n)
+    view = View()
+    color_maps = [matplotlib.colormaps["viridis"], matplotlib.colormaps["YlGnBu_r"]]
+
+    # the first draw creates the artists
+    canvas.draw_graph(scan, RASTER_IMAGE, view)
+
+    def full_redraw(frame):
+        canvas.clear_figure()
+        canvas.draw_graph(scan, RASTER_IMAGE, view)
+
+    def change_color_map(frame):
+        view.color_map = color_maps[frame % 2]
+        canvas.draw_graph(scan, RASTER_IMAGE, view)
+
+    def change_z_limits(frame):
+        view.z_limits = (-1.0 - frame * 0.01, 1.0 + frame * 0.01)
+        canvas.draw_graph(scan, RASTER_IMAGE, view)
+
+    def change_data(frame):
+        scan.z = scan.z + 0.001
+        canvas.draw_graph(scan, RASTER_IMAGE, view)
+
+    def move_rectangle(frame):
+        rect = canvas.get_rectangle(origin=(frame, frame), width=n // 4, height=n // 4)
+        canvas.add_rectangle_to_raster_image(rectangles=[rect])
+
+    return {
+        "full redraw": time_frames(full_redraw),
+        "color map": time_frames(change_color_map),
+        "z limits": time_frames(change_z_limits),
+        "data": time_frames(change_data),
+        "rectangle overlay": time_frames(move_rectangle),
+    }
+
+
+def benchmark_surface_plot(n: int) -> dict[str, list[float]]:
+    canvas = GraphCanvas()
+    canvas.resize(800, 600)
+    scan = get_scan(n)
+    view = View()
+
+    def draw_surface(frame):
+        canvas.draw_graph(scan, SURFACE_PLOT, view)
+
+    def rotate(frame):
+        canvas.draw_surface(INTERACTIVE_SURFACE_FACES)
+        view.azim = -60.0 + frame
+        canvas.surface_axes.azim = view.azim
+        canvas.draw()
+
+    return {
+        "surface": time_frames(draw_surface, SURFACE_FRAMES),
+        "surface rotation": time_frames(rotate, SURFACE_FRAMES),
+    }
+
+
+def main(sizes: list[int]):
+    app = QApplication.instance() or QApplication(sys.argv)
+    print(f"{'size':>6} {'case':<20} {'median [ms]':>12} {'max [ms]':>10}")
+    for n in sizes:
+        results = benchmark_raster_image(n)
+        results.update(benchmark_surface_plot(n))
+        for case, times in results.items():
+            print(f"{n:>6} {case:<20} {np.median(times):>12.1f} {np.max(times):>10.1f}")
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or list(DEFAULT_SIZES))
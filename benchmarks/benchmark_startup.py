@@ -0,0 +1,61 @@
+"""Startup benchmark: time from starting Python to the first shown main window.
+
+Each run starts a new interpreter which imports sicm_analyzer.main, creates
+the main window and the controller like main() and processes the pending
+events. The median and minimum times of all runs are printed.
+Run from the repository root:
+
+    python -m benchmarks.benchmark_startup [runs]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+DEFAULT_RUNS = 5
+
+STARTUP = """
+from PyQt6.QtWidgets import QApplication
+from sicm_analyzer.main import Controller
+from sicm_analyzer.gui_main import MainWindow
+
+app = QApplication([])
+window = MainWindow()
+controller = Controller(window)
+controller.add_canvases_to_main_window()
+controller.set_listener_function_in_data_manager()
+controller.connect_actions()
+app.processEvents()
+print("shown", flush=True)
+"""
+
+
+def time_startup() -> float:
+    """Returns the time in s until the main window of a new process has been shown."""
+    environment = dict(os.environ)
+    environment.setdefault("QT_QPA_PLATFORM", "offscreen")
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-c", STARTUP], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                               text=True, env=environment)
+    for line in process.stdout:
+        if line.strip() == "shown":
+            elapsed = time.perf_counter() - start
+            break
+    else:
+        raise RuntimeError("The main window was not shown.")
+    process.wait()
+    return elapsed
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_RUNS
+    # the first run warms up the file system cache
+    time_startup()
+    times = [time_startup() for _ in range(runs)]
+    print("time to first window: median %.0f ms, min %.0f ms (%i runs)"
+          % (statistics.median(times) * 1000, min(times) * 1000, runs))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+"""Benchmark suite for file I/O, manipulations, parameters, undo states and drawing.
+
+Each case is timed on synthetic n x n scans (see sicm_analyzer.synthetic_data)
+for all sizes. Results are written to a JSON
+file, which can be compared with the results of another commit.
+Run from the repository root:
+
+    python -m benchmarks.benchmark_suite --output results.json
+    python -m benchmarks.benchmark_suite --sizes 64 256 --cases "filter|level" --compare baseline.json
+
+Cases which loop over pixels in Python (filters, leveling, fits and some
+parameters) take minutes for large scans. They are only run up to their
+maximum size unless --all-sizes is given. Cases which raise an exception
+are reported with the error instead of times.
+
+--compare prints the ratio of the median times of each case and exits
+with 1 if any case is slower than --threshold times the baseline.
+"""
+import argparse
+import copy
+import datetime
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+
+from sicm_analyzer.data_manager import UndoRedoData
+from sicm_analyzer.graph_canvas import GraphCanvas, RASTER_IMAGE, SURFACE_PLOT
+from sicm_analyzer.manipulate_data import crop, subtract_z_minimum, transpose_z_data, flip_z_data, invert_z_data
+from sicm_analyzer.manipulate_data import height_diff_to_neighbour, subtract_threshold, filter_single_outlier
+from sicm_analyzer.manipulate_data import filter_median_temporal, filter_average_temporal
+from sicm_analyzer.manipulate_data import filter_median_spatial, filter_average_spatial
+from sicm_analyzer.manipulate_data import level_data, fit_data, MirrorAxis
+from sicm_analyzer.parameters import IMPLEMENTED_PARAMETERS
+from sicm_analyzer.sicm_data import ScanBackstepMode, get_sicm_data, export_sicm_file
+from sicm_analyzer.synthetic_data import create_scan
+from sicm_analyzer.view import View
+
+RESULTS_VERSION = 1
+DEFAULT_SIZES = (64, 256, 1024, 4096)
+DEFAULT_MIN_TIME = 0.5
+DEFAULT_THRESHOLD = 1.25
+MIN_REPEATS = 3
+MAX_REPEATS = 50
+# medians below this time (s) are too noisy to report regressions
+NOISE_FLOOR = 1e-4
+
+LEVEL_METHODS = ("plane", "linewise", "linewise_mean", "linewise_y", "2Dpoly", "paraboloid")
+FIT_MODELS = ("polyXX symfit", "polyXX lmfit")
+
+
+class Case(NamedTuple):
+    """A benchmark case.
+
+    run(data) is timed. data is the synthetic scan or the return value of
+    setup(scan, directory), which is called once per size. If run changes
+    data, each repetition gets a deep copy, which is not timed.
+    """
+    name: str
+    run: Callable
+    setup: Callable | None = None
+    mutates: bool = False
+    max_size: int | None = None
+
+
+def get_scan(n: int) -> ScanBackstepMode:
+    """Returns a reproducible synthetic n x n scan."""
+    return create_scan(n, seed=n)
+
+
+def _export_file(scan: ScanBackstepMode, directory: str) -> str:
+    path = os.path.join(directory, "scan_%i.sicm" % scan.x_px)
+    export_sicm_file(path, scan, [])
+    return path
+
+
+def _get_canvas(scan: ScanBackstepMode, directory: str):
+    canvas = GraphCanvas()
+    canvas.resize(800, 600)
+    return canvas, scan, View()
+
+
+def _draw(graph_type: str) -> Callable:
+    def draw(arguments):
+        canvas, scan, view = arguments
+        canvas.clear_figure()
+        canvas.draw_graph(scan, graph_type, view)
+    return draw
+
+
+def get_cases() -> list[Case]:
+    cases = [
+        Case("io: get_sicm_data", get_sicm_data, setup=_export_file),
+        Case("io: export_sicm_file",
+             lambda arguments: export_sicm_file(arguments[1], arguments[0], []),
+             setup=lambda scan, directory: (scan, os.path.join(directory, "export.sicm"))),
+        Case("undo: UndoRedoData", lambda scan: UndoRedoData(scan, subtract_z_minimum, "Subtract minimum")),
+
+        Case("manipulate: crop", lambda scan: crop(scan, (0, 0), (scan.x_px // 2, scan.y_px // 2)), mutates=True),
+        Case("manipulate: subtract_z_minimum", subtract_z_minimum, mutates=True),
+        Case("manipulate: transpose_z_data", transpose_z_data, mutates=True),
+        Case("manipulate: flip_z_data", lambda scan: flip_z_data(scan, MirrorAxis.X_AXIS), mutates=True),
+        Case("manipulate: invert_z_data", invert_z_data, mutates=True),
+        Case("manipulate: subtract_threshold", lambda scan: subtract_threshold(scan, 2.0), mutates=True),
+        Case("manipulate: height_diff_to_neighbour", height_diff_to_neighbour, mutates=True, max_size=1024),
+        Case("filter: single_outlier", lambda scan: filter_single_outlier(scan, (1, 1)), mutates=True),
+        Case("filter: median_temporal", filter_median_temporal, mutates=True, max_size=256),
+        Case("filter: average_temporal", filter_average_temporal, mutates=True, max_size=256),
+        Case("filter: median_spatial", filter_median_spatial, mutates=True, max_size=256),
+        Case("filter: average_spatial", filter_average_spatial, mutates=True, max_size=256),
+    ]
+    for method in LEVEL_METHODS:
+        cases.append(Case("level: %s" % method, lambda scan, m=method: level_data(scan, m),
+                          mutates=True, max_size=1024))
+    for model in FIT_MODELS:
+        cases.append(Case("fit: %s" % model, lambda scan, m=model: fit_data(scan, m), mutates=True, max_size=64))
+    for name, func in IMPLEMENTED_PARAMETERS.items():
+        cases.append(Case("parameter: %s" % name, func))
+    for graph_type in (RASTER_IMAGE, SURFACE_PLOT):
+        cases.append(Case("draw: %s" % graph_type, _draw(graph_type), setup=_get_canvas))
+    return cases
+
+
+def time_case(case: Case, data, min_time: float) -> list[float]:
+    """Returns the times of at least MIN_REPEATS repetitions in s.
+    Repetitions are added until min_time has passed."""
+    times = []
+    start = time.perf_counter()
+    while len(times) < MIN_REPEATS or (time.perf_counter() - start < min_time and len(times) < MAX_REPEATS):
+        arguments = copy.deepcopy(data) if case.mutates else data
+        case_start = time.perf_counter()
+        case.run(arguments)
+        times.append(time.perf_counter() - case_start)
+    return times
+
+
+def get_environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(__file__)).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "commit": commit,
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run_benchmarks(cases: list[Case], sizes: list[int], min_time: float = DEFAULT_MIN_TIME,
+                   all_sizes: bool = False) -> list[dict]:
+    """Runs all cases for all sizes and returns a result per case and size."""
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for n in sizes:
+            scan = get_scan(n)
+            for case in cases:
+                result = {"case": case.name, "size": n}
+                if case.max_size is not None and n > case.max_size and not all_sizes:
+                    result["skipped"] = True
+                else:
+                    try:
+                        data = case.setup(scan, directory) if case.setup else scan
+                        times = time_case(case, data, min_time)
+                        result.update(repeats=len(times), min=min(times), median=statistics.median(times),
+                                      mean=statistics.mean(times), stdev=statistics.stdev(times))
+                    except Exception as e:
+                        result["error"] = "%s: %s" % (type(e).__name__, e)
+                print_result(result)
+                results.append(result)
+    return results
+
+
+def print_result(result: dict):
+    if "median" in result:
+        status = "%10.2f %10.2f %4i" % (result["median"] * 1000, result["min"] * 1000, result["repeats"])
+    else:
+        status = "skipped" if result.get("skipped") else "error: %s" % result["error"]
+    print("%6i %-60s %s" % (result["size"], result["case"][:60], status), flush=True)
+
+
+def compare_results(baseline: list[dict], results: list[dict], threshold: float = DEFAULT_THRESHOLD) -> list[dict]:
+    """Returns the cases whose median time is larger than threshold
+    times the median time of the baseline."""
+    baseline_medians = {(r["case"], r["size"]): r["median"] for r in baseline if "median" in r}
+    regressions = []
+    print("\n%6s %-60s %10s %10s %7s" % ("size", "case", "base [ms]", "new [ms]", "ratio"))
+    for result in results:
+        base = baseline_medians.get((result["case"], result["size"]))
+        if base is None or "median" not in result:
+            continue
+        ratio = result["median"] / base if base > 0 else float("inf")
+        regression = ratio > threshold and result["median"] > NOISE_FLOOR
+        print("%6i %-60s %10.2f %10.2f %7.2f%s" % (result["size"], result["case"][:60], base * 1000,
+                                                    result["median"] * 1000, ratio, "  slower" if regression else ""))
+        if regression:
+            regressions.append(dict(result, baseline_median=base, ratio=ratio))
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.benchmark_suite",
+                                     description="Times I/O, manipulations, parameters and drawing.")
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES), help="scan sizes n (n x n)")
+    parser.add_argument("--cases", help="regular expression selecting cases by name")
+    parser.add_argument("--all-sizes", action="store_true", help="ignore the maximum sizes of slow cases")
+    parser.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME,
+                        help="minimum time per case and size in s (default: %(default)s)")
+    parser.add_argument("--output", help="JSON file for the results")
+    parser.add_argument("--compare", help="JSON file with baseline results")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="ratio of median times reported as regression (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    cases = [case for case in get_cases() if not args.cases or re.search(args.cases, case.name)]
+    print("%6s %-60s %10s %10s %4s" % ("size", "case", "median[ms]", "min [ms]", "runs"))
+    results = run_benchmarks(cases, args.sizes, args.min_time, args.all_sizes)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"version": RESULTS_VERSION, "environment": get_environment(), "results": results},
+                      f, indent=2, ensure_ascii=False)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare_results(baseline, results, args.threshold)
+        if regressions:
+            print("\n%i case(s) slower than %.2f times the baseline." % (len(regressions), args.threshold))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,42 @@
+"""Benchmark for generating thumbnails of the imported files list.
+
+Generates thumbnails of random n x n scans into an empty cache and loads
+them again from the cache. Run from the repository root:
+
+    python -m benchmarks.benchmark_thumbnails [count] [size]
+"""
+import sys
+import tempfile
+import time
+
+import matplotlib
+import numpy as np
+
+from sicm_analyzer.sicm_data import ScanBackstepMode
+from sicm_analyzer.thumbnails import ThumbnailCache
+
+DEFAULT_COUNT = 1000
+DEFAULT_SIZE = 256
+
+
+def main(count: int, n: int):
+    color_map = matplotlib.colormaps["YlGnBu_r"]
+    rng = np.random.default_rng(0)
+    scans = []
+    for i in range(count):
+        scan = ScanBackstepMode()
+        scan.z = rng.normal(size=(n, n))
+        scans.append(scan)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for case in ["generate", "load"]:
+            cache = ThumbnailCache(directory)
+            start = time.perf_counter()
+            for scan in scans:
+                cache.get_thumbnail(scan, color_map)
+            print(f"{case:<10} {count} thumbnails of {n} x {n} scans: {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args + [DEFAULT_COUNT, DEFAULT_SIZE][len(args):]))
@@ -0,0 +1,393 @@
+"""This module implements areal surface texture parameters (S-parameters)
+according to ISO 25178-2.
+
+In contrast to the profile (R-) parameters in measurements.py, all parameters
+are evaluated on the full 2-dimensional height map of a scan. The data
+should be leveled before calculating areal parameters, since the mean
+plane is approximated by the mean height of the scan.
+
+Intermediate results (central moments, slopes, autocorrelation and material
+ratio curve) are computed once per ArealSurface instance and shared by all
+parameters. Use get_areal_parameters() to obtain all parameters of a scan in
+one call.
+
+NaN values in the height map are ignored. All functions accept an optional
+region of interest (ROI), see roi.py.
+"""
+from functools import cached_property
+
+import numpy as np
+
+from sicm_analyzer.roi import get_roi_z
+from sicm_analyzer.sicm_data import ScanBackstepMode
+
+# Material ratio at which the autocorrelation function is
+# considered to be decayed (default value in ISO 25178-3)
+ACF_THRESHOLD = 0.2
+# Width of the secant used to determine the core of
+# the material ratio curve (ISO 13565-2)
+EQUIVALENCE_LINE_WIDTH = 40.0
+
+
+class ArealSurface:
+    """Caches intermediate results which are needed to calculate
+    areal parameters of a scan.
+
+    Heights are stored relative to the mean height. Physical
+    step sizes are obtained from the micron to pixel factors of the scan.
+
+    If an ROI is given, self.z is a view of the ROI (or of the bounding
+    box of an ROI mask) and pixels outside the mask are treated as invalid.
+    """
+
+    def __init__(self, data: ScanBackstepMode, roi=None):
+        z = get_roi_z(data.z, roi)
+        self.inside: np.ndarray | None = None
+        if np.ma.isMaskedArray(z):
+            self.inside = ~np.ma.getmaskarray(z)
+            z = z.data
+        self.z: np.ndarray = np.asarray(z, dtype=float)
+        self.dx: float = data.micron_to_pixel_factor_x()
+        self.dy: float = data.micron_to_pixel_factor_y()
+
+    @cached_property
+    def valid(self) -> np.ndarray:
+        """Boolean mask of all finite height values inside the ROI."""
+        if self.inside is None:
+            return np.isfinite(self.z)
+        return np.isfinite(self.z) & self.inside
+
+    @cached_property
+    def heights(self) -> np.ndarray:
+        """1-dimensional array of all valid heights relative to the mean height."""
+        values = self.z[self.valid]
+        return values - np.mean(values)
+
+    @cached_property
+    def centered(self) -> np.ndarray:
+        """2-dimensional height map relative to the mean height.
+        Invalid values are set to 0 (the mean plane)."""
+        z = np.zeros(self.z.shape)
+        z[self.valid] = self.heights
+        return z
+
+    @cached_property
+    def moments(self) -> tuple[float, float, float, float]:
+        """Returns mean absolute height and 2nd, 3rd and 4th central moments."""
+        h = self.heights
+        h2 = h * h
+        return float(np.mean(np.abs(h))), float(np.mean(h2)), float(np.mean(h2 * h)), float(np.mean(h2 * h2))
+
+    @cached_property
+    def slopes_squared(self) -> np.ndarray:
+        """Squared local gradient of the height map (dz/dx)² + (dz/dy)².
+
+        Slopes outside an ROI mask are set to NaN. Slopes at the border
+        of a mask are calculated with the neighbouring pixels outside.
+        """
+        if min(self.z.shape) < 2:
+            return np.zeros(self.z.shape)
+        grad_y, grad_x = np.gradient(self.z, self.dy, self.dx)
+        slopes = grad_x * grad_x + grad_y * grad_y
+        if self.inside is not None:
+            slopes[~self.inside] = np.nan
+        return slopes
+
+    @cached_property
+    def autocorrelation(self) -> np.ndarray:
+        """Normalized areal autocorrelation function.
+
+        The ACF is computed by FFT on a zero-padded height map to
+        avoid wrap-around. The zero lag is shifted to the center of the array.
+        """
+        rows, cols = self.z.shape
+        shape = (2 * rows - 1, 2 * cols - 1)
+        spectrum = np.fft.rfft2(self.centered, s=shape)
+        acf = np.fft.irfft2(spectrum * np.conj(spectrum), s=shape)
+        acf = np.fft.fftshift(acf)
+        zero_lag = acf[rows - 1, cols - 1]
+        if zero_lag == 0:
+            return np.zeros(shape)
+        return acf / zero_lag
+
+    @cached_property
+    def lag_distances(self) -> np.ndarray:
+        """Physical length of each lag vector in the autocorrelation array."""
+        rows, cols = self.z.shape
+        lag_y = (np.arange(2 * rows - 1) - (rows - 1)) * self.dy
+        lag_x = (np.arange(2 * cols - 1) - (cols - 1)) * self.dx
+        return np.hypot(lag_y[:, np.newaxis], lag_x[np.newaxis, :])
+
+    @cached_property
+    def decay_lengths(self) -> np.ndarray:
+        """Lag distances at which the autocorrelation function has decayed
+        to ACF_THRESHOLD.
+
+        The central lobe is the connected region around the zero lag in which
+        the autocorrelation is above ACF_THRESHOLD. Decay lengths are the
+        distances of all lags bordering this lobe.
+        """
+        from scipy import ndimage
+
+        labels, _ = ndimage.label(self.autocorrelation > ACF_THRESHOLD)
+        rows, cols = self.z.shape
+        lobe = labels == labels[rows - 1, cols - 1]
+        border = ndimage.binary_dilation(lobe) & ~lobe
+        return self.lag_distances[border]
+
+    @cached_property
+    def material_ratio_curve(self) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the areal material ratio curve (Abbott-Firestone curve).
+
+        The first array contains the material ratio in % and the second
+        array the heights sorted in descending order.
+        """
+        h = np.sort(self.heights)[::-1]
+        n = len(h)
+        ratio = (np.arange(n) + 0.5) * 100.0 / n
+        return ratio, h
+
+    @cached_property
+    def equivalence_line(self) -> tuple[float, float]:
+        """Returns the heights of the equivalence straight line at 0% and 100%
+        material ratio.
+
+        The equivalence line is the secant of the material ratio curve which
+        spans 40% material ratio and has the smallest gradient (ISO 13565-2).
+        """
+        ratio, h = self.material_ratio_curve
+        n = len(h)
+        width = max(int(round(n * EQUIVALENCE_LINE_WIDTH / 100.0)), 1)
+        if n <= width:
+            return float(h[0]), float(h[-1])
+        drops = h[:-width] - h[width:]
+        start = int(np.argmin(drops))
+        gradient = (h[start + width] - h[start]) / (ratio[start + width] - ratio[start])
+        h0 = h[start] - gradient * ratio[start]
+        return float(h0), float(h0 + gradient * 100.0)
+
+    # Height parameters
+    @property
+    def sa(self) -> float:
+        """Arithmetical mean height"""
+        return self.moments[0]
+
+    @property
+    def sq(self) -> float:
+        """Root mean square height"""
+        return float(np.sqrt(self.moments[1]))
+
+    @property
+    def ssk(self) -> float:
+        """Skewness"""
+        if self.moments[1] == 0:
+            return 0.0
+        return self.moments[2] / self.moments[1] ** 1.5
+
+    @property
+    def sku(self) -> float:
+        """Kurtosis"""
+        if self.moments[1] == 0:
+            return 0.0
+        return self.moments[3] / self.moments[1] ** 2
+
+    @property
+    def sp(self) -> float:
+        """Maximum peak height"""
+        return float(np.max(self.heights))
+
+    @property
+    def sv(self) -> float:
+        """Maximum pit depth (as a positive value)"""
+        return float(-np.min(self.heights))
+
+    @property
+    def sz(self) -> float:
+        """Maximum height"""
+        return self.sp + self.sv
+
+    # Hybrid parameters
+    @property
+    def sdq(self) -> float:
+        """Root mean square gradient"""
+        return float(np.sqrt(np.nanmean(self.slopes_squared)))
+
+    @property
+    def sdr(self) -> float:
+        """Developed interfacial area ratio in %"""
+        return float(np.nanmean(np.sqrt(1.0 + self.slopes_squared) - 1.0) * 100.0)
+
+    # Spatial parameters
+    @property
+    def sal(self) -> float:
+        """Autocorrelation length: The shortest lag distance at which
+        the autocorrelation function decays to ACF_THRESHOLD."""
+        if self.decay_lengths.size == 0:
+            return float("nan")
+        return float(np.min(self.decay_lengths))
+
+    @property
+    def str_(self) -> float:
+        """Texture aspect ratio: the ratio of the shortest and the longest
+        decay length of the autocorrelation function."""
+        if self.decay_lengths.size == 0:
+            return float("nan")
+        return float(np.min(self.decay_lengths) / np.max(self.decay_lengths))
+
+    # Functional parameters (Sk family)
+    @property
+    def sk(self) -> float:
+        """Core height"""
+        h0, h100 = self.equivalence_line
+        return h0 - h100
+
+    @property
+    def smr1(self) -> float:
+        """Material ratio separating peaks from the core in %"""
+        h0, _ = self.equivalence_line
+        return float(np.count_nonzero(self.heights > h0) * 100.0 / len(self.heights))
+
+    @property
+    def smr2(self) -> float:
+        """Material ratio separating valleys from the core in %"""
+        _, h100 = self.equivalence_line
+        return float(np.count_nonzero(self.heights > h100) * 100.0 / len(self.heights))
+
+    @property
+    def spk(self) -> float:
+        """Reduced peak height: height of a triangle with the same
+        area as the peaks above the core."""
+        h0, _ = self.equivalence_line
+        smr1 = self.smr1
+        if smr1 == 0:
+            return 0.0
+        peaks = self.heights[self.heights > h0] - h0
+        area = np.sum(peaks) * 100.0 / len(self.heights)
+        return float(2.0 * area / smr1)
+
+    @property
+    def svk(self) -> float:
+        """Reduced valley depth: height of a triangle with the same
+        area as the valleys below the core."""
+        _, h100 = self.equivalence_line
+        smr2 = self.smr2
+        if smr2 == 100:
+            return 0.0
+        valleys = h100 - self.heights[self.heights < h100]
+        area = np.sum(valleys) * 100.0 / len(self.heights)
+        return float(2.0 * area / (100.0 - smr2))
+
+
+# Maps ISO 25178 symbols to the attributes of ArealSurface
+AREAL_PARAMETERS = {
+    "Sa": "sa",
+    "Sq": "sq",
+    "Ssk": "ssk",
+    "Sku": "sku",
+    "Sp": "sp",
+    "Sv": "sv",
+    "Sz": "sz",
+    "Sdq": "sdq",
+    "Sdr": "sdr",
+    "Sal": "sal",
+    "Str": "str_",
+    "Sk": "sk",
+    "Spk": "spk",
+    "Svk": "svk",
+    "Smr1": "smr1",
+    "Smr2": "smr2",
+}
+
+
+def get_areal_parameters(data: ScanBackstepMode, roi=None) -> dict[str, float]:
+    """Returns all areal parameters of a scan.
+
+    Keys are the ISO 25178 symbols listed in AREAL_PARAMETERS.
+    Intermediate results are computed only once.
+    """
+    surface = ArealSurface(data, roi)
+    return {symbol: getattr(surface, attribute) for symbol, attribute in AREAL_PARAMETERS.items()}
+
+
+# Height parameters
+def get_arithmetical_mean_height(data: ScanBackstepMode, roi=None) -> float:
+    """Arithmetical mean height (S_a)"""
+    return ArealSurface(data, roi).sa
+
+
+def get_root_mean_square_height(data: ScanBackstepMode, roi=None) -> float:
+    """Root mean square height (S_q)"""
+    return ArealSurface(data, roi).sq
+
+
+def get_areal_skewness(data: ScanBackstepMode, roi=None) -> float:
+    """Skewness of the height distribution (S_sk)"""
+    return ArealSurface(data, roi).ssk
+
+
+def get_areal_kurtosis(data: ScanBackstepMode, roi=None) -> float:
+    """Kurtosis of the height distribution (S_ku)"""
+    return ArealSurface(data, roi).sku
+
+
+def get_maximum_peak_height(data: ScanBackstepMode, roi=None) -> float:
+    """Maximum peak height (S_p)"""
+    return ArealSurface(data, roi).sp
+
+
+def get_maximum_pit_depth(data: ScanBackstepMode, roi=None) -> float:
+    """Maximum pit depth (S_v)"""
+    return ArealSurface(data, roi).sv
+
+
+def get_maximum_height(data: ScanBackstepMode, roi=None) -> float:
+    """Maximum height (S_z)"""
+    return ArealSurface(data, roi).sz
+
+
+# Hybrid parameters
+def get_root_mean_square_gradient(data: ScanBackstepMode, roi=None) -> float:
+    """Root mean square gradient (S_dq)"""
+    return ArealSurface(data, roi).sdq
+
+
+def get_developed_interfacial_area_ratio(data: ScanBackstepMode, roi=None) -> float:
+    """Developed interfacial area ratio (S_dr) in %"""
+    return ArealSurface(data, roi).sdr
+
+
+# Spatial parameters
+def get_autocorrelation_length(data: ScanBackstepMode, roi=None) -> float:
+    """Autocorrelation length (S_al)"""
+    return ArealSurface(data, roi).sal
+
+
+def get_texture_aspect_ratio(data: ScanBackstepMode, roi=None) -> float:
+    """Texture aspect ratio (S_tr)"""
+    return ArealSurface(data, roi).str_
+
+
+# Functional parameters
+def get_core_height(data: ScanBackstepMode, roi=None) -> float:
+    """Core height (S_k)"""
+    return ArealSurface(data, roi).sk
+
+
+def get_reduced_peak_height(data: ScanBackstepMode, roi=None) -> float:
+    """Reduced peak height (S_pk)"""
+    return ArealSurface(data, roi).spk
+
+
+def get_reduced_valley_depth(data: ScanBackstepMode, roi=None) -> float:
+    """Reduced valley depth (S_vk)"""
+    return ArealSurface(data, roi).svk
+
+
+def get_peak_material_ratio(data: ScanBackstepMode, roi=None) -> float:
+    """Material ratio separating peaks from the core (S_mr1)"""
+    return ArealSurface(data, roi).smr1
+
+
+def get_valley_material_ratio(data: ScanBackstepMode, roi=None) -> float:
+    """Material ratio separating valleys from the core (S_mr2)"""
+    return ArealSurface(data, roi).smr2
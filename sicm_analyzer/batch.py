@@ -0,0 +1,338 @@
+"""Headless batch processing of .sicm files.
+
+A pipeline of manipulations is applied to each scan. The processed scans
+can be exported as .sicm files and their parameters written to a CSV file.
+Run from the repository root:
+
+    python -m sicm_analyzer.batch "scans/*.sicm" --step crop=0,0,50,50 --step level
+        --step filter=median_spatial,2 --output-dir processed --csv results.csv
+
+Steps are applied in the given order after the steps of a pipeline file
+(--pipeline, see pipeline.py):
+    crop=x1,y1,x2,y2            crop to the rectangle between two points (px)
+    level                       subtract a plane
+    filter=<filter>[,radius]    median_temporal, median_spatial, average_temporal
+                                or average_spatial with a radius in px (default 1)
+    threshold=<value>           set values below value (µm) to value
+    transpose                   transpose z data
+    flip=x|y                    flip data in x or y direction
+
+Neither PyQt6 nor a matplotlib backend is imported, so batches run on
+machines without a display. Files are processed in parallel by a pool of
+processes (one per core unless --jobs is given). The pipeline is applied
+without intermediate copies of the data (see pipeline.run_pipeline_fused());
+--memory reports the peak memory of the pipeline for each file.
+
+Processed scans keep their path relative to the common directory of all
+input files in --output-dir. Array parameters (one value per profile) are
+written to the CSV file as values separated by semicolons.
+
+Results are cached on disk (see pipeline_cache.py), so applying a pipeline
+to a file again loads the result instead of processing the file.
+"""
+import argparse
+import csv
+import glob
+import os
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import NamedTuple
+
+import numpy as np
+
+from sicm_analyzer.manipulate_data import MEDIAN_TEMPORAL, MEDIAN_SPATIAL, AVERAGE_TEMPORAL, AVERAGE_SPATIAL
+from sicm_analyzer.manipulate_data import MirrorAxis
+from sicm_analyzer.parameters import IMPLEMENTED_PARAMETERS, AREAL_PARAMETER_SYMBOLS, calculate_parameters
+from sicm_analyzer.pipeline import Pipeline, PipelineStep, PipelineError, load_pipeline, run_pipeline_fused
+from sicm_analyzer.pipeline_cache import PipelineCache, DEFAULT_CACHE_DIRECTORY
+from sicm_analyzer.sicm_data import ScanBackstepMode, get_sicm_data, export_sicm_file
+
+SICM_FILE_EXTENSION = ".sicm"
+PEAK_MEMORY = "peak memory [MiB]"
+
+FILTERS = {
+    "median_temporal": ("filter_median_temporal", MEDIAN_TEMPORAL),
+    "median_spatial": ("filter_median_spatial", MEDIAN_SPATIAL),
+    "average_temporal": ("filter_average_temporal", AVERAGE_TEMPORAL),
+    "average_spatial": ("filter_average_spatial", AVERAGE_SPATIAL),
+}
+
+MIRROR_AXES = {
+    "x": (MirrorAxis.X_AXIS, "Flip data in x direction"),
+    "y": (MirrorAxis.Y_AXIS, "Flip data in y direction"),
+}
+
+
+class FileResult(NamedTuple):
+    """Result of processing a single file. error is None on success,
+    peak_memory (bytes) is None unless it was measured. cached is True
+    if the processed scan was loaded from the cache."""
+    path: str
+    scan_date: str = ""
+    parameters: dict = {}
+    error: str | None = None
+    peak_memory: int | None = None
+    cached: bool = False
+
+
+def _get_arguments(value: str, count: int, name: str) -> list[str]:
+    arguments = value.split(",") if value else []
+    if len(arguments) != count:
+        raise ValueError("%s expects %i argument(s), got %i" % (name, count, len(arguments)))
+    return arguments
+
+
+def parse_step(text: str) -> PipelineStep:
+    """Returns the pipeline step described by text, e.g. 'crop=0,0,10,10'.
+    Raises ValueError for unknown steps or invalid arguments."""
+    name, _, value = text.partition("=")
+    name = name.strip().lower()
+
+    if name == "crop":
+        x1, y1, x2, y2 = [int(a) for a in _get_arguments(value, 4, name)]
+        return PipelineStep("crop", {"point1": (x1, y1), "point2": (x2, y2)}, "Crop data")
+    if name == "level":
+        _get_arguments(value, 0, name)
+        return PipelineStep("level_data", {}, "Leveling (plane)")
+    if name == "filter":
+        arguments = value.split(",")
+        if arguments[0] not in FILTERS or len(arguments) > 2:
+            raise ValueError("filter expects one of %s and an optional radius" % ", ".join(FILTERS))
+        radius = int(arguments[1]) if len(arguments) == 2 else 1
+        func_name, label = FILTERS[arguments[0]]
+        return PipelineStep(func_name, {"px_radius": radius}, f"{label} (px-size: {radius})")
+    if name == "threshold":
+        threshold = float(_get_arguments(value, 1, name)[0])
+        return PipelineStep("subtract_threshold", {"threshold": threshold}, f"Subtract z threshold ({threshold})")
+    if name == "transpose":
+        _get_arguments(value, 0, name)
+        return PipelineStep("transpose_z_data", {}, "Transpose z")
+    if name == "flip":
+        if value not in MIRROR_AXES:
+            raise ValueError("flip expects x or y")
+        axis, action_name = MIRROR_AXES[value]
+        return PipelineStep("flip_z_data", {"mirror_axis": axis}, action_name)
+    raise ValueError("unknown step: %s" % name)
+
+
+def _step_type(text: str) -> PipelineStep:
+    """Converts ValueError to an error message of argparse."""
+    try:
+        return parse_step(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def get_parameter_name(text: str) -> str:
+    """Returns the name of the implemented parameter given by its full name,
+    its ISO 25178 symbol (e.g. 'Sq'), its first word (e.g. 'max') or a unique
+    part of its name (e.g. 'R_a')."""
+    if text in IMPLEMENTED_PARAMETERS:
+        return text
+    for name, symbol in AREAL_PARAMETER_SYMBOLS.items():
+        if text == symbol:
+            return name
+    # the first word of a name (e.g. 'max' of 'max [µm]') takes precedence over parts of names
+    matches = [name for name in IMPLEMENTED_PARAMETERS if name.split(" ")[0].lower() == text.lower()]
+    if not matches:
+        matches = [name for name in IMPLEMENTED_PARAMETERS if text.lower() in name.lower()]
+    if len(matches) == 1:
+        return matches[0]
+    if matches:
+        raise ValueError("%s matches several parameters: %s" % (text, "; ".join(matches)))
+    raise ValueError("unknown parameter: %s" % text)
+
+
+def _parameter_type(text: str) -> str:
+    try:
+        return get_parameter_name(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def find_files(patterns: list[str]) -> list[str]:
+    """Returns all .sicm files matching the glob patterns in the given order.
+    Directories are searched for .sicm files."""
+    files = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern, recursive=True)):
+            if os.path.isdir(path):
+                files.extend(sorted(glob.glob(os.path.join(path, "*" + SICM_FILE_EXTENSION))))
+            else:
+                files.append(path)
+    return list(dict.fromkeys(files))
+
+
+def get_input_root(files: list[str]) -> str:
+    """Returns the deepest directory which contains all files."""
+    return os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in files])
+
+
+def get_export_path(path: str, output_dir: str, input_root: str) -> str:
+    """Returns the path of the processed scan of path in output_dir. The path
+    relative to input_root is kept, so that files with the same name in different
+    directories do not overwrite each other."""
+    return os.path.join(output_dir, os.path.relpath(os.path.abspath(path), input_root))
+
+
+def _get_scan_date(data: ScanBackstepMode) -> str:
+    """Returns the scan date or "n/a" if the date in the file can not be read,
+    so that processed files are not reported as failed because of their metadata."""
+    try:
+        return data.get_scan_date()
+    except Exception as e:
+        print("Scan date could not be read: %s" % e)
+        return "n/a"
+
+
+def process_file(path: str, pipeline: Pipeline, output_dir: str | None = None,
+                 parameters: list[str] = (), measure_memory: bool = False,
+                 cache: PipelineCache | None = None, input_root: str | None = None) -> FileResult:
+    """Applies the pipeline to the scan in path, exports it to output_dir
+    and calculates parameters. Errors are returned in the result, parameters
+    which can not be calculated are "error".
+
+    :param input_root: directory whose subdirectories are recreated in output_dir,
+                       None exports to output_dir itself.
+    """
+    try:
+        data = get_sicm_data(path)
+        if not isinstance(data, ScanBackstepMode):
+            return FileResult(path, error="not a scan (%s)" % data.scan_mode)
+
+        # the data of the file is not used elsewhere, so it is manipulated in place
+        data, peak_memory, cached = run_pipeline_fused(data, pipeline, copy_data=False,
+                                                       measure_memory=measure_memory, cache=cache)
+
+        if output_dir:
+            export_path = get_export_path(path, output_dir, input_root or os.path.dirname(os.path.abspath(path)))
+            if os.path.abspath(export_path) == os.path.abspath(path):
+                return FileResult(path, error="export would overwrite the input file")
+            os.makedirs(os.path.dirname(export_path), exist_ok=True)
+            export_sicm_file(export_path, data, pipeline.action_names, pipeline.to_dict()["steps"])
+
+        results = calculate_parameters(data, parameters)
+        return FileResult(path, _get_scan_date(data), results, peak_memory=peak_memory, cached=cached)
+    except Exception as e:
+        traceback.print_exc()
+        return FileResult(path, error=str(e))
+
+
+def process_files(files: list[str], pipeline: Pipeline, output_dir: str | None = None,
+                  parameters: list[str] = (), jobs: int | None = None,
+                  measure_memory: bool = False, cache: PipelineCache | None = None) -> list[FileResult]:
+    """Processes all files and returns the results in the order of files.
+    Processed scans are exported to the same relative paths in output_dir
+    as the files have in their common directory.
+
+    :param jobs: number of processes. None uses all cores,
+                 1 processes the files in this process.
+    :param measure_memory: measures the peak memory of the pipeline for each file.
+    :param cache: cache of processed scans, None disables caching.
+    """
+    func = partial(process_file, pipeline=pipeline, output_dir=output_dir, parameters=parameters,
+                   measure_memory=measure_memory, cache=cache,
+                   input_root=get_input_root(files) if files else None)
+    jobs = min(jobs or os.cpu_count() or 1, len(files))
+    if jobs <= 1:
+        return [func(path) for path in files]
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(func, files))
+
+
+def _mebibytes(size: int) -> float:
+    return round(size / 2 ** 20, 3)
+
+
+def _format_value(value) -> str | float:
+    """Formats parameters which are arrays (e.g. one value per profile)
+    as values separated by semicolons."""
+    if isinstance(value, np.ndarray):
+        return ";".join(str(v) for v in value.ravel().tolist())
+    return value
+
+
+def write_csv(file_path: str, results: list[FileResult], parameters: list[str]):
+    """Writes one row of parameters per successfully processed file
+    and the peak memory if it was measured."""
+    peak_memory = any(result.peak_memory is not None for result in results)
+    with open(file_path, mode="w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["scan", "scan date"] + list(parameters) + ([PEAK_MEMORY] if peak_memory else []))
+        for result in results:
+            if result.error is None:
+                row = [result.path, result.scan_date] + [_format_value(result.parameters[name]) for name in parameters]
+                if peak_memory:
+                    row.append(_mebibytes(result.peak_memory))
+                writer.writerow(row)
+
+
+def get_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m sicm_analyzer.batch",
+        description="Applies manipulations to .sicm files and exports scans and parameters.",
+        epilog="Steps: crop=x1,y1,x2,y2, level, filter=<filter>[,radius], threshold=<value>, transpose, flip=x|y"
+    )
+    parser.add_argument("inputs", nargs="+", help="glob patterns or directories of .sicm files")
+    parser.add_argument("--pipeline", help="JSON or TOML pipeline file, applied before the steps")
+    parser.add_argument("-s", "--step", dest="steps", action="append", type=_step_type, default=[],
+                        help="manipulation applied to each scan, can be given several times")
+    parser.add_argument("-o", "--output-dir", help="directory for processed .sicm files")
+    parser.add_argument("--csv", help="CSV file for parameters of processed scans")
+    parser.add_argument("-p", "--parameters", nargs="+", type=_parameter_type,
+                        metavar="PARAMETER", default=list(IMPLEMENTED_PARAMETERS),
+                        help="parameters written to the CSV file given by name, symbol (e.g. Sq) "
+                             "or a unique part of the name (default: all)")
+    parser.add_argument("--memory", action="store_true",
+                        help="report the peak memory of the pipeline for each file (slower)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIRECTORY,
+                        help="directory for cached results (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true", help="neither load nor store cached results")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="number of processes (default: all cores)")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Runs a batch and returns the exit code: 0 if all files were
+    processed, 1 if any file failed and 2 if no files were found."""
+    parser = get_argument_parser()
+    args = parser.parse_args(argv)
+
+    pipeline = Pipeline()
+    if args.pipeline:
+        try:
+            pipeline = load_pipeline(args.pipeline)
+        except PipelineError as e:
+            parser.error(str(e))
+    pipeline.steps.extend(args.steps)
+
+    files = find_files(args.inputs)
+    if not files:
+        print("No .sicm files found.", file=sys.stderr)
+        return 2
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    parameters = args.parameters if args.csv else []
+
+    cache = None if args.no_cache else PipelineCache(args.cache_dir)
+    results = process_files(files, pipeline, args.output_dir, parameters, args.jobs, args.memory, cache)
+    if args.csv:
+        write_csv(args.csv, results, parameters)
+
+    failed = [result for result in results if result.error is not None]
+    if args.memory:
+        for result in results:
+            if result.peak_memory is not None:
+                print("%s: peak memory %s MiB" % (result.path, _mebibytes(result.peak_memory)))
+    for result in failed:
+        print("%s: %s" % (result.path, result.error), file=sys.stderr)
+    print("Processed %i of %i files (%i from cache)." % (len(results) - len(failed), len(results),
+                                                         sum(result.cached for result in results)))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
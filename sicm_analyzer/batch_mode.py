@@ -0,0 +1,118 @@
+"""This module provides the batch mode of the GUI.
+
+A BatchJob applies a pipeline (see pipeline.py) to several scans in a
+pool of worker processes, so that the GUI stays responsive and all cores
+are used. Each scan is processed independently: if a step fails, no
+manipulations of that scan are kept and the error is reported, while the
+other scans are processed as usual.
+
+The worker processes return the state of the data after each step. These
+states are put on the undo stack of the scans (see
+DataManager.add_pipeline_results()) as soon as a scan is finished.
+Fused jobs only return the final state, which is calculated without
+intermediate copies (see pipeline.run_pipeline_fused()). Results are
+loaded from and stored in a PipelineCache if one is given.
+"""
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from sicm_analyzer.pipeline import Pipeline, apply_pipeline_steps, apply_pipeline_fused
+from sicm_analyzer.pipeline_cache import PipelineCache
+from sicm_analyzer.sicm_data import SICMdata
+
+
+def create_batch_executor(max_workers: int | None = None) -> ProcessPoolExecutor:
+    """Returns a process pool for batch jobs with one process per core
+    unless max_workers is given.
+
+    Worker processes are spawned instead of forked, since forking a
+    process with running Qt threads is not safe.
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+class BatchJob(QObject):
+    """Applies a pipeline to a dict of SICMdata objects in a process pool.
+
+    scan_finished is emitted with the key and the list of states after
+    each step (only the final state if fused is True), scan_failed with the key and an error message. progress
+    is emitted with the number of completed scans and finished when all
+    scans are completed or cancelled. All signals are emitted in the
+    thread of the job (the GUI thread).
+    """
+    scan_finished = pyqtSignal(str, object)
+    scan_failed = pyqtSignal(str, str)
+    progress = pyqtSignal(int)
+    finished = pyqtSignal()
+    # done callbacks of futures are called in a thread of the executor
+    _future_done = pyqtSignal(str, object)
+
+    def __init__(self, executor: ProcessPoolExecutor, data: dict[str, SICMdata], pipeline: Pipeline,
+                 fused: bool = False, cache: PipelineCache = None, parent=None):
+        super().__init__(parent)
+        self.executor = executor
+        self.data = data
+        self.pipeline = pipeline
+        self.fused = fused
+        self.cache = cache
+        self.futures: dict[str, Future] = {}
+        self.completed = 0
+        # scans which were cancelled or whose results were discarded
+        self.skipped = 0
+        self.failures: dict[str, str] = {}
+        self.cancelled = False
+        self.pool_broken = False
+        self._future_done.connect(self._handle_result)
+
+    @property
+    def total(self) -> int:
+        return len(self.data)
+
+    @property
+    def is_finished(self) -> bool:
+        return self.completed == self.total
+
+    def start(self):
+        """Submits all scans to the executor."""
+        if not self.data:
+            self.finished.emit()
+            return
+        func = apply_pipeline_fused if self.fused else apply_pipeline_steps
+        for key, data in self.data.items():
+            future = self.executor.submit(func, data, self.pipeline, self.cache)
+            self.futures[key] = future
+            future.add_done_callback(lambda f, k=key: self._future_done.emit(k, f))
+
+    def cancel(self):
+        """Cancels all scans which have not been started. Results of
+        running scans are discarded when they are finished."""
+        self.cancelled = True
+        for future in list(self.futures.values()):
+            future.cancel()
+
+    def _handle_result(self, key: str, future: Future):
+        if self.futures.pop(key, None) is None:
+            return
+        self.completed += 1
+
+        if self.cancelled or future.cancelled():
+            self.skipped += 1
+        elif future.exception() is not None:
+            exception = future.exception()
+            if isinstance(exception, BrokenProcessPool):
+                self.pool_broken = True
+            self.failures[key] = str(exception) or type(exception).__name__
+            self.scan_failed.emit(key, self.failures[key])
+        else:
+            states = future.result()
+            # versions of the worker process are not valid in this process
+            for state in states:
+                state.data_changed()
+            self.scan_finished.emit(key, states)
+
+        self.progress.emit(self.completed)
+        if self.is_finished:
+            self.finished.emit()
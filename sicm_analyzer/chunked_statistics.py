@@ -0,0 +1,205 @@
+"""This module provides single-pass accumulators for statistics of
+z data which is too large to be held in memory at once.
+
+Z data can be passed as a numpy array (including memory-mapped arrays
+created with numpy.memmap or numpy.load(..., mmap_mode="r")) or as an
+iterable of row chunks. Each chunk is reduced to a few numbers which are
+merged into the running result. Therefore, memory usage does not depend
+on the size of the scan.
+
+    - MomentAccumulator: count, mean, 2nd to 4th central moments, min and max.
+      Chunks are merged with the pairwise update formulas by Chan et al.
+      and Pébay, which are numerically stable.
+    - QuantileSketch: approximate quantiles with bounded memory. The sketch
+      stores a hierarchy of sorted compactors similar to the KLL sketch.
+
+Non-finite values (NaN, inf) are ignored.
+"""
+from collections.abc import Iterable, Iterator
+
+import numpy as np
+
+# Number of rows read at once from array-like z data
+DEFAULT_CHUNK_ROWS = 256
+# Number of values kept per compactor level of a QuantileSketch
+DEFAULT_SKETCH_SIZE = 4096
+
+
+def iter_row_chunks(source: np.ndarray | Iterable, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[np.ndarray]:
+    """Yields chunks of z data as numpy arrays.
+
+    Arrays (including np.memmap) are sliced into blocks of chunk_rows rows.
+    Slicing a memory-mapped array does not read the data; it is read when
+    the chunk is reduced. Any other iterable is expected to yield array-like
+    chunks which are passed through.
+    """
+    if isinstance(source, np.ndarray):
+        if source.ndim < 2:
+            yield source
+            return
+        for start in range(0, source.shape[0], chunk_rows):
+            yield source[start:start + chunk_rows]
+    else:
+        for chunk in source:
+            yield np.asarray(chunk)
+
+
+def _finite_values(chunk: np.ndarray) -> np.ndarray:
+    """Returns the finite values of a chunk as a flat float64 array."""
+    values = np.asarray(chunk, dtype=np.float64).ravel()
+    return values[np.isfinite(values)]
+
+
+class MomentAccumulator:
+    """Accumulates count, mean, central moment sums, minimum and maximum
+    of z data chunk by chunk.
+
+    Central moment sums are M_p = sum((z - mean)^p) for p = 2, 3, 4.
+    """
+
+    def __init__(self):
+        self.n: int = 0
+        self.mean: float = 0.0
+        self.m2: float = 0.0
+        self.m3: float = 0.0
+        self.m4: float = 0.0
+        self.minimum: float = np.inf
+        self.maximum: float = -np.inf
+
+    def add(self, chunk: np.ndarray):
+        """Adds all finite values of a chunk."""
+        values = _finite_values(chunk)
+        if values.size == 0:
+            return
+        other = MomentAccumulator()
+        other.n = values.size
+        other.mean = float(np.mean(values))
+        diff = values - other.mean
+        diff2 = diff * diff
+        other.m2 = float(np.sum(diff2))
+        other.m3 = float(np.sum(diff2 * diff))
+        other.m4 = float(np.sum(diff2 * diff2))
+        other.minimum = float(np.min(values))
+        other.maximum = float(np.max(values))
+        self.merge(other)
+
+    def merge(self, other: "MomentAccumulator"):
+        """Merges the moments of another accumulator into this one."""
+        if other.n == 0:
+            return
+        if self.n == 0:
+            self.__dict__.update(other.__dict__)
+            return
+
+        n_a, n_b = self.n, other.n
+        n = n_a + n_b
+        delta = other.mean - self.mean
+        delta2 = delta * delta
+
+        m2 = self.m2 + other.m2 + delta2 * n_a * n_b / n
+        m3 = (self.m3 + other.m3
+              + delta2 * delta * n_a * n_b * (n_a - n_b) / n ** 2
+              + 3.0 * delta * (n_a * other.m2 - n_b * self.m2) / n)
+        m4 = (self.m4 + other.m4
+              + delta2 * delta2 * n_a * n_b * (n_a * n_a - n_a * n_b + n_b * n_b) / n ** 3
+              + 6.0 * delta2 * (n_a * n_a * other.m2 + n_b * n_b * self.m2) / n ** 2
+              + 4.0 * delta * (n_a * other.m3 - n_b * self.m3) / n)
+
+        self.n = n
+        self.mean = self.mean + delta * n_b / n
+        self.m2, self.m3, self.m4 = m2, m3, m4
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    def central_moment(self, order: int) -> float:
+        """Returns the central moment of order 2, 3 or 4."""
+        if self.n == 0:
+            return float("nan")
+        return {2: self.m2, 3: self.m3, 4: self.m4}[order] / self.n
+
+    def raw_moment(self, order: int) -> float:
+        """Returns the raw moment mean(z^p) of order 1 to 4.
+
+        Raw moments are derived from central moments to keep
+        the accumulation numerically stable.
+        """
+        mu = self.mean
+        if order == 1:
+            return mu
+        c2 = self.central_moment(2)
+        if order == 2:
+            return c2 + mu ** 2
+        c3 = self.central_moment(3)
+        if order == 3:
+            return c3 + 3 * mu * c2 + mu ** 3
+        c4 = self.central_moment(4)
+        return c4 + 4 * mu * c3 + 6 * mu ** 2 * c2 + mu ** 4
+
+
+class QuantileSketch:
+    """Approximate quantiles of a stream of values with bounded memory.
+
+    Values are collected in a hierarchy of compactors. If a compactor holds
+    more than `size` values, it is sorted and every other value (randomly
+    starting with the first or second) is promoted to the next level with
+    twice the weight. Memory usage grows only logarithmically with the
+    number of values.
+
+    :param int size: number of values kept per level. Larger values improve accuracy.
+    :param seed: seed for the random offsets used during compaction
+    """
+
+    def __init__(self, size: int = DEFAULT_SKETCH_SIZE, seed=None):
+        self.size = max(int(size), 2)
+        self.n: int = 0
+        self.levels: list[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def add(self, chunk: np.ndarray):
+        """Adds all finite values of a chunk."""
+        values = _finite_values(chunk)
+        if values.size == 0:
+            return
+        self.n += values.size
+        self.levels[0] = np.concatenate((self.levels[0], values))
+        self._compress()
+
+    def merge(self, other: "QuantileSketch"):
+        """Merges the values of another sketch into this one."""
+        for level, values in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate((self.levels[level], values))
+        self.n += other.n
+        self._compress()
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            values = self.levels[level]
+            if values.size > self.size:
+                values = np.sort(values)
+                # an odd value stays in this level
+                remainder = values[:values.size % 2]
+                values = values[values.size % 2:]
+                offset = int(self._rng.integers(2))
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[level + 1] = np.concatenate((self.levels[level + 1], values[offset::2]))
+                self.levels[level] = remainder
+            level += 1
+
+    def quantile(self, q: float) -> float:
+        """Returns the approximate q-quantile (0 <= q <= 1)."""
+        if self.n == 0:
+            return float("nan")
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(level_values.size, 2 ** level) for level, level_values in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        index = np.searchsorted(cumulative, q * cumulative[-1], side="left")
+        return float(values[order][min(index, values.size - 1)])
+
+    def percentile(self, p: float) -> float:
+        """Returns the approximate p-th percentile (0 <= p <= 100)."""
+        return self.quantile(p / 100.0)
@@ -1,10 +1,11 @@
 import csv
+import functools
 import os
 import sys
 
 import matplotlib.pyplot as plt
 import matplotlib.colors as mcolors
-from PyQt6.QtGui import QIcon, QColor, QPixmap
+from PyQt6.QtGui import QIcon, QColor, QPixmap, QStandardItem, QStandardItemModel
 from matplotlib.colors import LinearSegmentedColormap
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 from PyQt6.QtWidgets import QApplication, QGridLayout, QLineEdit, QLabel, QCheckBox, \
@@ -408,8 +409,8 @@ class ColorModule(QWidget):
         self.label_id = QLabel("COLOR " + str(num_id) + "   ")
         self.label_id.setStyleSheet("font-weight: bold")
         self.combobox_predefined = QComboBox()
-        icon_dict = create_color_icon_dictionary()
-        add_icons_to_combobox_items(self.combobox_predefined, icon_dict)
+        # all color modules share the items of the predefined colors
+        self.combobox_predefined.setModel(get_color_model())
         self.check_custom_color = QCheckBox("Use custom?")
         self.button_choose_color = QPushButton('Choose')
         self.button_choose_color.setDisabled(True)
@@ -564,11 +565,37 @@ def generate_colorbar_figure(cmap):
     return fig
 
 
+@functools.lru_cache(maxsize=None)
+def get_color_icons() -> dict[str, QIcon]:
+    """Returns the dictionary of create_color_icon_dictionary(),
+    which is created once per process and shared. Do not change it."""
+    # icons must be deleted before the application
+    QApplication.instance().aboutToQuit.connect(clear_color_icons)
+    return create_color_icon_dictionary()
+
+
+@functools.lru_cache(maxsize=None)
+def get_color_model() -> QStandardItemModel:
+    """Returns a model with an item per color of get_color_icons(), which
+    is shared by the combo boxes of all ColorModules. Do not change it."""
+    model = QStandardItemModel()
+    for color_name, icon in get_color_icons().items():
+        model.appendRow(QStandardItem(icon, color_name))
+    return model
+
+
+def clear_color_icons():
+    get_color_model.cache_clear()
+    get_color_icons.cache_clear()
+
+
 def create_color_icon_dictionary():
     """
     dictionary for matching color names to color icons in predefined lists
     key: string containing color_name from mcolors.CSS4 color list
     value: QIcon object that displays a small swatch of corresponding color
+
+    Use get_color_icons() to get a shared dictionary.
     """
     color_icons = {}
 
@@ -1,9 +1,7 @@
-import lmfit
 import numpy as np
 from sicm_analyzer.sicm_data import SICMdata
-from symfit.core.minimizers import BFGS
-import symfit
-from symfit.core.objectives import LeastSquares
+# lmfit and symfit (with sympy) take about a second to import and
+# are therefore imported when a fit is performed first
 
 
 
@@ -21,6 +19,8 @@ def polynomial_fifth_degree(x, y, p00=0, p10=0, p01=0, p20=0, p11=0, p02=0, p30=
 
 def poly_xx_fit(data: SICMdata):
     """Fit data to a two-dimensional polynomial of fifth degree."""
+    import lmfit
+
     x = data.x.flatten("F")
     y = data.y.flatten("F")
     z = data.z.flatten("F")
@@ -61,6 +61,10 @@ def polynomial_fifth_degree_symfit(x_data, y_data, z_data: np.array):
     """Returns data fitted to a polynomial of 5th degree with two
     variables x and y.
     """
+    import symfit
+    from symfit.core.minimizers import BFGS
+    from symfit.core.objectives import LeastSquares
+
     x, y, z = symfit.variables('x, y, z')
     p00, p10, p01, p20, p11, p02, p30, p21, p12, p03, p40, p31, p22, p13, p04, p50, p41, p32, p23, p14, p05 = symfit.parameters(
         "p00, p10, p01, p20, p11, p02, p30, p21, p12, p03, p40, p31, p22, p13, p04, p50, p41, p32, p23, p14, p05"
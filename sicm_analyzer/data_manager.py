@@ -1,4 +1,6 @@
 from sicm_analyzer import sicm_data
+from sicm_analyzer.pipeline import run_pipeline_fused
+from sicm_analyzer.instrumentation import measure, MANIPULATION
 import copy
 from typing import Callable
 
@@ -20,6 +22,7 @@ class UndoRedoData:
         It stores a string describing the performed action and a deepcopy the data
         before it is manipulated. Although a deepcopy might be overkill for the current
         implementation, for future extensions it might be necessary.
+        The immutable metadata record of the data is not copied but shared.
 
         :param str name: a name describing the performed action
         :param SICMdata data: SICMdata object
@@ -34,6 +37,22 @@ class UndoRedoData:
         }
 
 
+    @classmethod
+    def without_copy(cls, data: sicm_data.SICMdata, func=None, name: str = "", *args, **kwargs) -> "UndoRedoData":
+        """Returns an UndoRedoData object which stores data itself instead
+        of a copy. Use it for data which is not referenced elsewhere, e.g.
+        data received from another process."""
+        item = cls.__new__(cls)
+        item.data = data
+        item.name = name
+        item.func = func
+        item.arguments = {
+            "args": args,
+            "kwargs": kwargs
+        }
+        return item
+
+
 class DataManager:
     """
     This class stores all imported SICM data, manages undo/redo functionality for
@@ -86,8 +105,13 @@ class DataManager:
 
         Note: SICM data files should always be imported using this function!
         """
-        data = UndoRedoData(sicm_data.get_sicm_data(file), "raw_data")
-        self.data_collection[file] = ([data], [])
+        self.add_imported_data(file, sicm_data.get_sicm_data(file))
+
+    def add_imported_data(self, file: str, data: sicm_data.SICMdata):
+        """Adds data which has been imported from file, e.g. by
+        a FileIOService, to data collection.
+        The data is not copied since it is not referenced elsewhere."""
+        self.data_collection[file] = ([UndoRedoData.without_copy(data, name="raw_data")], [])
 
     def get_files_without_duplicates(self, files):
         """Returns a list which only includes files that
@@ -249,6 +273,39 @@ class DataManager:
         """Returns an iterable with all keys in the data collection."""
         return self.data_collection.keys()
 
+    def execute_pipeline(self, key: str, pipeline):
+        """Applies the steps of a Pipeline (see pipeline.py) to the data.
+        Each step is added to the undo stack separately."""
+        for step in pipeline.steps:
+            self.execute_func_on_current_data(
+                step.func, key, step.action_name, **step.arguments
+            )(self.get_data(key), **step.arguments)
+
+    def add_pipeline_results(self, key: str, pipeline, states: list[sicm_data.SICMdata]):
+        """Puts the states of the data after each step of a Pipeline
+        (see pipeline.apply_pipeline_steps()) on the undo stack, so that each
+        step can be undone as if it had been executed here.
+
+        The listener function is not called.
+        """
+        undo_stack = self.data_collection.get(key)[UNDO_STACK]
+        for step, state in zip(pipeline.steps, states):
+            undo_stack.append(UndoRedoData.without_copy(state, step.func, step.action_name, **step.arguments))
+        self.data_collection.get(key)[REDO_STACK].clear()
+
+    def add_fused_pipeline_result(self, key: str, pipeline, data: sicm_data.SICMdata):
+        """Puts the result of a Pipeline which was applied without intermediate
+        states (see pipeline.run_pipeline_fused()) on the undo stack.
+        All steps are undone at once.
+
+        The listener function is not called.
+        """
+        name = "Pipeline: %s" % ", ".join(pipeline.action_names)
+        self.data_collection.get(key)[UNDO_STACK].append(
+            UndoRedoData.without_copy(data, run_pipeline_fused, name, pipeline=pipeline)
+        )
+        self.data_collection.get(key)[REDO_STACK].clear()
+
     def execute_func_on_current_data(self, func: Callable, key: str, action_name: str = "action", *args, **kwargs):
         """This wrapper function is used to make other functions undo/redoable.
         Wrap the function and pass a name for that action.
@@ -269,9 +326,13 @@ class DataManager:
             """This wrapper will call the wrapped function first
             and then the listener_function of the DataManager if exists.
             """
-            func(*args, **kwargs)
+            with measure(action_name, MANIPULATION, self.get_data(key)):
+                func(*args, **kwargs)
+            # some functions manipulate z data in place
+            self.get_data(key).data_changed()
             self.listener_function()
 
-        self._make_undoable_data_copy(key, func, action_name, *args, **kwargs)
+        with measure("Copy for undo", MANIPULATION, self.get_data(key)):
+            self._make_undoable_data_copy(key, func, action_name, *args, **kwargs)
 
         return wrapper
@@ -0,0 +1,165 @@
+"""This module provides a service which reads and writes files in background threads.
+
+Controller actions which import or export files submit requests to a
+FileIOService instead of accessing files in the GUI thread. Each request
+calls a function in a thread of the service's thread pool and is
+represented by an IOFuture, which emits finished in the GUI thread when the
+request is done, has failed or has been cancelled. Requests are started
+in the order in which they were submitted.
+
+Pending requests are cancelled immediately. Requests which are already
+running can not be interrupted: they are marked as cancelled when they
+finish and their results are discarded.
+
+The service reports the progress of all requests submitted since it was
+idle last, which the main window shows in the status bar.
+"""
+import enum
+from typing import Callable
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+# reading .sicm files is mostly decompression and parsing,
+# therefore few threads suffice
+DEFAULT_IO_THREADS = 2
+
+
+class IOState(enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class IOFuture(QObject):
+    """A request of a FileIOService.
+
+    finished is emitted with the future in the thread in which the future
+    was created. result is the return value of the function if the request
+    is done, error describes the exception if it failed.
+    """
+    finished = pyqtSignal(object)
+    # emitted by the worker thread with the result and error
+    _completed = pyqtSignal(object, object)
+
+    def __init__(self, description: str, func: Callable, args: tuple, kwargs: dict):
+        super().__init__()
+        self.description = description
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.state = IOState.PENDING
+        self.result = None
+        self.error: str | None = None
+        self.cancel_requested = False
+        self._completed.connect(self._complete)
+
+    def done(self) -> bool:
+        return self.state in (IOState.DONE, IOState.FAILED, IOState.CANCELLED)
+
+    @property
+    def succeeded(self) -> bool:
+        return self.state == IOState.DONE
+
+    @property
+    def cancelled(self) -> bool:
+        return self.state == IOState.CANCELLED
+
+    def _complete(self, result, error: str | None):
+        if self.cancel_requested:
+            self.state = IOState.CANCELLED
+        elif error is not None:
+            self.state = IOState.FAILED
+            self.error = error
+        else:
+            self.state = IOState.DONE
+            self.result = result
+        self.finished.emit(self)
+
+
+class IOWorker(QRunnable):
+    """Calls the function of an IOFuture in a thread of the thread pool."""
+
+    def __init__(self, future: IOFuture):
+        super().__init__()
+        self.future = future
+        # the worker is owned by FileIOService.workers
+        self.setAutoDelete(False)
+
+    def run(self):
+        future = self.future
+        if future.cancel_requested:
+            future._completed.emit(None, None)
+            return
+        future.state = IOState.RUNNING
+        try:
+            result, error = future.func(*future.args, **future.kwargs), None
+        except Exception as e:
+            result, error = None, "%s: %s" % (type(e).__name__, e)
+        future._completed.emit(result, error)
+
+
+class FileIOService(QObject):
+    """Runs file I/O requests in a thread pool of its own, so that
+    they do not wait for rendering or thumbnail workers.
+
+    progress is emitted with the numbers of finished and submitted
+    requests since the service was idle last. idle is emitted when all
+    requests have finished.
+    """
+    progress = pyqtSignal(int, int)
+    idle = pyqtSignal()
+
+    def __init__(self, max_threads: int = DEFAULT_IO_THREADS):
+        super().__init__()
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(max_threads)
+        self.workers: dict[IOFuture, IOWorker] = {}
+        self.submitted = 0
+        self.finished = 0
+
+    @property
+    def is_idle(self) -> bool:
+        return not self.workers
+
+    def submit(self, description: str, func: Callable, *args, **kwargs) -> IOFuture:
+        """Calls func(*args, **kwargs) in the background and returns the IOFuture of the request.
+        func must not access widgets and data which are changed in the GUI thread."""
+        future = IOFuture(description, func, args, kwargs)
+        # the service is notified before the slots connected by the caller
+        future.finished.connect(self._request_finished)
+        worker = IOWorker(future)
+        self.workers[future] = worker
+        self.submitted += 1
+        self.pool.start(worker)
+        self.progress.emit(self.finished, self.submitted)
+        return future
+
+    def cancel(self, future: IOFuture):
+        """Cancels a request. Pending requests are removed from the queue
+        and emit finished immediately."""
+        if future.done() or future.cancel_requested:
+            return
+        future.cancel_requested = True
+        worker = self.workers.get(future)
+        if worker is not None and self.pool.tryTake(worker):
+            future._complete(None, None)
+
+    def cancel_all(self):
+        for future in list(self.workers):
+            self.cancel(future)
+
+    def wait_for_done(self, msecs: int = -1) -> bool:
+        """Waits until the running requests have finished, e.g., before the application quits.
+        Their finished signals are delivered when events are processed."""
+        return self.pool.waitForDone(msecs)
+
+    def _request_finished(self, future: IOFuture):
+        self.workers.pop(future, None)
+        self.finished += 1
+        self.progress.emit(self.finished, self.submitted)
+        if not self.workers:
+            self.submitted = 0
+            self.finished = 0
+            self.idle.emit()
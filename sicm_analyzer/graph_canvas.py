@@ -7,14 +7,21 @@ from matplotlib.backends.backend_qtagg import NavigationToolbar2QT as Navigation
 from matplotlib.figure import Figure
 from matplotlib.patches import Rectangle, Circle
 from matplotlib.lines import Line2D
+from matplotlib.collections import LineCollection
 from mpl_toolkits.mplot3d import Axes3D
 from mpl_toolkits.axes_grid1 import make_axes_locatable
 from mpl_toolkits.axes_grid1.inset_locator import inset_axes
 from matplotlib.colors import Normalize
+from matplotlib.cm import ScalarMappable
+from PyQt6.QtCore import QTimer, QObject, QRunnable, QThreadPool, pyqtSignal
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import sicm_analyzer.sicm_data
 from sicm_analyzer.mouse_events import MouseInteraction, COLUMN, ROW, CROSS
+from sicm_analyzer.roi import get_rectangle_slices
+from sicm_analyzer.level_of_detail import get_decimation_factor, decimate_surface, MAX
 from sicm_analyzer.sicm_data import SICMdata, ScanBackstepMode
 from sicm_analyzer.view import View
+from sicm_analyzer.instrumentation import instrumented, DRAW
 import numpy as np
 import math
 
@@ -22,6 +29,17 @@ SURFACE_PLOT = "surface"
 RASTER_IMAGE = "raster"
 APPROACH_CURVE = "approach"
 
+# Pixel edges are drawn as a grid on top of raster images if
+# neither dimension has more pixels. Above, the lines would cover the image.
+MAX_PIXELS_FOR_GRID = 128
+
+# Level of detail of surface plots: number of canvas pixels per face
+# when idle and maximum number of faces while the plot is rotated.
+SURFACE_PIXELS_PER_FACE = 64
+INTERACTIVE_SURFACE_FACES = 2500
+# Delay in ms after the last interaction before the surface is refined
+SURFACE_REFINE_DELAY = 300
+
 
 def convert_axes_labels_from_px_to_microns(data: SICMdata, axes):
     """
@@ -42,90 +60,66 @@ def convert_x_axis_labels_from_px_to_microns(data: SICMdata, axes):
         axes.set_xticklabels([round(tick * data.micron_to_pixel_factor_x(), 2) for tick in x_ticks])
 
 
-class GraphCanvas(FigureCanvasQTAgg):
-    """Canvas for drawing graphs from .sicm data.
-
-    This class implements all functions for plotting SICM data. Line profiles
-    can also be drawn.
-
-    Drawing of rectangles on 2D raster images for defining, for example,
-    regions of interest (ROI) is also supported.
+class GraphPlotter:
+    """Draws graphs of SICM data on self.figure.
 
-    For mouse interaction with the plots two attributes are
-    in this class:
-        - mi: to reference an instance of MouseInteraction (see MouseInteraction documentation)
-        - function_after_mouse_event: a callable can be assigned to this field which will be called
-        as a consequence of the mouse interaction (e.g., a data manipulating function/method after selection
-        of pixels in the plot)
-
-    To add functionality for mouse interactions with the canvas:
-        Define a method which takes a callable and maybe some arguments as parameters.
-        In this method bind the callable to an instance of MouseInteraction.
-
-    TODO: Plot settings should be controlled by a View object.
-    TODO: add navigation toolbar?
+    This class holds the plotting functions and the references to persistent
+    artists. It is shared by GraphCanvas, which draws on the Qt canvas, and
+    OffscreenGraphCanvas, which draws in a background thread (see RenderWorker).
+    Subclasses must also inherit from a matplotlib FigureCanvas.
     """
 
-    def __init__(self, width=5, height=4, dpi=100):
-        fig = Figure(figsize=(width, height), dpi=dpi)
-        self.axes = fig.add_subplot(111)
-        super().__init__(fig)
-        # NavToolbar should be customized before integrating in GraphCanvas
-        # Furthermore, GraphCanvas needs a parent widget
-        # self.toolbar = NavigationToolbar(canvas=self, parent=self)
-
-        # These attributes are necessary for handling the various
-        # mouse event functions
-        self.mi = MouseInteraction()
-        self.function_after_mouse_events = None
-        self.clean_up_function = None
-        self.show_mouse_over_label = True
-        self.current_data: SICMdata = SICMdata()
-        self.current_view: View = View()
-        self.graph_type = ""
-        self.draw_white_canvas()
-
-    def draw_graph(self, data: SICMdata, graph_type: str = "", view: View = None):
-        """
-        Draws a 3D or 2D graph depending on the type. Three types are supported at the moment:
-            SURFACE_PLOT: a 3-dimensional figure which can be rotated by mouse interaction
-            RASTER_IMAGE: a raster image for 3D data with a color bar
-            APPROACH_CURVE:
-
-        Data needs to be checked before calling this function!
-
-        :param SICMdata data: contains the data for plotting
-        :param str graph_type: type of graph to be drawn. If no type is given, an empty canvas will be drawn
-        :param View view: contains plot settings
-        """
+    use_image_renderer: bool = True
+    refine_surface_to_full_resolution: bool = False
+    surface_decimation_method: str = MAX
+
+    def reset_plot_state(self):
+        """Removes references to persistent artists."""
+        # persistent artists of the raster image
+        self.raster_image = None
+        self.raster_layout: tuple | None = None
+        self.raster_data_version: tuple[int, int] | None = None
+        # level of detail of surface plots
+        self.surface = None
+        self.surface_axes = None
+        self.surface_norm = None
+        self.surface_decimation_factor: int | None = None
+
+    def copy_plot_state(self, other: "GraphPlotter"):
+        """Takes over the graph and the persistent artists of other."""
+        self.current_data = other.current_data
+        self.current_view = other.current_view
+        self.graph_type = other.graph_type
+        self.raster_image = other.raster_image
+        self.raster_layout = other.raster_layout
+        self.raster_data_version = other.raster_data_version
+        self.surface = other.surface
+        self.surface_axes = other.surface_axes
+        self.surface_norm = other.surface_norm
+        self.surface_decimation_factor = other.surface_decimation_factor
+
+    def clear_figure(self):
+        """Removes all axes from the figure. Persistent
+        artists have to be created again."""
         self.figure.clear()
+        self.reset_plot_state()
+
+    def plot_graph(self, data: SICMdata, graph_type: str = "", view: View = None):
+        """Draws the graph on the figure without rendering it (see GraphCanvas.draw_graph)."""
         self.current_data = data
         self.current_view = view
         self.graph_type = graph_type
 
-        # if the canvas is too small for one or both of the
-        # graphs matplotlib will be unable to draw the graph
-        # and crashes the program
-        try:
-            if graph_type == SURFACE_PLOT:
-                self.draw_3d_plot()
-
-            if graph_type == RASTER_IMAGE:
-                self.draw_2d_plot_raster_image()
-
-            if graph_type == APPROACH_CURVE:
-                self.draw_approach_curve(data)
+        if graph_type == RASTER_IMAGE:
+            self.prepare_raster_image()
+        else:
+            self.clear_figure()
 
-            self.draw()
-        except ValueError:
-            pass
+        if graph_type == SURFACE_PLOT:
+            self.draw_3d_plot()
 
-    def redraw_graph(self):
-        self.draw_graph(self.current_data, self.graph_type, self.current_view)
-
-    def draw_white_canvas(self):
-        self.figure.clear()
-        self.draw()
+        if graph_type == APPROACH_CURVE:
+            self.draw_approach_curve(data)
 
     def show_or_hide_axes(self, data: SICMdata, axes):
         if self.current_view.axes_shown:
@@ -157,32 +151,36 @@ class GraphCanvas(FigureCanvasQTAgg):
         return 1000.0 if self.current_view.z_in_nm else 1.0
 
     def draw_3d_plot(self):
-        """Draws a 3d surface plot for scanning data."""
+        """Draws a 3d surface plot for scanning data.
+
+        The surface is decimated to fit the canvas, but color normalisation
+        and axes limits are taken from the full resolution data.
+        """
 
         # if the canvas is too small for one or both of the
         # graphs matplotlib will be unable to draw the graph
         # and crashes the program
         try:
             axes = self.figure.add_axes([0.1, 0.1, 0.5, 0.9], projection="3d")
+            x, y, z = self.current_data.get_data()
 
-            norm = Normalize(
-                vmin=np.min(self.current_data.get_data()[2]),
-                vmax=np.max(self.current_data.get_data()[2]),
-                clip=False
-            )
-            if self.current_view:
+            norm = Normalize(vmin=np.nanmin(z), vmax=np.nanmax(z), clip=False)
+            if self.current_view and self.current_view.z_limits:
+                norm = Normalize(
+                    vmin=self.current_view.z_limits[0],
+                    vmax=self.current_view.z_limits[1],
+                    clip=False
+                )
+            self.surface_axes = axes
+            self.surface_norm = norm
+            self.draw_surface(self.get_surface_face_budget())
 
-                if self.current_view.z_limits:
-                    norm = Normalize(
-                        vmin=self.current_view.z_limits[0],
-                        vmax=self.current_view.z_limits[1],
-                        clip=False
-                    )
-                    img = axes.plot_surface(*self.current_data.get_data(), norm=norm, cmap=self.current_view.color_map)
-                    axes.set_zlim(self.current_view.z_limits)
-                else:
-                    img = axes.plot_surface(*self.current_data.get_data(), norm=norm, cmap=self.current_view.color_map)
+            # axes limits of the full resolution data
+            axes.auto_scale_xyz(x, y, z, had_data=False)
+            if self.current_view and self.current_view.z_limits:
+                axes.set_zlim(self.current_view.z_limits)
 
+            if self.current_view:
                 axes.set_box_aspect(aspect=self.current_view.aspect_ratio)
                 axes.azim = self.current_view.azim
                 axes.elev = self.current_view.elev
@@ -191,40 +189,158 @@ class GraphCanvas(FigureCanvasQTAgg):
                 #TODO z in nm
                 #axes.set_zticklabels([tick * self.unit_factor() for tick in axes.get_zticks()])
 
-            else:
-                img = axes.plot_surface(*self.current_data.get_data(), norm=norm)
-
-            if self.current_view.rasterized:
-                img._facecolors2d = img._facecolor3d
-                img._edgecolors2d = img._edgecolor3d
-                img.set_edgecolor("face")
-            self.set_colorbar(img, axes)
+            self.set_colorbar(ScalarMappable(norm=norm, cmap=self.surface.get_cmap()), axes)
         except Exception as e:
             print(e)
             print(traceback.print_exc())
 
+    def get_surface_face_budget(self) -> int | None:
+        """Returns the maximum number of faces of a surface plot when idle.
+        None means no limit."""
+        if self.refine_surface_to_full_resolution:
+            return None
+        width, height = self.get_width_height()
+        return max(width * height // SURFACE_PIXELS_PER_FACE, INTERACTIVE_SURFACE_FACES)
+
+    def draw_surface(self, max_faces: int | None) -> bool:
+        """Draws the surface of the current data with at most max_faces faces.
+
+        Returns True if the surface has been replaced. The canvas is not drawn.
+        """
+        x, y, z = self.current_data.get_data()
+        factor = get_decimation_factor(z.shape, max_faces)
+        if self.surface is not None and factor == self.surface_decimation_factor:
+            return False
+        if self.surface is not None:
+            self.surface.remove()
+
+        x, y, z = decimate_surface(x, y, z, factor, self.surface_decimation_method)
+        kwargs = {"cmap": self.current_view.color_map} if self.current_view else {}
+        # strides of 1, since matplotlib would otherwise sample the data again
+        img = self.surface_axes.plot_surface(x, y, z, norm=self.surface_norm, rstride=1, cstride=1, **kwargs)
+        if self.current_view and self.current_view.rasterized:
+            img._facecolors2d = img._facecolor3d
+            img._edgecolors2d = img._edgecolor3d
+            img.set_edgecolor("face")
+
+        self.surface = img
+        self.surface_decimation_factor = factor
+        return True
+
+    def get_raster_layout(self, data: SICMdata, view: View = None) -> tuple:
+        """Returns all settings which require to create the raster image
+        again if they change."""
+        layout = (data.z.shape, data.x_px, data.y_px, view is None, self.use_image_renderer)
+        if view:
+            layout += (view.axes_shown, view.show_as_px, view.z_in_nm, view.rasterized)
+            if not view.show_as_px and isinstance(data, ScanBackstepMode):
+                layout += (data.micron_to_pixel_factor_x(), data.micron_to_pixel_factor_y())
+        return layout
+
+    def raster_image_is_reusable(self) -> bool:
+        return self.raster_image_is_reusable_for(self.current_data, self.current_view)
+
+    def raster_image_is_reusable_for(self, data: SICMdata, view: View = None) -> bool:
+        return (self.raster_image is not None
+                and self.raster_image.axes in self.figure.get_axes()
+                and self.raster_layout == self.get_raster_layout(data, view))
+
+    def prepare_raster_image(self):
+        """Updates the persistent raster image artists or creates them if
+        they can not be reused. Overlays (rectangles, lines, annotations)
+        are removed. The canvas is not drawn."""
+        self.graph_type = RASTER_IMAGE
+        if self.raster_image_is_reusable():
+            self.update_2d_plot_raster_image()
+        else:
+            self.clear_figure()
+            self.draw_2d_plot_raster_image()
+
+    def update_2d_plot_raster_image(self):
+        """Updates data, color map and z limits of the existing raster image."""
+        img = self.raster_image
+        axes = img.axes
+        for artist in [*axes.patches, *axes.texts, *axes.lines]:
+            artist.remove()
+        self.overlay_artists = []
+
+        data_version = (id(self.current_data), self.current_data.version)
+        if data_version != self.raster_data_version:
+            if self.use_image_renderer:
+                img.set_data(self.current_data.z)
+            else:
+                img.set_array(self.current_data.z)
+            self.raster_data_version = data_version
+
+        clim = (np.nanmin(self.current_data.z), np.nanmax(self.current_data.z))
+        if self.current_view:
+            if img.get_cmap() != self.current_view.color_map:
+                img.set_cmap(self.current_view.color_map)
+            if self.current_view.z_limits:
+                clim = self.current_view.z_limits
+        # setting the same limits again would update the color bar
+        if tuple(img.get_clim()) != tuple(clim):
+            img.set_clim(*clim)
+
+        if self.current_view and self.current_view.rois:
+            self.draw_rois(axes)
+
     def draw_2d_plot_raster_image(self):
         """Draws a 2D raster image for 3-dimensional scanning data."""
         axes = self.figure.add_axes([0.15, 0.1, 0.5, 0.9])
 
+        kwargs = {}
         if self.current_view:
             self.show_or_hide_axes(self.current_data, axes)
+            kwargs["cmap"] = self.current_view.color_map
             if self.current_view.z_limits:
-                img = axes.pcolormesh(
-                    self.current_data.z,
-                    vmin=self.current_view.z_limits[0],
-                    vmax=self.current_view.z_limits[1],
-                    cmap=self.current_view.color_map,
-                )
-            else:
-                img = axes.pcolormesh(self.current_data.z, cmap=self.current_view.color_map)
+                kwargs["vmin"], kwargs["vmax"] = self.current_view.z_limits
+
+        if self.use_image_renderer:
+            img = self.draw_image(axes, self.current_data.z, **kwargs)
+            if self.current_view and not self.current_view.rasterized:
+                self.draw_pixel_grid(axes, self.current_data.z.shape)
         else:
-            img = axes.pcolormesh(self.current_data.z)
-        img.set_rasterized(self.current_view.rasterized)
+            img = axes.pcolormesh(self.current_data.z, **kwargs)
+            img.set_rasterized(self.current_view.rasterized)
+
+        if self.current_view and self.current_view.rois:
+            self.draw_rois(axes)
 
         axes.set_aspect("equal")
         self.set_colorbar(img, axes)
 
+        self.raster_image = img
+        self.raster_layout = self.get_raster_layout(self.current_data, self.current_view)
+        self.raster_data_version = (id(self.current_data), self.current_data.version)
+
+    @staticmethod
+    def draw_image(axes, z: np.ndarray, **kwargs):
+        """Draws z as an image. Pixel (i, j) covers the area from j to j + 1 in x
+        and from i to i + 1 in y, just like in pcolormesh. Therefore, ticks and
+        mouse coordinates are the same for both renderers."""
+        rows, columns = z.shape
+        return axes.imshow(
+            z,
+            origin="lower",
+            extent=(0, columns, 0, rows),
+            interpolation="nearest",
+            aspect="equal",
+            **kwargs
+        )
+
+    @staticmethod
+    def draw_pixel_grid(axes, shape: tuple[int, int]):
+        """Draws the edges of all pixels as a grid, if there are not more than
+        MAX_PIXELS_FOR_GRID pixels in each dimension."""
+        rows, columns = shape
+        if max(rows, columns) > MAX_PIXELS_FOR_GRID:
+            return None
+        vertical = [((x, 0), (x, rows)) for x in range(columns + 1)]
+        horizontal = [((0, y), (columns, y)) for y in range(rows + 1)]
+        grid = LineCollection(vertical + horizontal, colors="w", linewidths=0.3, alpha=0.5)
+        return axes.add_collection(grid, autolim=False)
+
     def set_colorbar(self, img, axes):
         cax = inset_axes(axes,
                          width="5%",
@@ -237,34 +353,17 @@ class GraphCanvas(FigureCanvasQTAgg):
         z_label = "height in " + z_unit
         cb.set_label(label=z_label)
 
-    def draw_roi(self):
-        """This function should be generalised to prevent code duplication.
-        At the moment it is a quick and dirty implementation for testing
-        ROIs."""
-        try:
-            point1 = self.view.rois[0]
-            point2 = self.view.rois[1]
-            if point1.x() < point2.x():
-                orig_x = point1.x()
-            else:
-                orig_x = point2.x()
-            if point1.y() < point2.y():
-                orig_y = point1.y()
-            else:
-                orig_y = point2.y()
-            origin = (orig_x, orig_y)
-
-            width = abs(point1.x() - point2.x())
-            height = abs(point1.y() - point2.y())
-            rect = Rectangle(xy=origin, width=width, height=height,
+    def draw_rois(self, axes):
+        """Draws the ROIs of the current view as rectangles on the raster image."""
+        for point1, point2 in self.current_view.rois:
+            rows, columns = get_rectangle_slices(point1, point2)
+            rect = Rectangle(xy=(columns.start, rows.start),
+                             width=columns.stop - columns.start,
+                             height=rows.stop - rows.start,
                              fill=False,
                              linewidth=2, edgecolor='g',
-                             figure=self.figure
                              )
-            self.figure.get_axes()[0].add_patch(rect)
-        except Exception as e:
-            # TODO specify type of error
-            print(type(e))
+            axes.add_patch(rect)
 
     def draw_approach_curve(self, data: SICMdata, view: View = None):
         """Plots a """
@@ -273,6 +372,262 @@ class GraphCanvas(FigureCanvasQTAgg):
         if view:
             self.axes.axis(view.axes_shown)
 
+
+class GraphCanvas(GraphPlotter, FigureCanvasQTAgg):
+    """Canvas for drawing graphs from .sicm data.
+
+    This class implements all functions for plotting SICM data. Line profiles
+    can also be drawn.
+
+    Drawing of rectangles on 2D raster images for defining, for example,
+    regions of interest (ROI) is also supported.
+
+    For mouse interaction with the plots two attributes are
+    in this class:
+        - mi: to reference an instance of MouseInteraction (see MouseInteraction documentation)
+        - function_after_mouse_event: a callable can be assigned to this field which will be called
+        as a consequence of the mouse interaction (e.g., a data manipulating function/method after selection
+        of pixels in the plot)
+
+    To add functionality for mouse interactions with the canvas:
+        Define a method which takes a callable and maybe some arguments as parameters.
+        In this method bind the callable to an instance of MouseInteraction.
+
+    Raster images are drawn with persistent artists: axes, image and color bar
+    are created once and reused as long as the layout (data shape, axes and
+    unit settings) does not change. Changes of data, color map and z limits
+    only update the existing artists.
+
+    Raster images are drawn with imshow, which renders one image instead of a
+    quad per pixel like pcolormesh. Set use_image_renderer to False to draw
+    raster images with pcolormesh. Both use pixel edges as coordinates.
+
+    Surface plots are decimated (see level_of_detail.py) to a number of faces
+    which depends on the canvas size. While the plot is rotated, a coarser
+    surface is drawn, which is refined after the mouse button is released.
+    Set refine_surface_to_full_resolution to True to draw all faces when idle.
+
+    Overlays of mouse interactions (rectangles, lines and annotations) are
+    animated artists drawn by blitting: the rendered raster image is cached
+    as background after each full draw, and on mouse motion only the background
+    is restored and the overlays are drawn on top of it.
+
+    draw_graph_in_background draws and renders the figure offscreen in a
+    background thread (see RenderWorker). The rendered figure replaces the
+    figure of the canvas, unless a newer graph has been requested meanwhile.
+
+    TODO: Plot settings should be controlled by a View object.
+    TODO: add navigation toolbar?
+    """
+
+    def __init__(self, width=5, height=4, dpi=100):
+        fig = Figure(figsize=(width, height), dpi=dpi)
+        self.axes = fig.add_subplot(111)
+        super().__init__(fig)
+        # NavToolbar should be customized before integrating in GraphCanvas
+        # Furthermore, GraphCanvas needs a parent widget
+        # self.toolbar = NavigationToolbar(canvas=self, parent=self)
+
+        # These attributes are necessary for handling the various
+        # mouse event functions
+        self.mi = MouseInteraction()
+        self.mouse_event_function = None
+        self.function_after_mouse_events = None
+        self.clean_up_function = None
+        self.show_mouse_over_label = True
+        self.current_data: SICMdata = SICMdata()
+        self.current_view: View = View()
+        self.graph_type = ""
+        self.reset_plot_state()
+        # blitting of overlays
+        self.overlay_artists: list = []
+        self.overlay_background = None
+        # refinement of surface plots
+        self.surface_refine_timer = QTimer()
+        self.surface_refine_timer.setSingleShot(True)
+        self.surface_refine_timer.setInterval(SURFACE_REFINE_DELAY)
+        self.surface_refine_timer.timeout.connect(self.refine_surface)
+        # background rendering: only the latest request is shown
+        self.render_request = 0
+        self.render_workers: dict[int, RenderWorker] = {}
+        self.connect_canvas_events()
+        self.draw_white_canvas()
+
+    def connect_canvas_events(self):
+        """Connects the event handlers of the canvas. Connections belong to the
+        figure and have to be made again if the figure is replaced."""
+        self.mpl_connect("draw_event", self._on_draw)
+        self.mpl_connect("button_press_event", self._on_surface_press)
+        self.mpl_connect("button_release_event", self._on_surface_release)
+
+    @instrumented(DRAW)
+    def draw_graph(self, data: SICMdata, graph_type: str = "", view: View = None):
+        """
+        Draws a 3D or 2D graph depending on the type. Three types are supported at the moment:
+            SURFACE_PLOT: a 3-dimensional figure which can be rotated by mouse interaction
+            RASTER_IMAGE: a raster image for 3D data with a color bar
+            APPROACH_CURVE:
+
+        Data needs to be checked before calling this function!
+
+        :param SICMdata data: contains the data for plotting
+        :param str graph_type: type of graph to be drawn. If no type is given, an empty canvas will be drawn
+        :param View view: contains plot settings
+        """
+        self.cancel_background_rendering()
+
+        # if the canvas is too small for one or both of the
+        # graphs matplotlib will be unable to draw the graph
+        # and crashes the program
+        try:
+            self.plot_graph(data, graph_type, view)
+            self.draw()
+        except ValueError:
+            pass
+
+    def draw_graph_in_background(self, data: SICMdata, graph_type: str = "", view: View = None):
+        """Draws a graph like draw_graph, but the figure is drawn and rendered
+        in a background thread and shown when it is ready.
+
+        Requests which are outdated by a later call of draw_graph or
+        draw_graph_in_background are cancelled or discarded.
+        Raster images which can be updated (see prepare_raster_image) are
+        drawn immediately, since this is fast.
+        """
+        if graph_type == RASTER_IMAGE and self.graph_type == RASTER_IMAGE \
+                and self.raster_image_is_reusable_for(data, view):
+            self.draw_graph(data, graph_type, view)
+            return
+
+        self.cancel_background_rendering()
+        worker = RenderWorker(self, self.render_request, data, graph_type, view)
+        worker.signals.finished.connect(self._show_rendered_graph)
+        self.render_workers[self.render_request] = worker
+        QThreadPool.globalInstance().start(worker)
+
+    def cancel_background_rendering(self):
+        """Cancels all pending requests of draw_graph_in_background."""
+        self.render_request += 1
+        pool = QThreadPool.globalInstance()
+        for request, worker in list(self.render_workers.items()):
+            worker.cancelled = True
+            # workers which have not been started are removed from the queue,
+            # running workers finish their current step and are discarded
+            if pool.tryTake(worker):
+                del self.render_workers[request]
+
+    @property
+    def render_pending(self) -> bool:
+        return self.render_request in self.render_workers
+
+    def _show_rendered_graph(self, request: int, offscreen_canvas):
+        worker = self.render_workers.pop(request, None)
+        if worker is None or worker.cancelled or offscreen_canvas is None:
+            return
+        self.show_offscreen_canvas(offscreen_canvas)
+
+    def show_offscreen_canvas(self, offscreen_canvas: "OffscreenGraphCanvas"):
+        """Replaces the figure of this canvas with the rendered figure of
+        offscreen_canvas and blits the rendered image into the canvas."""
+        size = tuple(self.figure.get_size_inches())
+        dpi = self.figure.dpi
+        self.clear_figure()
+        figure = offscreen_canvas.figure
+        figure.set_canvas(self)
+        self.figure = figure
+        self.copy_plot_state(offscreen_canvas)
+        self.connect_canvas_events()
+        self._rebind_mouse_events()
+
+        if tuple(figure.get_size_inches()) != size or figure.dpi != dpi:
+            # the canvas has been resized meanwhile
+            figure.set_dpi(dpi)
+            figure.set_size_inches(size)
+            self.draw_idle()
+            return
+        # copy the rendered image into the renderer of this canvas, which
+        # has the same size, instead of drawing the figure again
+        image = offscreen_canvas.copy_from_bbox(figure.bbox)
+        self.get_renderer()
+        self.restore_region(image)
+        self.overlay_background = image
+        self.update()
+
+    def redraw_graph(self):
+        self.draw_graph(self.current_data, self.graph_type, self.current_view)
+
+    def clear_figure(self):
+        """Removes all axes from the figure. Persistent
+        artists have to be created again."""
+        super().clear_figure()
+        self.overlay_artists = []
+        self.overlay_background = None
+        self.surface_refine_timer.stop()
+
+    def draw_white_canvas(self):
+        self.cancel_background_rendering()
+        self.clear_figure()
+        self.draw()
+
+    def _on_surface_press(self, event):
+        """Draws a coarse surface while the plot is rotated."""
+        if self.surface is not None and event.inaxes is self.surface_axes:
+            self.surface_refine_timer.stop()
+            if self.draw_surface(INTERACTIVE_SURFACE_FACES):
+                self.draw_idle()
+
+    def _on_surface_release(self, event):
+        if self.surface is not None:
+            self.surface_refine_timer.start()
+
+    def refine_surface(self):
+        """Draws the surface with the level of detail for idle canvases."""
+        if self.surface is not None and self.draw_surface(self.get_surface_face_budget()):
+            self.draw_idle()
+
+    def _on_draw(self, event):
+        """Caches the background for blitting after each full draw. Animated
+        overlays are not part of a full draw and are drawn on top again."""
+        self.overlay_background = self.copy_from_bbox(self.figure.bbox)
+        for artist in self.overlay_artists:
+            self.figure.draw_artist(artist)
+
+    def begin_overlays(self):
+        """Removes all overlays and returns the axes of the raster image.
+
+        If there is no background for blitting, the raster image is drawn first.
+        """
+        self.remove_overlays()
+        if self.overlay_background is None or not self.raster_image_is_reusable():
+            self.prepare_raster_image()
+            self.draw()
+        return self.raster_image.axes
+
+    def add_overlay(self, artist):
+        """Registers an artist which has already been added to the
+        raster image axes as an overlay and returns it."""
+        artist.set_animated(True)
+        self.overlay_artists.append(artist)
+        return artist
+
+    def remove_overlays(self):
+        for artist in self.overlay_artists:
+            artist.remove()
+        self.overlay_artists = []
+
+    def blit_overlays(self):
+        """Restores the cached background and draws all overlays on top of it."""
+        self.restore_region(self.overlay_background)
+        for artist in self.overlay_artists:
+            self.figure.draw_artist(artist)
+        self.blit(self.figure.bbox)
+
+    def clear_overlays(self):
+        """Removes all overlays from the canvas."""
+        self.remove_overlays()
+        if self.overlay_background is not None:
+            self.blit_overlays()
+
     def bind_mouse_events_for_showing_line_profile(self,
                                                    data: SICMdata,
                                                    view: View = None,
@@ -332,18 +687,18 @@ class GraphCanvas(FigureCanvasQTAgg):
             if int(x) in range(self.current_data.z.shape[1]) and int(y) in range(self.current_data.z.shape[0]):
                 if event.name == "motion_notify_event":
                     if self.mi.mouse_point1:
-                        self.draw_graph(self.current_data, RASTER_IMAGE, self.current_view)
-                        y_lim_upper = self.figure.get_axes()[0].get_ylim()[1]
+                        axes = self.begin_overlays()
+                        y_lim_upper = axes.get_ylim()[1]
                         text = f"x: {x:.1f}, y: {y:.1f}, z: {self.current_data.z[int(y), int(x)]:.3f}"
-                        self.figure.get_axes()[0].annotate(
+                        self.add_overlay(axes.annotate(
                             text,
                             xy=(1, y_lim_upper+0.5),
                             color="black", weight="bold",
                             fontsize=8,
                             bbox=dict(boxstyle="square,pad=0.5", fc="gray"),
                             annotation_clip=False
-                        )
-                        self.draw()
+                        ))
+                        self.blit_overlays()
                     else:
                         self.mi.mouse_point1 = QPoint(int(event.xdata), int(event.ydata))
 
@@ -383,10 +738,20 @@ class GraphCanvas(FigureCanvasQTAgg):
         """
         self.unbind_mouse_events()
         self.mi = MouseInteraction(*args, **kwargs)
+        self.mouse_event_function = func
+        self._connect_mouse_events()
+
+    def _connect_mouse_events(self):
+        func = self.mouse_event_function
         self.mi.cid_press = self.figure.canvas.mpl_connect('button_press_event', func)
         self.mi.cid_move = self.figure.canvas.mpl_connect('motion_notify_event', func)
         self.mi.cid_release = self.figure.canvas.mpl_connect('button_release_event', func)
 
+    def _rebind_mouse_events(self):
+        """Connects bound mouse events to a new figure."""
+        if self.mi is not None and self.mouse_event_function is not None:
+            self._connect_mouse_events()
+
     def _draw_rectangle_and_call_func(self, event):
         """Allows to draw a rectangle on the raster image canvas and calls func with
         the points which span the drawn rectangle as arguments.
@@ -542,7 +907,7 @@ class GraphCanvas(FigureCanvasQTAgg):
 
             if event.name == "button_release_event":
                 # remove the rectangle
-                self.draw_graph(self.current_data, RASTER_IMAGE, self.current_view)
+                self.clear_overlays()
                 if self.clean_up_function:
                     self.clean_up_function()
                 self.unbind_mouse_events()
@@ -550,7 +915,7 @@ class GraphCanvas(FigureCanvasQTAgg):
         if not event.inaxes:
             if event.name == "button_release_event":
                 # remove the rectangle
-                self.draw_graph(self.current_data, RASTER_IMAGE, self.current_view)
+                self.clear_overlays()
                 if self.clean_up_function:
                     self.clean_up_function()
                 self.unbind_mouse_events()
@@ -602,10 +967,10 @@ class GraphCanvas(FigureCanvasQTAgg):
             return None
 
     def add_rectangle_to_raster_image(self, rectangles: list[Rectangle]):
-        """Adds a rectangle shape to the current 2D plot."""
-        self.draw_graph(self.current_data, RASTER_IMAGE, self.current_view)
+        """Shows rectangle shapes as overlays on the current 2D plot."""
+        axes = self.begin_overlays()
         for rectangle in rectangles:
-            self.figure.get_axes()[0].add_patch(rectangle)
+            self.add_overlay(axes.add_patch(rectangle))
             unit = " px"
             width = rectangle.get_width()
             height = rectangle.get_height()
@@ -625,16 +990,16 @@ class GraphCanvas(FigureCanvasQTAgg):
                 w = rectangle.get_width()
 
                 # show size of rectangle inside the rectangle
-                self.figure.get_axes()[0].annotate(x_text, xy=(rx+w/2, ry), color="w", weight="bold", fontsize=8)
-                self.figure.get_axes()[0].annotate(y_text, xy=(rx, ry+h/2), color="w", weight="bold", fontsize=8)
+                self.add_overlay(axes.annotate(x_text, xy=(rx+w/2, ry), color="w", weight="bold", fontsize=8))
+                self.add_overlay(axes.annotate(y_text, xy=(rx, ry+h/2), color="w", weight="bold", fontsize=8))
             except Exception as e:
                 print(e)
-        self.draw()
+        self.blit_overlays()
 
     def _add_line_to_raster_image(self, line: Line2D):
         if isinstance(self.current_data, ScanBackstepMode):
-            self.draw_graph(self.current_data, RASTER_IMAGE, self.current_view)
-            self.figure.get_axes()[0].add_patch(line)
+            axes = self.begin_overlays()
+            self.add_overlay(axes.add_line(line))
             ### TODO refactor
             if self.current_view.show_as_px:
                 unit = " px"
@@ -647,12 +1012,12 @@ class GraphCanvas(FigureCanvasQTAgg):
 
             dist = math.dist((xx[0], yy[0]), (xx[1], yy[1]))
             text = str(round(dist, 2)) + unit
-            self.figure.get_axes()[0].annotate(
+            self.add_overlay(axes.annotate(
                 text,
                 xy=((line.get_xdata()[0]+line.get_xdata()[1])/2, (line.get_ydata()[0]+line.get_ydata()[1])/2),
                 color="w", weight="bold", fontsize=8
-            )
-            self.draw()
+            ))
+            self.blit_overlays()
 
     def unbind_mouse_events(self):
         """This function disconnects mouse events.
@@ -671,13 +1036,14 @@ class GraphCanvas(FigureCanvasQTAgg):
             self.figure.canvas.mpl_disconnect(self.mi.cid_release)
         except AttributeError:
             pass
+        self.mouse_event_function = None
         self.function_after_mouse_events = None
         self.clean_up_function = None
         self.mi = None
 
     def draw_line_plot(self, x_data, y_data, data, view):
         """Draws a simple line plot with x and y data."""
-        self.figure.clear()
+        self.clear_figure()
         axes = self.figure.add_subplot(1, 1, 1)
         axes.plot(x_data, y_data)
 
@@ -694,7 +1060,7 @@ class GraphCanvas(FigureCanvasQTAgg):
         self.draw()
 
     def draw_xy_line_profiles(self, x_x_data, x_y_data, y_x_data, y_y_data, data, view):
-        self.figure.clear()
+        self.clear_figure()
         axes = self.figure.add_subplot(1, 1, 1)
         axes.plot(x_x_data, x_y_data, label="row")
         axes.plot(y_x_data, y_y_data, label="column")
@@ -713,3 +1079,71 @@ class GraphCanvas(FigureCanvasQTAgg):
         self.figure.tight_layout()
         self.figure.subplots_adjust(bottom=0.20, top=0.90, left=0.15, right=0.75)
         self.draw()
+
+
+class OffscreenGraphCanvas(GraphPlotter, FigureCanvasAgg):
+    """Agg canvas for drawing and rendering graphs outside of the GUI thread."""
+
+    def __init__(self, figure: Figure):
+        super().__init__(figure)
+        self.current_data: SICMdata = SICMdata()
+        self.current_view: View = View()
+        self.graph_type = ""
+        self.reset_plot_state()
+
+
+class RenderWorkerSignals(QObject):
+    """Signals of RenderWorker. QRunnable is not a QObject and can not emit signals."""
+    finished = pyqtSignal(int, object)
+
+
+class RenderWorker(QRunnable):
+    """Draws a graph on an OffscreenGraphCanvas with the size and settings of a
+    GraphCanvas and renders it in a thread of the global thread pool.
+
+    finished is always emitted with the request number and the offscreen
+    canvas, or None if the graph could not be drawn. Cancelled workers stop
+    after the current step and emit None.
+
+    Data manipulations are performed on a copy of the data (see DataManager),
+    therefore the data object is not changed while it is drawn.
+    """
+
+    def __init__(self, canvas: GraphCanvas, request: int, data: SICMdata, graph_type: str, view: View = None):
+        super().__init__()
+        self.request = request
+        self.data = data
+        self.graph_type = graph_type
+        self.view = view
+        self.size_inches = tuple(canvas.figure.get_size_inches())
+        self.dpi = canvas.figure._original_dpi
+        self.device_pixel_ratio = canvas.device_pixel_ratio
+        self.use_image_renderer = canvas.use_image_renderer
+        self.refine_surface_to_full_resolution = canvas.refine_surface_to_full_resolution
+        self.surface_decimation_method = canvas.surface_decimation_method
+        self.cancelled = False
+        self.signals = RenderWorkerSignals()
+        # the worker is owned by GraphCanvas.render_workers
+        self.setAutoDelete(False)
+
+    def run(self):
+        canvas = None
+        try:
+            if not self.cancelled:
+                canvas = OffscreenGraphCanvas(Figure(figsize=self.size_inches, dpi=self.dpi))
+                canvas._set_device_pixel_ratio(self.device_pixel_ratio)
+                canvas.use_image_renderer = self.use_image_renderer
+                canvas.refine_surface_to_full_resolution = self.refine_surface_to_full_resolution
+                canvas.surface_decimation_method = self.surface_decimation_method
+                canvas.plot_graph(self.data, self.graph_type, self.view)
+            if not self.cancelled:
+                canvas.draw()
+        except ValueError:
+            # the canvas is too small for the graph
+            canvas = None
+        except Exception as e:
+            # exceptions must not leave run(), since this aborts the application
+            print("Error in RenderWorker.run:")
+            print(f"{type(e).__name__}: {e}")
+            canvas = None
+        self.signals.finished.emit(self.request, None if self.cancelled else canvas)
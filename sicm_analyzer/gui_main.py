@@ -2,11 +2,12 @@
 import os
 from os.path import join
 from PyQt6 import QtWidgets
-from PyQt6.QtCore import Qt, pyqtSignal
-from PyQt6.QtGui import QIcon, QAction, QActionGroup, QKeyEvent, QDragEnterEvent, QDropEvent, QCursor
+from PyQt6.QtCore import Qt, QSize, pyqtSignal
+from PyQt6.QtGui import QIcon, QAction, QActionGroup, QKeyEvent, QDragEnterEvent, QDropEvent, QCursor, QImage, \
+    QPixmap
 
 from PyQt6.QtWidgets import QHBoxLayout, QListWidget, QLabel, QWidget, QVBoxLayout, QSplitter, QStyle, \
-    QMainWindow, QToolBar, QAbstractItemView, QDockWidget, QTextEdit, QMenu
+    QMainWindow, QToolBar, QAbstractItemView, QDockWidget, QTextEdit, QMenu, QProgressBar, QPushButton
 
 from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
 import matplotlib
@@ -16,6 +17,8 @@ try:
 except:
     matplotlib.use("agg")
 
+from sicm_analyzer.thumbnails import THUMBNAIL_SIZE
+
 
 class SecondaryWindow(QWidget):
     """
@@ -50,6 +53,7 @@ class MainWindow(QMainWindow):
         # self.imported_files_list.setSelectionMode(QListWidget.SelectionMode.ExtendedSelection)
         # self.imported_files_list.setSortingEnabled(True)
         self.imported_files_list.setDragDropMode(QListWidget.DragDropMode.InternalMove)
+        self.imported_files_list.setIconSize(QSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE))
 
         self.data_manipulation_list = QListWidget(self)
         self.init_ui()
@@ -106,6 +110,15 @@ class MainWindow(QMainWindow):
         self.vertical_splitter.setStretchFactor(2, 2)
 
         self.statusBar()
+        # progress of file imports and exports, see FileIOService
+        self.io_progress_bar = QProgressBar()
+        self.io_progress_bar.setFormat("%v/%m files")
+        self.io_progress_bar.setMaximumWidth(200)
+        self.io_cancel_button = QPushButton("Cancel")
+        self.io_cancel_button.setToolTip("Cancel pending file imports and exports")
+        self.statusBar().addPermanentWidget(self.io_progress_bar)
+        self.statusBar().addPermanentWidget(self.io_cancel_button)
+        self.show_io_progress(0, 0)
         menubar = self.menuBar()
         file_menu = menubar.addMenu("&File")
 
@@ -290,6 +303,11 @@ class MainWindow(QMainWindow):
 
         # Manipulate data menu
         self.action_batch_mode = QAction("Batch mode (experimental version)", self)
+        self.action_export_pipeline = QAction("Export pipeline...", self)
+        self.action_apply_pipeline = QAction("Apply pipeline...", self)
+        self.action_batch_keep_steps = QAction("Undo batch manipulations step by step", self)
+        self.action_batch_keep_steps.setCheckable(True)
+        self.action_batch_keep_steps.setChecked(True)
         self.action_data_crop_tool = QAction('Crop...', self)
         self.action_data_crop_select = QAction('Select area...', self)
         self.action_data_minimum = QAction('Subtract minimum', self)
@@ -321,6 +339,9 @@ class MainWindow(QMainWindow):
 
         self.data_menu = menubar.addMenu("&Manipulate data")
         self.data_menu.addAction(self.action_batch_mode)
+        self.data_menu.addAction(self.action_export_pipeline)
+        self.data_menu.addAction(self.action_apply_pipeline)
+        self.data_menu.addAction(self.action_batch_keep_steps)
         self.data_menu.addSeparator()
         self.data_menu.addAction(self.action_data_crop_tool)
         simple_menu = self.data_menu.addMenu('Simple Manipulations')
@@ -370,6 +391,7 @@ class MainWindow(QMainWindow):
         action_measure_profile.setEnabled(False)  # TODO
         self.action_set_rois = QAction("ROIs", self)
         self.action_set_roi = QAction("Set ROI", self)
+        self.action_clear_rois = QAction("Clear ROIs", self)
 
         self.measure_menu = menubar.addMenu("&Measurements")
         self.measure_menu.addAction(self.action_results)
@@ -384,8 +406,11 @@ class MainWindow(QMainWindow):
         self.measure_menu.addAction(action_measure_profile)
         self.measure_menu.addAction(self.action_set_rois)
         self.measure_menu.addAction(self.action_set_roi)
-        self.action_set_roi.setEnabled(False)
+        self.measure_menu.addAction(self.action_clear_rois)
         self.action_set_rois.setEnabled(False)
+        self.measure_menu.addSeparator()
+        self.action_performance = QAction("Performance...", self)
+        self.measure_menu.addAction(self.action_performance)
 
         # About menu
         self.about_menu = menubar.addMenu("&About")
@@ -537,6 +562,15 @@ class MainWindow(QMainWindow):
     def display_status_bar_message(self, message):
         self.statusBar().showMessage(message)
 
+    def show_io_progress(self, finished: int, submitted: int):
+        """Shows the progress of file imports and exports in the status bar
+        as long as not all of them have finished."""
+        self.io_progress_bar.setMaximum(submitted)
+        self.io_progress_bar.setValue(finished)
+        busy = finished < submitted
+        self.io_progress_bar.setVisible(busy)
+        self.io_cancel_button.setVisible(busy)
+
     def update_viewing_angles_label(self, azim: float, elev: float):
         a = str(round(azim, 1))
         e = str(round(elev, 1))
@@ -563,6 +597,18 @@ class MainWindow(QMainWindow):
         checkable_item.setCheckState(Qt.CheckState.Checked)
         return checkable_item
 
+    def set_item_thumbnail(self, key: str, thumbnail):
+        """Shows a thumbnail (RGBA array of uint8, see thumbnails.py) as icon
+        of all list items with the text key."""
+        if thumbnail is None:
+            return
+        height, width = thumbnail.shape[:2]
+        image = QImage(thumbnail.data, width, height, width * 4, QImage.Format.Format_RGBA8888)
+        # QImage does not copy the buffer
+        icon = QIcon(QPixmap.fromImage(image.copy()))
+        for item in self.imported_files_list.findItems(key, Qt.MatchFlag.MatchExactly):
+            item.setIcon(icon)
+
     def __sort_list_items(self, order: Qt.SortOrder):
         """Reorders list items according to the order parameter."""
         self.imported_files_list.sortItems(order)
@@ -8,7 +8,6 @@ from sicm_analyzer.graph_canvas import GraphCanvas
 from sicm_analyzer.mouse_events import ROW, COLUMN, CROSS
 from sicm_analyzer.sicm_data import ScanBackstepMode
 from sicm_analyzer.graph_canvas import RASTER_IMAGE
-from skimage import measure
 import numpy as np
 from os.path import join
 import os
@@ -177,6 +176,7 @@ class HeightProfileWindow(QWidget):
         try:
             src = (y_data[0], x_data[0])
             dst = (y_data[1], x_data[1])
+            from skimage import measure
             plot = measure.profile_line(image=self.data.z, src=src, dst=dst, linewidth=1, reduce_func=None)
             a = range(plot.shape[0])
             x = np.array(a)
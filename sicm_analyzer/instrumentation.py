@@ -0,0 +1,273 @@
+"""Opt-in instrumentation of time-consuming calls.
+
+When recording is enabled, instrumented calls (file import, manipulations,
+drawing and parameter calculations) are stored as CallRecords in a ring
+buffer with their wall time and the shape and size of the processed data.
+Optionally, the peak memory allocated during each call is traced with
+tracemalloc, which slows down all calls noticeably. Recording is disabled
+by default and then costs a single attribute lookup per call.
+
+Records can be summarized per call, shown in the Performance panel (see
+performance_window.py) and written as JSON or as Chrome trace, which can
+be opened in chrome://tracing or https://ui.perfetto.dev.
+
+Recording is enabled at startup of the GUI if the environment variable
+SICM_ANALYZER_PROFILE is set. Set it to "memory" to also trace memory.
+"""
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+DEFAULT_CAPACITY = 10000
+PROFILE_ENVIRONMENT_VARIABLE = "SICM_ANALYZER_PROFILE"
+RECORDS_VERSION = 1
+
+# categories of instrumented calls
+IO = "io"
+MANIPULATION = "manipulation"
+DRAW = "draw"
+MEASUREMENT = "measurement"
+
+
+class CallRecord(NamedTuple):
+    """Times are in s, start is relative to the creation of the Recorder.
+    Sizes are in bytes."""
+    name: str
+    category: str
+    start: float
+    duration: float
+    thread_id: int
+    shape: tuple[int, ...] | None = None
+    nbytes: int | None = None
+    peak_memory: int | None = None
+    error: str | None = None
+
+
+class _MemoryFrame:
+    """Traced memory at the start of an open call and the peak during it."""
+    __slots__ = ("start", "peak")
+
+    def __init__(self, start: int):
+        self.start = start
+        self.peak = start
+
+
+def get_array_info(data) -> tuple[tuple[int, ...] | None, int | None]:
+    """Returns the shape and size of an array or of the z data of SICMdata."""
+    array = getattr(data, "z", data)
+    if isinstance(array, np.ndarray):
+        return array.shape, array.nbytes
+    return None, None
+
+
+class Recorder:
+    """Records instrumented calls in a ring buffer of capacity records.
+
+    Calls may be nested and run in several threads. Peak memory is traced
+    for the whole process, therefore the peak of a call includes memory
+    allocated by other threads at the same time.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.enabled = False
+        self.measure_memory = False
+        self.records: deque[CallRecord] = deque(maxlen=capacity)
+        self.origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._memory_frames: list[_MemoryFrame] = []
+        self._started_tracemalloc = False
+
+    @property
+    def capacity(self) -> int:
+        return self.records.maxlen
+
+    def set_capacity(self, capacity: int):
+        """Changes the size of the ring buffer and keeps the latest records."""
+        self.records = deque(self.records, maxlen=capacity)
+
+    def enable(self, measure_memory: bool = False):
+        self.measure_memory = measure_memory
+        if measure_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        elif not measure_memory:
+            self._stop_tracemalloc()
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+        self.measure_memory = False
+        self._stop_tracemalloc()
+
+    def _stop_tracemalloc(self):
+        # tracing which was started elsewhere is not stopped
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def clear(self):
+        self.records.clear()
+
+    def get_records(self) -> list[CallRecord]:
+        return list(self.records)
+
+    def _enter_memory_frame(self) -> _MemoryFrame | None:
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                return None
+            current, peak = tracemalloc.get_traced_memory()
+            # the peak is reset for the new call, open calls keep theirs
+            for frame in self._memory_frames:
+                frame.peak = max(frame.peak, peak)
+            tracemalloc.reset_peak()
+            frame = _MemoryFrame(current)
+            self._memory_frames.append(frame)
+            return frame
+
+    def _exit_memory_frame(self, frame: _MemoryFrame | None) -> int | None:
+        if frame is None:
+            return None
+        with self._lock:
+            peak = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0
+            for open_frame in self._memory_frames:
+                open_frame.peak = max(open_frame.peak, peak)
+            self._memory_frames = [open_frame for open_frame in self._memory_frames if open_frame is not frame]
+            return frame.peak - frame.start
+
+    def _start(self) -> tuple[float, _MemoryFrame | None]:
+        frame = self._enter_memory_frame() if self.measure_memory else None
+        return time.perf_counter(), frame
+
+    def _stop(self, name: str, category: str, start: float, frame: _MemoryFrame | None, data=None,
+              error: BaseException | None = None):
+        end = time.perf_counter()
+        peak_memory = self._exit_memory_frame(frame)
+        shape, nbytes = get_array_info(data)
+        self.records.append(CallRecord(
+            name, category, start - self.origin, end - start, threading.get_ident(),
+            shape, nbytes, peak_memory, "%s: %s" % (type(error).__name__, error) if error else None
+        ))
+
+    @contextlib.contextmanager
+    def measure(self, name: str, category: str, data=None):
+        """Records the code in the with block as a call if recording is enabled.
+        data is the processed SICMdata object or array."""
+        if not self.enabled:
+            yield
+            return
+        start, frame = self._start()
+        try:
+            yield
+        except BaseException as e:
+            self._stop(name, category, start, frame, data, e)
+            raise
+        self._stop(name, category, start, frame, data)
+
+    def to_dict(self) -> dict:
+        return {
+            "version": RECORDS_VERSION,
+            "capacity": self.capacity,
+            "records": [record._asdict() for record in self.get_records()],
+        }
+
+    def write_json(self, file_path: str):
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+
+    def write_chrome_trace(self, file_path: str):
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(get_chrome_trace(self.get_records()), f, ensure_ascii=False)
+
+
+def summarize(records: list[CallRecord]) -> list[dict]:
+    """Returns statistics per call name and category sorted by total time."""
+    groups = {}
+    for record in records:
+        groups.setdefault((record.name, record.category), []).append(record)
+    summary = []
+    for (name, category), group in groups.items():
+        durations = [record.duration for record in group]
+        peaks = [record.peak_memory for record in group if record.peak_memory is not None]
+        sizes = [record.nbytes for record in group if record.nbytes is not None]
+        summary.append({
+            "name": name,
+            "category": category,
+            "calls": len(group),
+            "total": sum(durations),
+            "mean": sum(durations) / len(group),
+            "max": max(durations),
+            "max_peak_memory": max(peaks) if peaks else None,
+            "max_nbytes": max(sizes) if sizes else None,
+            "errors": sum(record.error is not None for record in group),
+        })
+    return sorted(summary, key=lambda row: row["total"], reverse=True)
+
+
+def get_chrome_trace(records: list[CallRecord]) -> dict:
+    """Returns the records in the Chrome trace event format (complete events, times in µs)."""
+    pid = os.getpid()
+    events = []
+    for record in records:
+        arguments = {key: value for key, value in record._asdict().items()
+                     if key in ("shape", "nbytes", "peak_memory", "error") and value is not None}
+        events.append({
+            "name": record.name,
+            "cat": record.category,
+            "ph": "X",
+            "ts": record.start * 1e6,
+            "dur": record.duration * 1e6,
+            "pid": pid,
+            "tid": record.thread_id,
+            "args": arguments,
+        })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+# the recorder of the application
+RECORDER = Recorder()
+
+
+def measure(name: str, category: str, data=None):
+    """Records the code in the with block if recording is enabled (see Recorder.measure())."""
+    return RECORDER.measure(name, category, data)
+
+
+def instrumented(category: str, name: str = None) -> Callable:
+    """Decorator which records calls of a function or method.
+
+    The shape and size of the first SICMdata object or array in the
+    arguments is recorded, or of the return value if there is none.
+    """
+    def decorator(func: Callable) -> Callable:
+        call_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not RECORDER.enabled:
+                return func(*args, **kwargs)
+            data = next((arg for arg in args if get_array_info(arg)[0] is not None), None)
+            start, frame = RECORDER._start()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as e:
+                RECORDER._stop(call_name, category, start, frame, data, e)
+                raise
+            RECORDER._stop(call_name, category, start, frame, result if data is None else data)
+            return result
+        return wrapper
+    return decorator
+
+
+def enable_from_environment():
+    """Enables recording if the environment variable SICM_ANALYZER_PROFILE is set."""
+    value = os.environ.get(PROFILE_ENVIRONMENT_VARIABLE, "").strip().lower()
+    if value and value not in ("0", "false", "no"):
+        RECORDER.enable(measure_memory=value == "memory")
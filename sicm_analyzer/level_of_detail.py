@@ -0,0 +1,71 @@
+"""This module provides level of detail (LOD) decimation for surface plots.
+
+Matplotlib draws each face of a surface plot as a separate polygon, which
+becomes slow for large scans. Therefore, scans are reduced to a number of
+faces which fits the size of the canvas. Blocks of factor x factor pixels
+are combined into one pixel, either by the maximum (preserving peaks) or
+the mean of the block.
+
+The decimated data is only used for drawing. Color normalisation, axes
+limits and measurements always use the full resolution data.
+"""
+import math
+import warnings
+
+import numpy as np
+
+MEAN = "mean"
+MAX = "max"
+
+
+def get_decimation_factor(shape: tuple[int, int], max_faces: int | None) -> int:
+    """Returns the smallest block size for which a surface of the given shape
+    has at most max_faces faces. If max_faces is None, 1 is returned."""
+    rows, columns = shape
+    if max_faces is None or max_faces <= 0:
+        return 1
+    faces = max(rows - 1, 1) * max(columns - 1, 1)
+    if faces <= max_faces:
+        return 1
+    return math.ceil(math.sqrt(faces / max_faces))
+
+
+def _block_view(array: np.ndarray, factor: int) -> np.ndarray:
+    """Returns the array as blocks with shape (rows, factor, columns, factor).
+    The array is padded with NaN if its shape is not a multiple of factor."""
+    rows = math.ceil(array.shape[0] / factor)
+    columns = math.ceil(array.shape[1] / factor)
+    pad = ((0, rows * factor - array.shape[0]), (0, columns * factor - array.shape[1]))
+    if any(p[1] for p in pad):
+        array = np.pad(np.asarray(array, dtype=float), pad, constant_values=np.nan)
+    return array.reshape(rows, factor, columns, factor)
+
+
+def decimate(array: np.ndarray, factor: int, method: str = MAX) -> np.ndarray:
+    """Reduces each block of factor x factor values to a single value.
+
+    :param array: 2-dimensional array
+    :param factor: block size
+    :param method: MAX to keep the maximum (peaks) or MEAN to average the block.
+    NaN values are ignored.
+    """
+    if factor <= 1:
+        return array
+    blocks = _block_view(array, factor)
+    # blocks containing only NaN values stay NaN
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        if method == MAX:
+            return np.nanmax(blocks, axis=(1, 3))
+        return np.nanmean(blocks, axis=(1, 3))
+
+
+def decimate_surface(x: np.ndarray, y: np.ndarray, z: np.ndarray, factor: int,
+                     method: str = MAX) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns decimated x, y and z meshgrids for surface plots.
+
+    z is decimated with method, x and y are the mean coordinates of each block.
+    """
+    if factor <= 1:
+        return x, y, z
+    return decimate(x, factor, MEAN), decimate(y, factor, MEAN), decimate(z, factor, method)
@@ -4,16 +4,19 @@ import sys
 from collections.abc import KeysView, Iterable
 sys.path.append("")
 import csv
+import pickle
 import traceback
 
 from pathlib import Path
 from os.path import join
 from matplotlib.figure import Figure
+from matplotlib.colors import Colormap
 import re
 import numpy as np
 from PyQt6.QtWidgets import QStyleFactory, QDialog
 from PyQt6.QtGui import QIcon
-from PyQt6.QtWidgets import QApplication, QFileDialog, QInputDialog
+from PyQt6.QtCore import QThreadPool, Qt
+from PyQt6.QtWidgets import QApplication, QFileDialog, QInputDialog, QProgressDialog
 from sicm_analyzer.sicm_data import APPROACH
 from sicm_analyzer.data_manager import DataManager
 from sicm_analyzer.results import SingleResultsWindow, TableResultsWindow
@@ -28,6 +31,7 @@ from sicm_analyzer.manipulate_data import transpose_z_data, subtract_z_minimum,
 from sicm_analyzer.manipulate_data import height_diff_to_neighbour
 from sicm_analyzer.manipulate_data import filter_median_temporal, filter_median_spatial
 from sicm_analyzer.manipulate_data import filter_average_temporal, filter_average_spatial
+from sicm_analyzer.manipulate_data import MEDIAN_TEMPORAL, MEDIAN_SPATIAL, AVERAGE_TEMPORAL, AVERAGE_SPATIAL
 from sicm_analyzer.manipulate_data import level_data, MirrorAxis, flip_z_data
 from sicm_analyzer.mouse_events import MouseInteraction, points_are_not_equal
 from sicm_analyzer import sicm_data
@@ -40,7 +44,16 @@ from sicm_analyzer.height_profile_window import HeightProfileWindow
 from sicm_analyzer.measurements import get_roughness
 from sicm_analyzer.manipulate_data import filter_single_outlier
 from sicm_analyzer.parameters_dialog import ParametersDialog, FileSelectionOption
-from sicm_analyzer.parameters import IMPLEMENTED_PARAMETERS
+from sicm_analyzer.parameters import calculate_parameters
+from sicm_analyzer.thumbnails import ThumbnailCache, ThumbnailWorker
+from sicm_analyzer.thumbnails import DEFAULT_CACHE_DIRECTORY as THUMBNAIL_CACHE_DIRECTORY
+from sicm_analyzer.pipeline import Pipeline, PipelineError, get_pipeline_from_undo_stack
+from sicm_analyzer.pipeline import save_pipeline, load_pipeline
+from sicm_analyzer.batch_mode import BatchJob, create_batch_executor
+from sicm_analyzer.pipeline_cache import PipelineCache
+from sicm_analyzer.instrumentation import enable_from_environment
+from sicm_analyzer.performance_window import PerformanceWindow
+from sicm_analyzer.file_io import FileIOService, IOFuture
 
 
 # APP CONSTANTS
@@ -55,29 +68,40 @@ APP_SAMPLES_PATH = join(APP_PATH, RESOURCE_DIRECTORY, SAMPLES_DIRECTORY)
 TITLE = f"{APP_NAME} (ver. 0.2.0)"
 DEFAULT_FILE_PATH = os.getcwd()
 
-# FILTERS
-MEDIAN_TEMPORAL = "Median (temporal)"
-MEDIAN_SPATIAL = "Median (spatial)"
-AVERAGE_TEMPORAL = "Average (temporal)"
-AVERAGE_SPATIAL = "Average (spatial)"
-
 
 class Controller:
 
-    def __init__(self, main_window):
+    def __init__(self, main_window, thumbnail_cache_directory: str = THUMBNAIL_CACHE_DIRECTORY):
         self.main_window: MainWindow = main_window
         self.data_manager = DataManager()
         self.unsaved_changes = False
         self.current_selection: str = ""
         self.cmap_dialog = None
         self.results_dialog = None
+        self.roi_dialog = None
         self.results_window: SingleResultsWindow = None
         self.table_results_window: TableResultsWindow = None
         self.view_manager = ViewManager()
         self.figure_canvas_3d = GraphCanvas()
         self.figure_canvas_2d = GraphCanvas()
+        # thumbnails of the imported files list
+        self.thumbnail_cache = ThumbnailCache(thumbnail_cache_directory)
+        self.thumbnail_versions: dict[str, tuple[int, Colormap]] = {}
         self.mi = MouseInteraction()
         self.line_profile = None
+        # process pool of the batch mode, created when it is used first
+        self.batch_executor = None
+        self.pipeline_cache = PipelineCache()
+        # files are read and written in the background
+        self.io_service = FileIOService()
+        self.io_service.progress.connect(self.main_window.show_io_progress)
+        # imports in the order of submission, see add_files_to_list
+        self.pending_imports: list[IOFuture] = []
+        self.imported_count = 0
+        self.batch_job: BatchJob = None
+        self.batch_progress_dialog: QProgressDialog = None
+        self.batch_failures_window: TableResultsWindow = None
+        self.performance_window: PerformanceWindow = None
 
     def set_listener_function_in_data_manager(self):
         self.data_manager.listener_function = self.update_figures_and_status
@@ -135,6 +159,8 @@ class Controller:
 
         # Data manipulation
         self.main_window.action_batch_mode.triggered.connect(self.batch_mode_test)
+        self.main_window.action_export_pipeline.triggered.connect(self.export_pipeline)
+        self.main_window.action_apply_pipeline.triggered.connect(self.apply_pipeline_from_file)
         self.main_window.action_data_transpose_z.triggered.connect(self.transpose_z_of_current_view)
         self.main_window.action_data_minimum.triggered.connect(self.subtract_minimum_in_current_view)
         self.main_window.action_data_threshold.triggered.connect(self.subtract_threshold)
@@ -153,17 +179,20 @@ class Controller:
         # Measurement
         self.main_window.action_set_rois.triggered.connect(self.show_roi_dialog)
         self.main_window.action_set_roi.triggered.connect(self.select_roi_with_mouse)
+        self.main_window.action_clear_rois.triggered.connect(self.clear_rois)
         self.main_window.action_height_profile_tool.triggered.connect(self.open_height_profile_tool)
         self.main_window.action_measure_dist.triggered.connect(self.measure_distance)
         self.main_window.action_get_pixel_values.triggered.connect(self.display_pixel_values)
         self.main_window.action_measure_roughness_batch.triggered.connect(self.show_results_table)
         self.main_window.action_results_custom.triggered.connect(self.open_results_dialog)
+        self.main_window.action_performance.triggered.connect(self.show_performance_window)
 
         # Other
         self.main_window.imported_files_list.currentItemChanged.connect(self.item_selection_changed_event)
         self.main_window.action_results.triggered.connect(self.show_results_of_selection)
         # self.main_window.action_about.triggered.connect(self.about)
         self.main_window.set_drop_event_function(self.import_files_by_drag_and_drop)
+        self.main_window.io_cancel_button.clicked.connect(self.io_service.cancel_all)
         self.main_window.closeEvent = self.quit_application
 
         # Key Events
@@ -184,12 +213,20 @@ class Controller:
         )
         if file_path[0]:
             file, extension = self._get_file_name_with_extension(file_path)
-            try:
-                figure.savefig(fname=file, format=extension)
-                self.main_window.display_status_bar_message(f"Figure saved as: {file}")
-            except ValueError as e:
-                message = str(e)
-                self.main_window.display_status_bar_message(f"Figure not exported: {message}")
+            # the figure is saved from a copy since the canvas
+            # may be redrawn while the file is written
+            figure_copy = pickle.loads(pickle.dumps(figure))
+            future = self.io_service.submit(f"Export {file}", figure_copy.savefig, fname=file, format=extension)
+            future.finished.connect(self._figure_export_finished)
+
+    def _figure_export_finished(self, future: IOFuture):
+        file = future.kwargs["fname"]
+        if future.succeeded:
+            self.main_window.display_status_bar_message(f"Figure saved as: {file}")
+        elif future.error:
+            self.main_window.display_status_bar_message(f"Figure not exported: {future.error}")
+        else:
+            self.main_window.display_status_bar_message("Figure export cancelled.")
 
     def export_sicm_data(self):
         """
@@ -212,7 +249,7 @@ class Controller:
                                                         )
                 if file_path[0]:
                     file, _ = self._get_file_name_with_extension(file_path)
-                    export_sicm_file(file, sicm_data=data, manipulations=manipulations)
+                    self._submit_sicm_export(file, data, manipulations, self._get_pipeline_steps(self.current_selection))
             else:
                 self.main_window.display_status_bar_message("No file exported.")
         except TypeError:
@@ -269,7 +306,26 @@ class Controller:
                     if not name.endswith(".sicm"):
                         name = name + ".sicm"
                     full_path = os.path.join(directory, name)
-                    export_sicm_file(full_path, data, manipulations=manipulations)
+                    self._submit_sicm_export(full_path, data, manipulations, self._get_pipeline_steps(item))
+
+    def _submit_sicm_export(self, file: str, data: ScanBackstepMode, manipulations: list[str],
+                            pipeline_steps: list[dict] | None):
+        """Writes data to a .sicm file in the background.
+        Data objects are safe to share since manipulations are applied to copies."""
+        future = self.io_service.submit(f"Export {file}", export_sicm_file, file, sicm_data=data,
+                                        manipulations=manipulations, pipeline_steps=pipeline_steps)
+        future.finished.connect(self._sicm_export_finished)
+
+    def _sicm_export_finished(self, future: IOFuture):
+        file = future.args[0]
+        if future.succeeded:
+            self.main_window.display_status_bar_message(f"Data exported as: {file}")
+        elif future.error:
+            print("Error in Main.export_sicm_data:")
+            print(future.error)
+            self.main_window.display_status_bar_message(f"Data not exported: {future.error}")
+        else:
+            self.main_window.display_status_bar_message("Export cancelled.")
 
     def _get_file_name_with_extension(self, file_dialog_path: tuple[str, str]) -> (str, str):
         """Checks the file path from a QFileDialog and returns
@@ -315,15 +371,24 @@ class Controller:
 
         The selected color map can be applied to the current view
         or to all view objects at once.
+        The dialog is created when it is opened first and reused afterwards.
         """
-        if self.cmap_dialog:
-            self.cmap_dialog.destroy()
-
-        self.cmap_dialog = ColorMapDialog(
-            controller=self,
-            parent=self.main_window
-        )
-        self.cmap_dialog.open_window()
+        if self.cmap_dialog is None:
+            self.cmap_dialog = ColorMapDialog(
+                controller=self,
+                parent=self.main_window
+            )
+        self._open_dialog(self.cmap_dialog)
+
+    @staticmethod
+    def _open_dialog(dialog):
+        """Opens a dialog which has an open_window method
+        or brings it to the front if it is already open."""
+        if dialog.isVisible():
+            dialog.raise_()
+            dialog.activateWindow()
+        else:
+            dialog.open_window()
 
     def _apply_colormap_to_view(self, view: View, cmap):
         view.color_map = cmap
@@ -465,6 +530,11 @@ class Controller:
         # TODO dialogue unsaved changes
         if self.unsaved_changes:
             pass
+        if self.batch_executor is not None:
+            self.batch_executor.shutdown(wait=False, cancel_futures=True)
+        # running exports are finished so that no incomplete files are left
+        self.io_service.cancel_all()
+        self.io_service.wait_for_done()
         sys.exit()
 
     def copy_selected_file(self):
@@ -489,6 +559,7 @@ class Controller:
             self.data_manager.add_data_object(new_key, data)
             self.view_manager.copy_view(key, new_key)
             self.main_window.insert_item_after_current_selection(new_key)
+            self.update_thumbnails([new_key])
         except TypeError as e:
             print("Error in Main.copy_selected_file:")
             print(e)
@@ -527,18 +598,32 @@ class Controller:
     def import_directory(self):
         """Import all sicm files from a selected directory
         and its subfolders."""
-        files = []
         dirname = self.get_filenames_from_selected_directory()
         if dirname:
-            files = self.get_sicm_files_from_url_list([dirname])
-        self.add_files_to_list(files)
+            self._import_urls([dirname])
+        else:
+            self.add_files_to_list([])
 
     def import_files_by_drag_and_drop(self, urls):
         """Handles file import by drag and drop.
         Files and directories are supported.
         """
-        files = self.get_sicm_files_from_url_list(urls)
-        self.add_files_to_list(files)
+        self._import_urls(urls)
+
+    def _import_urls(self, urls):
+        """Searches files and directories for .sicm files in
+        the background and imports them."""
+        future = self.io_service.submit("Search .sicm files", self.get_sicm_files_from_url_list, urls)
+        future.finished.connect(self._file_search_finished)
+        self.main_window.display_status_bar_message("Searching .sicm files...")
+
+    def _file_search_finished(self, future: IOFuture):
+        if future.succeeded:
+            self.add_files_to_list(future.result)
+        elif future.error:
+            self.main_window.display_status_bar_message(f"No files imported: {future.error}")
+        else:
+            self.main_window.display_status_bar_message("No files imported.")
 
     def get_sicm_files_from_url_list(self, urls):
         """Returns a list of .sicm file paths."""
@@ -599,22 +684,78 @@ class Controller:
         if type(files) is not list:
             files = [files]
 
-        self.main_window.set_wait_cursor()
-        new_files = self.data_manager.get_files_without_duplicates(files)
-        self.data_manager.import_files(files)
-        self.view_manager.create_views(files)
-        if new_files:
-            self.main_window.add_items_to_list(new_files)
+        # files which are being imported are duplicates, too
+        pending_files = [future.args[0] for future in self.pending_imports]
+        new_files = [file for file in dict.fromkeys(self.data_manager.get_files_without_duplicates(files))
+                     if file not in pending_files]
+        if not new_files:
+            if not self.pending_imports:
+                self.main_window.display_status_bar_message("No files imported.")
+            return
+
+        for file in new_files:
+            future = self.io_service.submit(f"Import {file}", sicm_data.get_sicm_data, file)
+            future.finished.connect(self._import_finished)
+            self.pending_imports.append(future)
+        self.main_window.display_status_bar_message("Importing " + str(len(self.pending_imports)) + " file(s)...")
+
+    def _import_finished(self, _future: IOFuture):
+        """Adds the imported data to the list in the order in which the files
+        have been submitted, i.e. only if all previous imports have finished."""
+        imported_files = []
+        while self.pending_imports and self.pending_imports[0].done():
+            future = self.pending_imports.pop(0)
+            file = future.args[0]
+            if future.succeeded:
+                self.data_manager.add_imported_data(file, future.result)
+                self.view_manager.create_view(file)
+                imported_files.append(file)
+            elif future.error:
+                print("Error in Main.add_files_to_list:")
+                print(future.error)
+
+        if imported_files:
+            self.imported_count += len(imported_files)
+            self.main_window.add_items_to_list(imported_files)
             self.main_window.set_menus_enabled(True)
+            self.update_thumbnails(imported_files)
 
-            if len(new_files) > 1:
-                message_end = " files."
+        if not self.pending_imports:
+            if self.imported_count > 1:
+                message = "Imported " + str(self.imported_count) + " files."
+            elif self.imported_count == 1:
+                message = "Imported 1 file."
             else:
-                message_end = " file."
-            self.main_window.display_status_bar_message("Imported " + str(len(new_files)) + message_end)
-        else:
-            self.main_window.display_status_bar_message("No files imported.")
-        self.main_window.set_default_cursor()
+                message = "No files imported."
+            self.main_window.display_status_bar_message(message)
+            self.imported_count = 0
+
+    def update_thumbnails(self, keys: list[str]):
+        """Loads or generates thumbnails of scans in the background and shows
+        them in the imported files list.
+
+        Thumbnails are only updated if data version or color map have changed.
+        """
+        for key in keys:
+            data = self.data_manager.get_data(key)
+            view = self.view_manager.get_view(key)
+            if not isinstance(data, ScanBackstepMode) or view is None:
+                continue
+            version = (data.version, view.color_map)
+            if self.thumbnail_versions.get(key) == version:
+                continue
+            self.thumbnail_versions[key] = version
+
+            worker = ThumbnailWorker(key, data, view.color_map, self.thumbnail_cache)
+            worker.signals.finished.connect(
+                lambda key, thumbnail, version=version: self._show_thumbnail(key, version, thumbnail)
+            )
+            QThreadPool.globalInstance().start(worker)
+
+    def _show_thumbnail(self, key: str, version: tuple[int, Colormap], thumbnail):
+        # thumbnails of outdated versions are discarded
+        if self.thumbnail_versions.get(key) == version:
+            self.main_window.set_item_thumbnail(key, thumbnail)
 
     def remove_all(self):
         """Removes all items from list widget and disables menus."""
@@ -720,6 +861,9 @@ class Controller:
     def update_figures_and_status(self, message: str = ""):
         """Redraws figures on the canvas and updates statusbar message.
 
+        Figures are drawn in the background, so only the latest selection
+        is drawn when the selection changes quickly.
+
         An optional message will be concatenated to the status bar message.
         """
         try:
@@ -730,14 +874,14 @@ class Controller:
                 current_view.z_in_nm = self.main_window.action_set_z_axis_label_nano.isChecked()
 
                 if isinstance(current_data, ScanBackstepMode):
-                    self.figure_canvas_3d.draw_graph(current_data, SURFACE_PLOT, current_view)
-                    self.figure_canvas_2d.draw_graph(current_data, RASTER_IMAGE, current_view)
+                    self.figure_canvas_3d.draw_graph_in_background(current_data, SURFACE_PLOT, current_view)
+                    self.figure_canvas_2d.draw_graph_in_background(current_data, RASTER_IMAGE, current_view)
                     if self.results_window:
                         self.results_window.update_results(current_data)
 
                 if isinstance(current_data, ApproachCurve):
-                    self.figure_canvas_3d.draw_graph(current_data)
-                    self.figure_canvas_2d.draw_graph(current_data, APPROACH_CURVE, current_view)
+                    self.figure_canvas_3d.draw_graph_in_background(current_data)
+                    self.figure_canvas_2d.draw_graph_in_background(current_data, APPROACH_CURVE, current_view)
 
                 self.main_window.update_info_text(
                     scan_date=current_data.get_scan_date(),
@@ -754,6 +898,8 @@ class Controller:
                     previous_manipulations=current_data.previous_manipulations
                 )
 
+                # data or color maps may have changed
+                self.update_thumbnails(self.data_manager.get_list_of_all_item_keys())
                 self._update_undo_redo_menu_items()
                 manipulations = self.data_manager.get_undoable_manipulation_names_list(self.current_selection)
                 self.main_window.update_viewing_angles_label(
@@ -892,13 +1038,20 @@ class Controller:
         self.update_figures_and_status()
 
     def _select_area(self, point1: tuple[int, int], point2: tuple[int, int]):
-        # TODO ROI selection
         if points_are_not_equal(point1, point2):
-            # self.current_selection.rois = (point1, point2)
-            self.update_figures_and_status("ROI set")
+            view = self.view_manager.get_view(self.current_selection)
+            # assign a new list, since lists are shared between
+            # views after applying view settings to other views
+            view.rois = view.rois + [(point1, point2)]
+            self.update_figures_and_status("ROI %i set" % len(view.rois))
         else:
             self.update_figures_and_status("No ROI set.")
 
+    def clear_rois(self):
+        if self.current_selection:
+            self.view_manager.get_view(self.current_selection).rois = []
+            self.update_figures_and_status("ROIs removed.")
+
     def open_crop_tool(self):
         if self.current_selection:
             data = self.data_manager.get_data(self.current_selection)
@@ -941,6 +1094,12 @@ class Controller:
             else:
                 self.main_window.display_status_bar_message("No scan data selected.")
 
+    def show_performance_window(self):
+        if self.performance_window is None:
+            self.performance_window = PerformanceWindow(parent=self.main_window)
+        self.performance_window.show()
+        self.performance_window.raise_()
+
     def measure_distance(self):
         if self.current_selection:
             self.main_window.set_cross_cursor()
@@ -984,21 +1143,22 @@ class Controller:
 
     def show_roi_dialog(self):
         """TODO not implemented yet"""
-        self.roi_dialog = ROIsDialog(controller=self, parent=self.main_window)
-        self.roi_dialog.open_window()
+        if self.roi_dialog is None:
+            self.roi_dialog = ROIsDialog(controller=self, parent=self.main_window)
+        self._open_dialog(self.roi_dialog)
 
     def open_results_dialog(self):
         """
         Opens a dialog to select parameters to include in results analysis.
+        The dialog is created when it is opened first and keeps the
+        selected parameters afterwards.
         """
-        if self.results_dialog:
-            self.results_dialog.destroy()
-
-        self.results_dialog = ParametersDialog(
-            controller=self,
-            parent=self.main_window
-        )
-        self.results_dialog.open_window()
+        if self.results_dialog is None:
+            self.results_dialog = ParametersDialog(
+                controller=self,
+                parent=self.main_window
+            )
+        self._open_dialog(self.results_dialog)
 
     def show_results_of_selection(self):
         """Shows a small window displaying the results
@@ -1083,11 +1243,19 @@ class Controller:
         This dictionary can be passed to TableResultsWindow to display a table representation
         of the results.
 
+        If ROIs are set for any of the scans, an additional column "ROI" is added
+        and each ROI gets its own row below the row of the whole scan. All ROIs of
+        a scan are evaluated one after another on views of the same data.
+
         :param data_list: An iterable. This can be a list or the result of dict.keys()
         :param parameters: A list of strings
         """
+        rois = {key: self._get_rois(key) for key in data_list}
+
         # add some metadata at the beginning of the dict
         results = {"scan": [], "scan date": []}
+        if any(rois.values()):
+            results["ROI"] = []
         results.update({parameter_name: [] for parameter_name in parameters})
 
         for key in data_list:
@@ -1095,21 +1263,29 @@ class Controller:
 
             # at the moment only ScanBackstepMode is supported
             if isinstance(data, ScanBackstepMode):
-                results["scan"].append(key)
-                results["scan date"].append(data.get_scan_date())
-
-                for par in parameters:
-                    column = results[par]
-                    try:
-                        column.append(IMPLEMENTED_PARAMETERS[par](data))
-                    except Exception as e:
-                        # in case of an error during calculation, we need to
-                        # store some value in the list or else following calculations
-                        # will be assigned to incorrect rows
-                        print(e)
-                        column.append("error")
+                # None is used for the whole scan
+                for index, roi in enumerate([None] + rois[key]):
+                    results["scan"].append(key)
+                    results["scan date"].append(data.get_scan_date())
+                    if "ROI" in results:
+                        results["ROI"].append("ROI %i" % index if roi is not None else "whole scan")
+                    self._append_results(results, data, parameters, roi)
         return results
 
+    def _get_rois(self, key: str) -> list:
+        view = self.view_manager.get_view(key)
+        if view:
+            return list(view.rois)
+        return []
+
+    @staticmethod
+    def _append_results(results: dict[str, list], data: ScanBackstepMode, parameters: list[str], roi=None):
+        """Calculates parameters of data (or an ROI of data) and appends them
+        to the columns of results. Parameters which can not be calculated
+        are appended as "error", so that all columns keep the same rows."""
+        for par, value in calculate_parameters(data, parameters, roi).items():
+            results[par].append(value)
+
     def rename_selection(self):
         if self.current_selection:
             dialog_input, status = QInputDialog.getText(
@@ -1130,47 +1306,150 @@ class Controller:
             else:
                 self.main_window.display_status_bar_message("Filename not changed")
 
+    def _get_pipeline(self, key: str) -> Pipeline:
+        """Returns the manipulations of the data as pipeline.
+        Raises PipelineError if a manipulation can not be stored."""
+        return get_pipeline_from_undo_stack(self.data_manager.get_undoable_manipulation_items_list(key))
+
+    def _get_pipeline_steps(self, key: str) -> list[dict] | None:
+        """Returns the serialized pipeline steps for the metadata of exported files
+        or None if the manipulations can not be stored as pipeline."""
+        try:
+            return self._get_pipeline(key).to_dict()["steps"]
+        except PipelineError as e:
+            print(e)
+            return None
+
+    def apply_pipeline_to_checked_items(self, pipeline: Pipeline):
+        """Applies all steps of pipeline to the checked scans in a process pool.
+        Each step can be undone.
+
+        Scans are processed independently: results are added as soon as a
+        scan is finished and scans which failed are listed when all scans
+        are finished. The batch can be cancelled in the progress dialog.
+        Unless batch manipulations are undone step by step, intermediate
+        states are not kept, which saves memory and time for long pipelines.
+        """
+        if self.batch_job is not None and not self.batch_job.is_finished:
+            self.main_window.display_status_bar_message("Batch mode is still running.")
+            return
+        keys = self.main_window.get_all_checked_items()
+        if not keys:
+            self.main_window.display_status_bar_message("No scans checked.")
+            return
+        if self.batch_executor is None:
+            self.batch_executor = create_batch_executor()
+
+        data = {key: self.data_manager.get_data(key) for key in keys}
+        fused = not self.main_window.action_batch_keep_steps.isChecked()
+        self.batch_job = BatchJob(self.batch_executor, data, pipeline, fused, self.pipeline_cache)
+        self.batch_progress_dialog = QProgressDialog(
+            "Applying %i manipulation(s) to %i scan(s)..." % (len(pipeline), len(keys)),
+            "Cancel", 0, len(keys), self.main_window
+        )
+        self.batch_progress_dialog.setWindowTitle("Batch mode")
+        self.batch_progress_dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        self.batch_progress_dialog.setMinimumDuration(0)
+        self.batch_progress_dialog.canceled.connect(self.batch_job.cancel)
+        self.batch_job.progress.connect(self.batch_progress_dialog.setValue)
+        self.batch_job.scan_finished.connect(self._add_batch_results)
+        self.batch_job.finished.connect(self._batch_job_finished)
+        self.batch_job.start()
+
+    def _add_batch_results(self, key: str, states: list[sicm_data.SICMdata]):
+        """Puts the results of a scan on its undo stack unless the scan has
+        been changed or removed while it was processed."""
+        job = self.batch_job
+        if not self.data_manager.filename_exists(key) or self.data_manager.get_data(key) is not job.data[key]:
+            job.failures[key] = "Scan was changed or removed during batch mode."
+            return
+        if job.fused:
+            self.data_manager.add_fused_pipeline_result(key, job.pipeline, states[-1])
+        else:
+            self.data_manager.add_pipeline_results(key, job.pipeline, states)
+        self.unsaved_changes = True
+        self.update_thumbnails([key])
+        if key == self.current_selection:
+            self.update_figures_and_status()
+
+    def _batch_job_finished(self):
+        job = self.batch_job
+        self.batch_progress_dialog.reset()
+        if job.pool_broken:
+            # a worker process was terminated, the executor can not be used anymore
+            self.batch_executor.shutdown(wait=False, cancel_futures=True)
+            self.batch_executor = None
+        processed = job.total - job.skipped - len(job.failures)
+        message = "Batch mode: %i of %i scans processed." % (processed, job.total)
+        if job.cancelled:
+            message += " Cancelled."
+        self.update_figures_and_status(message)
+
+        if job.failures:
+            for key, error in job.failures.items():
+                print('Pipeline on Scan "%s" not completed: %s' % (key, error))
+            self.batch_failures_window = TableResultsWindow(
+                data={"scan": list(job.failures.keys()), "error": list(job.failures.values())},
+                parent=self.main_window
+            )
+            self.batch_failures_window.setWindowTitle("Batch mode: failed scans")
+            self.batch_failures_window.show()
+
+    def export_pipeline(self):
+        """Saves the manipulations of the current selection as JSON or TOML pipeline."""
+        if not self.current_selection:
+            self.main_window.display_status_bar_message("Please select a scan file.")
+            return
+        try:
+            pipeline = self._get_pipeline(self.current_selection)
+        except PipelineError as e:
+            self.main_window.display_status_bar_message(str(e))
+            return
+        options = QFileDialog.Option(QFileDialog.Option.DontUseNativeDialog)
+        file_path = QFileDialog.getSaveFileName(parent=self.main_window,
+                                                caption="Export pipeline",
+                                                filter="JSON (*.json);;TOML (*.toml)",
+                                                directory=DEFAULT_FILE_PATH,
+                                                options=options)
+        if file_path[0]:
+            file, _ = self._get_file_name_with_extension(file_path)
+            try:
+                save_pipeline(file, pipeline)
+                self.main_window.display_status_bar_message("Pipeline exported.")
+            except OSError as e:
+                self.main_window.display_status_bar_message("Pipeline not exported: %s" % e)
+
+    def apply_pipeline_from_file(self):
+        """Loads a JSON or TOML pipeline and applies it to all checked scans."""
+        options = QFileDialog.Option(QFileDialog.Option.DontUseNativeDialog)
+        file_path = QFileDialog.getOpenFileName(parent=self.main_window,
+                                                caption="Apply pipeline to checked scans",
+                                                filter="Pipelines (*.json *.toml)",
+                                                directory=DEFAULT_FILE_PATH,
+                                                options=options)
+        if file_path[0]:
+            try:
+                pipeline = load_pipeline(file_path[0])
+            except PipelineError as e:
+                self.main_window.display_status_bar_message(str(e))
+                return
+            self.apply_pipeline_to_checked_items(pipeline)
+
     def batch_mode_test(self):
+        """Applies the manipulations of the current selection to all checked scans."""
         if self.current_selection:
             try:
-                self.main_window.set_wait_cursor()
-                action_list = self.data_manager.get_undoable_manipulation_items_list(self.current_selection)
-
-                for scan in self.main_window.get_all_checked_items():
-                    for action in action_list:
-                        try:
-                            if action.name == "Reset data":
-                                self.data_manager.reset_manipulations(scan)
-                            else:
-                                self.data_manager.execute_func_on_current_data(
-                                    *action.arguments.get("args"),
-                                    **action.arguments.get("kwargs"),
-                                    func=action.func,
-                                    key=scan,
-                                    action_name=action.name,
-                                )(
-                                    self.data_manager.get_data(scan),
-                                    *action.arguments.get("args"),
-                                    **action.arguments.get("kwargs")
-                                )
-                        except Exception as e:
-                            print("Exception in Batch mode:")
-                            print('"' + action.name + '" on Scan "' + scan + '" not performed.')
-                            print(e)
-                            print("func: " + str(action.func))
-                            traceback.print_exc()
-                            print("------------------------")
-            except Exception as ex:
-                print("Exception during batch mode")
-                print(ex)
-            finally:
-                self.main_window.setEnabled(True)
-                self.main_window.set_default_cursor()
+                pipeline = self._get_pipeline(self.current_selection)
+            except PipelineError as e:
+                self.main_window.display_status_bar_message(str(e))
+                return
+            self.apply_pipeline_to_checked_items(pipeline)
         else:
             self.main_window.display_status_bar_message("Please select a scan file.")
 
 
 def main():
+    enable_from_environment()
     app = QApplication(sys.argv)
     app.setApplicationName(APP_NAME)
     app.setWindowIcon(QIcon(APP_ICON_PATH))
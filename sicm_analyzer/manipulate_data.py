@@ -1,6 +1,4 @@
 import numpy as np
-from scipy.interpolate import griddata
-from skimage.draw import disk
 from sicm_analyzer.data_fitting import polynomial_fifth_degree_symfit, poly_xx_fit
 from sicm_analyzer.sicm_data import SICMdata, ScanBackstepMode
 import enum
@@ -11,6 +9,13 @@ class MirrorAxis(enum.Enum):
     Y_AXIS = 0
 
 
+# FILTERS
+MEDIAN_TEMPORAL = "Median (temporal)"
+MEDIAN_SPATIAL = "Median (spatial)"
+AVERAGE_TEMPORAL = "Average (temporal)"
+AVERAGE_SPATIAL = "Average (spatial)"
+
+
 # Simple Manipulations
 # ______________________________________
 def crop(data: ScanBackstepMode, point1: tuple[int, int], point2: tuple[int, int]):
@@ -92,6 +97,12 @@ def subtract_threshold(data: ScanBackstepMode, threshold: float):
 
 # Filter Manipulations
 # ______________________________________
+def get_float_dtype(z: np.ndarray) -> np.dtype:
+    """Returns the type of filtered z data: float32 data stays
+    float32 instead of being calculated in float64 buffers."""
+    return np.result_type(z.dtype, np.float32)
+
+
 def filter_median_temporal(data: ScanBackstepMode, px_radius=1):
     """
     Sets each pixel equal to the median of itself, the l pixel measurements immediately before, and the l pixel 
@@ -111,7 +122,7 @@ def filter_median_temporal(data: ScanBackstepMode, px_radius=1):
     """
     shape = data.z.shape
     flattened = data.z.flatten('C')
-    z = np.zeros(len(flattened))
+    z = np.zeros(len(flattened), dtype=get_float_dtype(data.z))
 
     for i in np.arange(0, len(flattened)):
         z[i] = np.median(flattened[np.max([i - px_radius, 0]):np.min([i + (px_radius + 1), len(flattened)])])
@@ -137,7 +148,7 @@ def filter_average_temporal(data: ScanBackstepMode, px_radius=1):
     """
     shape = data.z.shape
     flattened = data.z.flatten('C')
-    z = np.zeros(len(flattened))
+    z = np.zeros(len(flattened), dtype=get_float_dtype(data.z))
 
     for i in np.arange(0, len(flattened)):
         z[i] = np.mean(flattened[np.max([i - px_radius, 0]):np.min([i + (px_radius + 1), len(flattened)])])
@@ -155,8 +166,10 @@ def filter_median_spatial(data: ScanBackstepMode, px_radius=1):
     adjust each pixel.
     :returns: new Z data adjusted using the described method. The existing object is not modified.
     """
+    from skimage.draw import disk
+
     shape = data.z.shape
-    z = np.zeros(shape)
+    z = np.zeros(shape, dtype=get_float_dtype(data.z))
 
     for i in np.arange(shape[0]):
         for j in np.arange(shape[1]):
@@ -175,8 +188,10 @@ def filter_average_spatial(data: ScanBackstepMode, px_radius=1):
     adjust each pixel.
     :returns: new Z data adjusted using the described method. The existing object is not modified.
     """
+    from skimage.draw import disk
+
     shape = data.z.shape
-    z = np.zeros(shape)
+    z = np.zeros(shape, dtype=get_float_dtype(data.z))
 
     for i in np.arange(shape[0]):
         for j in np.arange(shape[1]):
@@ -308,6 +323,8 @@ def interpolate_cubic(data: SICMdata, num_points, method='nearest'):
     :param lims: List containing two floats which define the lower and upper bound of the y-axis, respectively
     :returns: 1 upon successful setting and 0 upon failure
     """
+    from scipy.interpolate import griddata
+
     x = data.x  # .flatten()
     y = data.y  # .flatten()
     z = data.z.flatten()
@@ -338,3 +355,47 @@ def interpolate_cubic(data: SICMdata, num_points, method='nearest'):
     points = np.concatenate((view_ob.get_x_data().flatten(),view_ob.get_y_data().flatten()),axis=1)
     inter = griddata(points, view_ob.get_z_data().flatten(), (grid_x, grid_y), method='nearest')
     return inter'''
+
+
+# Registry of manipulations which can be stored in pipelines (see pipeline.py).
+# Names are written to pipeline files and must not be changed.
+MANIPULATIONS = {
+    "crop": crop,
+    "subtract_z_minimum": subtract_z_minimum,
+    "transpose_z_data": transpose_z_data,
+    "flip_z_data": flip_z_data,
+    "invert_z_data": invert_z_data,
+    "height_diff_to_neighbour": height_diff_to_neighbour,
+    "subtract_threshold": subtract_threshold,
+    "filter_median_temporal": filter_median_temporal,
+    "filter_average_temporal": filter_average_temporal,
+    "filter_median_spatial": filter_median_spatial,
+    "filter_average_spatial": filter_average_spatial,
+    "filter_single_outlier": filter_single_outlier,
+    "fit_data": fit_data,
+    "level_data": level_data,
+}
+
+
+# In-place variants of manipulations, which write into the z array of the data
+# instead of allocating a new array. They give the same results as the functions
+# above, but must only be used on data whose z array is not shared with other
+# objects, e.g. in pipeline.run_pipeline_fused(). Crop, transpose and flip
+# already return views and other manipulations need a second array.
+def _subtract_z_minimum_in_place(data: SICMdata):
+    np.subtract(data.z, np.min(data.z), out=data.z)
+
+
+def _invert_z_data_in_place(data: ScanBackstepMode):
+    np.negative(data.z, out=data.z)
+
+
+def _subtract_threshold_in_place(data: ScanBackstepMode, threshold: float):
+    np.clip(data.z, threshold, None, out=data.z)
+
+
+IN_PLACE_MANIPULATIONS = {
+    "subtract_z_minimum": _subtract_z_minimum_in_place,
+    "invert_z_data": _invert_z_data_in_place,
+    "subtract_threshold": _subtract_threshold_in_place,
+}
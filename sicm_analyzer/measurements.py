@@ -3,21 +3,23 @@ from typing import Any
 
 
 import numpy as np
-import scipy.signal
-from matplotlib import pyplot as plt
-# from scipy.signal import argrelmax, argrelmin, argrelextrema, find_peaks
-from scipy import signal
-from symfit.core.minimizers import BFGS
-from symfit import Poly, variables, parameters, Model, Fit
-from symfit.core.objectives import LeastSquares
-from sicm_analyzer.sicm_data import SICMdata, get_sicm_data
-from scipy.spatial import Delaunay
+# scipy.signal and symfit are imported when they are used first,
+# since they take long to import (see data_fitting.py)
+from sicm_analyzer.sicm_data import SICMdata, ScanBackstepMode, get_sicm_data
+from sicm_analyzer.chunked_statistics import MomentAccumulator, QuantileSketch, iter_row_chunks
+from sicm_analyzer.chunked_statistics import DEFAULT_CHUNK_ROWS, DEFAULT_SKETCH_SIZE
+from sicm_analyzer.roi import get_roi_z
+from sicm_analyzer.instrumentation import instrumented, MEASUREMENT
 
 
 # TODO generalization of polynomial fit functions
 def polynomial_second_degree(x_data, y_data, z_data: np.array):
     """Returns data fitted to a polynomial of 2nd degree with two
     variables x and y."""
+    from symfit import Poly, variables, parameters, Model, Fit
+    from symfit.core.minimizers import BFGS
+    from symfit.core.objectives import LeastSquares
+
     x, y, z = variables('x, y, z')
     p00, p10, p01, p20, p11, p02 = parameters(
         "p00, p10, p01, p20, p11, p02"
@@ -46,12 +48,26 @@ def polynomial_second_degree(x_data, y_data, z_data: np.array):
     return z_fitted
 
 
-def get_minimum_value(data: SICMdata) -> float:
-    return np.min(data.z)
+# All parameter functions listed in parameters.IMPLEMENTED_PARAMETERS accept an
+# optional region of interest (roi): a rectangle or a boolean mask (see roi.py).
+# Rectangles are evaluated on views of the z array. For masks, only the selected
+# values are gathered where a flat array is needed.
+def _get_values(data: SICMdata, roi=None) -> np.ndarray:
+    """Returns the z values of a ROI. This is a view of data.z unless
+    roi is a mask; in this case a flat array of all selected values
+    is returned."""
+    z = get_roi_z(data.z, roi)
+    if np.ma.isMaskedArray(z):
+        return z.compressed()
+    return z
+
+
+def get_minimum_value(data: SICMdata, roi=None) -> float:
+    return np.min(_get_values(data, roi))
 
 
-def get_maximum_value(data: SICMdata) -> float:
-    return np.max(data.z)
+def get_maximum_value(data: SICMdata, roi=None) -> float:
+    return np.max(_get_values(data, roi))
 
 
 def get_grid(view):
@@ -74,14 +90,62 @@ def get_points(window, n=2):
     return [point1, point2]
 
 
-def get_surface_area_of_roi(data: SICMdata, roi=None) -> float:
-    """Returns the surface area of a selected region of interest.
+def get_surface_area_of_roi(data: ScanBackstepMode, roi=None) -> float:
+    """Returns the surface area of a selected region of interest."""
+    return get_surface_area(data, roi)
+
+
+def get_surface_area(data: ScanBackstepMode, roi=None) -> float:
+    """Returns the surface area of a scan in µm².
+
+    Each grid cell spanned by four neighbouring pixels is split
+    into two triangles whose areas are computed from the cross
+    product of their edges (see area() in the MATLAB SICMScan class).
+    Physical step sizes are taken from the micron to pixel factors.
+
+    Triangles with at least one NaN corner do not contribute to the
+    surface area. In contrast to the MATLAB version, this is handled
+    without looping over the cells. The same applies to triangles with
+    a corner outside an ROI mask.
+    """
+    z = get_roi_z(data.z, roi)
+    inside = None
+    if np.ma.isMaskedArray(z):
+        inside = ~np.ma.getmaskarray(z)
+        z = z.data
+    if z.ndim != 2 or min(z.shape) < 2:
+        return 0.0
+
+    dx = data.micron_to_pixel_factor_x()
+    dy = data.micron_to_pixel_factor_y()
+
+    z_00 = z[:-1, :-1]
+    z_01 = z[:-1, 1:]
+    z_10 = z[1:, :-1]
+    z_11 = z[1:, 1:]
+    base = (dx * dy) ** 2
+
+    upper_triangles = 0.5 * np.sqrt(base + (dy * (z_01 - z_00)) ** 2 + (dx * (z_10 - z_00)) ** 2)
+    lower_triangles = 0.5 * np.sqrt(base + (dx * (z_01 - z_11)) ** 2 + (dy * (z_10 - z_11)) ** 2)
 
-    Dev Note: ROI is not supported at the moment. the surface
-    area for the whole scan will be returned.
+    if inside is not None:
+        upper_triangles = np.where(inside[:-1, :-1] & inside[:-1, 1:] & inside[1:, :-1], upper_triangles, np.nan)
+        lower_triangles = np.where(inside[:-1, 1:] & inside[1:, :-1] & inside[1:, 1:], lower_triangles, np.nan)
+
+    # NaN corners propagate into the triangle area and are skipped by nansum
+    return float(np.nansum(upper_triangles, dtype=np.float64) + np.nansum(lower_triangles, dtype=np.float64))
+
+
+def get_volume(data: ScanBackstepMode, roi=None) -> float:
+    """Returns the volume of a scan in µm³.
+
+    The data is taken as it is, nothing is subtracted first. To get
+    the volume without z offset, subtract the z minimum before.
+    NaN values are ignored.
     """
-    points = np.vstack((data.x, data.y, data.z)).reshape((3, -1)).T
-    triangulation = Delaunay(points[:, :2]).simplices
+    dx = data.micron_to_pixel_factor_x()
+    dy = data.micron_to_pixel_factor_y()
+    return float(dx * dy * np.nansum(_get_values(data, roi), dtype=np.float64))
 
 
 def root_mean_square_error(data: np.array) -> float:
@@ -95,6 +159,7 @@ def root_mean_square_error(data: np.array) -> float:
     return rmse
 
 
+@instrumented(MEASUREMENT)
 def get_roughness(data: SICMdata):  # -> tuple[float, Any]:
     """Returns the roughness of SICM data.
     No data manipulation is performed in this step!
@@ -169,7 +234,7 @@ def get_roughness(data: SICMdata):  # -> tuple[float, Any]:
     return roughness  # , fit_results
 
 
-def get_lower_and_upper_limit_for_outlier_determination(values: np.array):
+def get_lower_and_upper_limit_for_outlier_determination(values: np.array) -> tuple[float, float]:
     """Calculates the lower and upper limits for
     outlier determination. For this purpose, 25% and 75%
     percentiles are determined. These values are adjusted by
@@ -178,22 +243,82 @@ def get_lower_and_upper_limit_for_outlier_determination(values: np.array):
     pc75 = np.percentile(values.flatten('F'), 75)
     pc25 = np.percentile(values.flatten('F'), 25)
 
+    return _get_outlier_limits(pc25, pc75)
+
+
+def _get_outlier_limits(pc25: float, pc75: float) -> tuple[float, float]:
+    """Returns lower and upper outlier limits for the given quartiles."""
     # interquartile range
     iqr = pc75 - pc25
 
     # Every data point beyond 1.5 IQRs is an outlier
     upper_limit = pc75 + 1.5 * iqr
     lower_limit = pc25 - 1.5 * iqr
+    return lower_limit, upper_limit
+
+
+# Chunked statistics
+# The following functions accept z data which does not fit in memory. Pass either
+# a (memory-mapped) numpy array, a SICMdata object or an iterable of row chunks.
+# Data is read only once; see chunked_statistics.py for details.
+def _accumulate_chunks(source, chunk_rows: int = DEFAULT_CHUNK_ROWS, sketch: QuantileSketch = None) -> MomentAccumulator:
+    if isinstance(source, SICMdata):
+        source = source.z
+    moments = MomentAccumulator()
+    for chunk in iter_row_chunks(source, chunk_rows):
+        moments.add(chunk)
+        if sketch is not None:
+            sketch.add(chunk)
+    return moments
+
+
+def get_chunked_statistics(source, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                           sketch_size: int = DEFAULT_SKETCH_SIZE) -> dict[str, float]:
+    """Returns moment-based parameters and approximate outlier limits of z data
+    in a single pass.
+
+    Rq, skewness and kurtosis are defined as in get_root_mean_sq_roughness,
+    get_skewness and get_kurtosis_coefficient. Outlier limits are calculated
+    as in get_lower_and_upper_limit_for_outlier_determination but from
+    approximate quartiles.
+
+    Keys of the returned dictionary:
+        n, mean, min, max, Rq, skewness, kurtosis, lower limit, upper limit
+    """
+    sketch = QuantileSketch(size=sketch_size)
+    moments = _accumulate_chunks(source, chunk_rows, sketch)
+
+    rq = math.sqrt(moments.raw_moment(2)) if moments.n else float("nan")
+    if moments.n and rq > 0:
+        skewness = moments.raw_moment(3) / rq ** 3
+        kurtosis = moments.raw_moment(4) / rq ** 4
+    else:
+        skewness = kurtosis = float("nan")
+    lower_limit, upper_limit = _get_outlier_limits(sketch.percentile(25), sketch.percentile(75))
+
+    return {
+        "n": moments.n,
+        "mean": moments.mean if moments.n else float("nan"),
+        "min": moments.minimum if moments.n else float("nan"),
+        "max": moments.maximum if moments.n else float("nan"),
+        "Rq": rq,
+        "skewness": skewness,
+        "kurtosis": kurtosis,
+        "lower limit": lower_limit,
+        "upper limit": upper_limit,
+    }
 
-    print("upper: %s" % upper_limit)
-    print("lower: %s" % lower_limit)
-    print(z_fitted[np.where((z_fitted < lower_limit) | (z_fitted > upper_limit))])
-    print(z_fitted[np.where((z_fitted >= lower_limit) & (z_fitted <= upper_limit))])
-    print("mean after: %s" % np.mean(z_fitted[np.where((z_fitted < lower_limit) | (z_fitted > upper_limit))]))
-
-    # no_outliers = flat(flat >= lowerlimit & flat <= upperlimit)
 
-    print(root_mean_square_error(z_fitted[np.where((z_fitted >= lower_limit) & (z_fitted <= upper_limit))]))
+def get_outlier_limits_of_chunks(source, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                                 sketch_size: int = DEFAULT_SKETCH_SIZE) -> tuple[float, float]:
+    """Returns approximate lower and upper limits for outlier determination
+    without loading all z data into memory."""
+    sketch = QuantileSketch(size=sketch_size)
+    if isinstance(source, SICMdata):
+        source = source.z
+    for chunk in iter_row_chunks(source, chunk_rows):
+        sketch.add(chunk)
+    return _get_outlier_limits(sketch.percentile(25), sketch.percentile(75))
 
 
 def measure_distance():
@@ -205,27 +330,27 @@ def measure_profile():
 
 
 # Amplitude parameters
-def get_arithmetic_average_height(data: SICMdata):
+def get_arithmetic_average_height(data: SICMdata, roi=None):
     """ 2.1 arithmetic average height (R_a), AKA centre line average
 
     n: number of samples along assessment length
     """
-    values = data.z.flatten()
-    avg = np.average(values)
+    values = _get_values(data, roi)
+    avg = np.mean(values, dtype=np.float64)
     return avg
 
 
-def get_root_mean_sq_roughness(data: SICMdata):
+def get_root_mean_sq_roughness(data: SICMdata, roi=None):
     """ 2.2 root-mean-square roughness (R_q)
 
     n: number of samples along the assessment length"""
 
-    values = data.z.flatten()
-    mean = np.average(np.square(values))
+    values = _get_values(data, roi)
+    mean = np.mean(np.square(values, dtype=np.float64))
     return np.sqrt(mean)
 
 
-def get_ten_point_height_ISO(data: SICMdata):
+def get_ten_point_height_ISO(data: SICMdata, roi=None):
     """ 2.3 ten point height (R_z(ISO))
 
     n: number of samples along the assessment length
@@ -234,15 +359,15 @@ def get_ten_point_height_ISO(data: SICMdata):
 
     """
 
-    values = data.z.flatten()
-    values_sorted = np.sort(values)
+    values = _get_values(data, roi)
+    values_sorted = np.sort(values, axis=None)
     peaks = values_sorted[-5:]
     valleys = values_sorted[:5]
     diff = sum(peaks) - sum(valleys)
-    return diff / len(values)
+    return diff / values.size
 
 
-def get_ten_point_height_DIN(data: SICMdata):
+def get_ten_point_height_DIN(data: SICMdata, roi=None):
     """ 2.3 ten point height (R_z(DIN))
 
     n: number of samples along the assessment length
@@ -251,146 +376,131 @@ def get_ten_point_height_DIN(data: SICMdata):
 
     """
 
-    values = data.z.flatten()
-    values_sorted = np.sort(values)
+    values = _get_values(data, roi)
+    values_sorted = np.sort(values, axis=None)
     peaks = values_sorted[-5:]
     valleys = values_sorted[:5]
     total = sum(peaks) + sum(valleys)
-    return total / len(values)
+    return total / values.size
 
 
-def get_max_peak_height_from_mean(data: SICMdata):
+def get_max_peak_height_from_mean(data: SICMdata, roi=None):
     """ 2.4 maximum height of the profile above the mean line (R_p) """
-    values = data.z.flatten()
-    avg = np.average(values)
+    values = _get_values(data, roi)
+    avg = np.mean(values, dtype=np.float64)
     max_peak = np.max(values)
     return max_peak - avg
 
 
-def get_max_valley_depth_from_mean(data: SICMdata):
+def get_max_valley_depth_from_mean(data: SICMdata, roi=None):
     """ 2.5 maximum depth of the profile below the mean line (R_v) """
 
-    values = data.z.flatten()
-    avg = np.average(values)
+    values = _get_values(data, roi)
+    avg = np.mean(values, dtype=np.float64)
     min_peak = np.min(values)
     return avg - min_peak
 
 
-def get_mean_height_of_peaks(data: SICMdata):
+# Profile-wise parameters evaluate each row of z data as a single profile.
+# np.ma functions work on plain arrays as well as on masked arrays (ROI masks).
+# Rows without any value inside an ROI mask are skipped by np.ma.compressed.
+def get_mean_height_of_peaks(data: SICMdata, roi=None):
     """ 2.6 mean of the maximum height of peaks (R_pm) """
     # relies on line-wise evaluation of profiles
+    z = get_roi_z(data.z, roi)
+    peaks = np.ma.compressed(np.ma.max(z, axis=1))
+    return np.average(peaks)
 
-    rtn = np.zeros(len(data.z))
-    counter = 0
-
-    for curve in data.z:
-        peak = np.max(curve)
-        rtn[counter] = peak
-        counter += 1
 
-    return np.average(rtn)
-
-
-def get_mean_depth_of_valleys(data: SICMdata):
+def get_mean_depth_of_valleys(data: SICMdata, roi=None):
     """ 2.7 mean of the maximum depth of valleys obtained for each sampling length (R_vm)"""
     # relies on line-wise evaluation of profiles
+    z = get_roi_z(data.z, roi)
+    valleys = np.ma.compressed(np.ma.min(z, axis=1))
+    return np.average(valleys)
 
-    rtn = np.zeros(len(data.z))
-    counter = 0
-
-    for curve in data.z:
-        valley = np.min(curve)
-        rtn[counter] = valley
-        counter += 1
-
-    return np.average(rtn)
 
-
-def get_max_height_of_profile(data: SICMdata):
+def get_max_height_of_profile(data: SICMdata, roi=None):
     """ 2.8 vertical distance between the highest peak and lowest value"""
-    return get_max_peak_height_from_mean(data) + get_max_valley_depth_from_mean(data)
+    return get_max_peak_height_from_mean(data, roi) + get_max_valley_depth_from_mean(data, roi)
 
 
-def get_maximum_height_single_profile(data: SICMdata):
+def get_maximum_height_single_profile(data: SICMdata, roi=None):
     """ 2.9 vertical distance between the highest peak and lowest valley for each sampling length
     returns an array of length data.z that contains the max height for each single profile"""
-
-    rtn = np.zeros(len(data.z))
-    counter = 0
-    for curve in data.z:
-        max_peak = np.max(curve)
-        min_valley = np.min(curve)
-        rtn[counter] = max_peak - min_valley
-        counter += 1
-    return rtn
+    z = get_roi_z(data.z, roi)
+    return np.ma.compressed(np.ma.max(z, axis=1) - np.ma.min(z, axis=1))
 
 
-def get_mean_maximum_peak_valley_heights(data: SICMdata):
+def get_mean_maximum_peak_valley_heights(data: SICMdata, roi=None):
     """ 2.10 mean of values in 2.9 array"""
 
-    vals = get_maximum_height_single_profile(data)
+    vals = get_maximum_height_single_profile(data, roi)
     return np.average(vals)
 
 
-def get_largest_peak_to_valley_height(data: SICMdata):
+def get_largest_peak_to_valley_height(data: SICMdata, roi=None):
     """ 2.11 maximum of the array that 2.10 returns"""
 
-    vals = get_maximum_height_single_profile(data)
+    vals = get_maximum_height_single_profile(data, roi)
     return np.max(vals)
 
 
-def get_third_point_height(data: SICMdata):
-    """" 2.12 calculated per sample length - returns the maximum of the calculated values """
+def _get_third_point_heights(data: SICMdata, roi=None) -> np.ndarray:
+    """Returns the difference between the third highest and the third
+    lowest value of each profile.
 
-    rtn = np.zeros(len(data.z))
-    counter = 0
-    for curve in data.z:
-        curve.sort()
-        third_peak = curve[-3]
-        third_valley = curve[2]
-        rtn[counter] = third_peak - third_valley
-        counter += 1
-    return np.max(rtn)
+    Profiles are sorted in a copy; data.z is not changed. Values outside
+    an ROI mask are sorted to the end of each profile. Profiles with less
+    than three values are skipped.
+    """
+    z = get_roi_z(data.z, roi)
+    if np.ma.isMaskedArray(z):
+        counts = z.count(axis=1)
+        z = z.filled(np.inf)
+    else:
+        counts = np.full(z.shape[0], z.shape[1])
+    profiles = np.sort(z, axis=1)
+    rows = np.flatnonzero(counts >= 3)
+    third_peaks = profiles[rows, counts[rows] - 3]
+    third_valleys = profiles[rows, 2]
+    return third_peaks - third_valleys
+
+
+def get_third_point_height(data: SICMdata, roi=None):
+    """" 2.12 calculated per sample length - returns the maximum of the calculated values """
+    return np.max(_get_third_point_heights(data, roi))
 
 
-def get_mean_of_third_point_height(data: SICMdata):
+def get_mean_of_third_point_height(data: SICMdata, roi=None):
     """ 2.13 mean of all third point parameters """
-
-    rtn = np.zeros(len(data.z))
-    counter = 0
-    for curve in data.z:
-        curve.sort()
-        third_peak = curve[-3]
-        third_valley = curve[2]
-        rtn[counter] = third_peak - third_valley
-        counter += 1
-    return np.average(rtn)
+    return np.average(_get_third_point_heights(data, roi))
 
 
-def get_profile_solidarity_factor(data: SICMdata):
+def get_profile_solidarity_factor(data: SICMdata, roi=None):
     """ 2.14 ratio between the maximum depth of valleys and maximum height of the profile (k) """
-    k = get_max_valley_depth_from_mean(data) / get_max_height_of_profile(data)
+    k = get_max_valley_depth_from_mean(data, roi) / get_max_height_of_profile(data, roi)
     return k
 
 
-def get_skewness(data: SICMdata):
+def get_skewness(data: SICMdata, roi=None):
     """ 2.15 third central moment of profile amplitude probability density function - assessment length (R_sk)"""
 
-    values = data.z.flatten()
+    values = _get_values(data, roi)
 
-    summation = np.sum(np.power(values, 3))
-    skew = summation / len(values) / get_root_mean_sq_roughness(data) ** 3
+    summation = np.sum(np.power(values, 3, dtype=np.float64))
+    skew = summation / values.size / get_root_mean_sq_roughness(data, roi) ** 3
 
     return skew
 
 
-def get_kurtosis_coefficient(data: SICMdata):
+def get_kurtosis_coefficient(data: SICMdata, roi=None):
     """ 2.16 fourth central moment of profile amplitude probability density function """
 
-    values = data.z.flatten()
+    values = _get_values(data, roi)
 
-    summation = np.sum(np.power(values, 4))
-    kurtosis = summation / len(values) / get_root_mean_sq_roughness(data) ** 4
+    summation = np.sum(np.power(values, 4, dtype=np.float64))
+    kurtosis = summation / values.size / get_root_mean_sq_roughness(data, roi) ** 4
 
     return kurtosis
 
@@ -460,6 +570,8 @@ def get_peak_count(data: SICMdata, margin):
 
 
 def get_mean_spacing_of_adjacent_local_peaks(data: SICMdata):
+    import scipy.signal
+
     values = data.z.flatten()
 
     threshold = get_max_height_of_profile(data) * 0.1
@@ -479,6 +591,8 @@ def get_mean_spacing_of_adjacent_local_peaks(data: SICMdata):
     print(rtn)
 
     # Create a plot
+    # pyplot is only imported here, so that measurements can be used without a GUI
+    from matplotlib import pyplot as plt
     plt.plot(values)  # 'o' for regular points
     plt.scatter(indices, rtn, marker='X', color='red',
                 label='Marked')
@@ -1,5 +1,7 @@
 from enum import Enum
 import sicm_analyzer.measurements
+import sicm_analyzer.areal_parameters
+from sicm_analyzer.instrumentation import measure, MEASUREMENT
 
 
 class ParameterEnum(Enum):
@@ -14,6 +16,7 @@ class GeneralParameters(ParameterEnum):
     Minimum = "min [µm]"
     Maximum = "max [µm]"
     SurfaceArea = "surface area"
+    Volume = "volume [µm³]"
 
 
 class AmplitudeParameters(ParameterEnum):
@@ -66,11 +69,54 @@ class HybridParameters(ParameterEnum):
     RoughnessPitchSkewness = "Roughness pitch skewness (P_s)"
 
 
+class ArealParameters(ParameterEnum):
+    ArithmeticalMeanHeight = "Arithmetical mean height (S_a)"
+    RootMeanSquareHeight = "Root mean square height (S_q)"
+    Skewness = "Skewness (S_sk)"
+    Kurtosis = "Kurtosis (S_ku)"
+    MaximumPeakHeight = "Maximum peak height (S_p)"
+    MaximumPitDepth = "Maximum pit depth (S_v)"
+    MaximumHeight = "Maximum height (S_z)"
+    RootMeanSquareGradient = "Root mean square gradient (S_dq)"
+    DevelopedInterfacialAreaRatio = "Developed interfacial area ratio [%] (S_dr)"
+    AutocorrelationLength = "Autocorrelation length (S_al)"
+    TextureAspectRatio = "Texture aspect ratio (S_tr)"
+    CoreHeight = "Core height (S_k)"
+    ReducedPeakHeight = "Reduced peak height (S_pk)"
+    ReducedValleyDepth = "Reduced valley depth (S_vk)"
+    PeakMaterialRatio = "Peak material ratio [%] (S_mr1)"
+    ValleyMaterialRatio = "Valley material ratio [%] (S_mr2)"
+
+
+# map areal enum values to the ISO 25178 symbols used as keys
+# in the dictionary returned by get_areal_parameters()
+AREAL_PARAMETER_SYMBOLS = {
+    ArealParameters.ArithmeticalMeanHeight.value: "Sa",
+    ArealParameters.RootMeanSquareHeight.value: "Sq",
+    ArealParameters.Skewness.value: "Ssk",
+    ArealParameters.Kurtosis.value: "Sku",
+    ArealParameters.MaximumPeakHeight.value: "Sp",
+    ArealParameters.MaximumPitDepth.value: "Sv",
+    ArealParameters.MaximumHeight.value: "Sz",
+    ArealParameters.RootMeanSquareGradient.value: "Sdq",
+    ArealParameters.DevelopedInterfacialAreaRatio.value: "Sdr",
+    ArealParameters.AutocorrelationLength.value: "Sal",
+    ArealParameters.TextureAspectRatio.value: "Str",
+    ArealParameters.CoreHeight.value: "Sk",
+    ArealParameters.ReducedPeakHeight.value: "Spk",
+    ArealParameters.ReducedValleyDepth.value: "Svk",
+    ArealParameters.PeakMaterialRatio.value: "Smr1",
+    ArealParameters.ValleyMaterialRatio.value: "Smr2",
+}
+
+
 # map enum values to functions
 # extend this dictionary for further parameter functions
 IMPLEMENTED_PARAMETERS = {
     GeneralParameters.Minimum.value: sicm_analyzer.measurements.get_minimum_value,
     GeneralParameters.Maximum.value: sicm_analyzer.measurements.get_maximum_value,
+    GeneralParameters.SurfaceArea.value: sicm_analyzer.measurements.get_surface_area,
+    GeneralParameters.Volume.value: sicm_analyzer.measurements.get_volume,
     AmplitudeParameters.ArithmeticAverageHeight.value: sicm_analyzer.measurements.get_arithmetic_average_height,
     AmplitudeParameters.RootMeanSquareRoughness.value: sicm_analyzer.measurements.get_root_mean_sq_roughness,
     AmplitudeParameters.TenPointHeight_ISO.value: sicm_analyzer.measurements.get_ten_point_height_ISO,
@@ -92,4 +138,49 @@ IMPLEMENTED_PARAMETERS = {
     #AmplitudeParameters.AutoCorrelationFunction.value: sicm_analyzer.measurements.get_auto_correlation_function,
     #AmplitudeParameters.CorrelationLength.value: sicm_analyzer.measurements.get_correlation_length,
     #AmplitudeParameters.PowerSpectralDensity.value: sicm_analyzer.measurements.get_power_spectral_density
-}
\ No newline at end of file
+    ArealParameters.ArithmeticalMeanHeight.value: sicm_analyzer.areal_parameters.get_arithmetical_mean_height,
+    ArealParameters.RootMeanSquareHeight.value: sicm_analyzer.areal_parameters.get_root_mean_square_height,
+    ArealParameters.Skewness.value: sicm_analyzer.areal_parameters.get_areal_skewness,
+    ArealParameters.Kurtosis.value: sicm_analyzer.areal_parameters.get_areal_kurtosis,
+    ArealParameters.MaximumPeakHeight.value: sicm_analyzer.areal_parameters.get_maximum_peak_height,
+    ArealParameters.MaximumPitDepth.value: sicm_analyzer.areal_parameters.get_maximum_pit_depth,
+    ArealParameters.MaximumHeight.value: sicm_analyzer.areal_parameters.get_maximum_height,
+    ArealParameters.RootMeanSquareGradient.value: sicm_analyzer.areal_parameters.get_root_mean_square_gradient,
+    ArealParameters.DevelopedInterfacialAreaRatio.value: sicm_analyzer.areal_parameters.get_developed_interfacial_area_ratio,
+    ArealParameters.AutocorrelationLength.value: sicm_analyzer.areal_parameters.get_autocorrelation_length,
+    ArealParameters.TextureAspectRatio.value: sicm_analyzer.areal_parameters.get_texture_aspect_ratio,
+    ArealParameters.CoreHeight.value: sicm_analyzer.areal_parameters.get_core_height,
+    ArealParameters.ReducedPeakHeight.value: sicm_analyzer.areal_parameters.get_reduced_peak_height,
+    ArealParameters.ReducedValleyDepth.value: sicm_analyzer.areal_parameters.get_reduced_valley_depth,
+    ArealParameters.PeakMaterialRatio.value: sicm_analyzer.areal_parameters.get_peak_material_ratio,
+    ArealParameters.ValleyMaterialRatio.value: sicm_analyzer.areal_parameters.get_valley_material_ratio,
+}
+
+
+def calculate_parameters(data, parameters: list[str], roi=None) -> dict:
+    """Returns the values of parameters of data (or an ROI of data).
+
+    All areal parameters share intermediate results and are therefore
+    calculated in one call. Parameters which can not be calculated
+    are "error", so that the other parameters are still returned.
+    """
+    areal_results = {}
+    if any(par in AREAL_PARAMETER_SYMBOLS for par in parameters):
+        try:
+            with measure("Areal parameters", MEASUREMENT, data):
+                areal_results = sicm_analyzer.areal_parameters.get_areal_parameters(data, roi)
+        except Exception as e:
+            print(e)
+
+    results = {}
+    for par in parameters:
+        try:
+            if par in AREAL_PARAMETER_SYMBOLS:
+                results[par] = areal_results[AREAL_PARAMETER_SYMBOLS[par]]
+            else:
+                with measure(par, MEASUREMENT, data):
+                    results[par] = IMPLEMENTED_PARAMETERS[par](data, roi)
+        except Exception as e:
+            print(e)
+            results[par] = "error"
+    return results
@@ -6,6 +6,7 @@ from PyQt6.QtCore import Qt
 from PyQt6.QtWidgets import QDialog, QStyle, QVBoxLayout, QApplication, QLabel, QGridLayout, QWidget, QPushButton, QCheckBox, \
                             QComboBox, QFileDialog
 from sicm_analyzer.parameters import GeneralParameters, AmplitudeParameters, SpacingParameters, HybridParameters, IMPLEMENTED_PARAMETERS
+from sicm_analyzer.parameters import ArealParameters
 
 
 class FileSelectionOption(Enum):
@@ -65,6 +66,7 @@ class ParametersDialog(QDialog):
         self.amps = ParameterHolder("Amplitude Parameters", AmplitudeParameters.list())
         self.spaces = ParameterHolder("Spacing Parameters", SpacingParameters.list())
         self.hybrids = ParameterHolder("Hybrid Parameters", HybridParameters.list())
+        self.areal = ParameterHolder("Areal Parameters (ISO 25178)", ArealParameters.list())
 
         modular.addWidget(self.button_holder, 0, 0, 2, 2)
         modular.addWidget(self.select_file_holder, 0, 2, 1, 2)
@@ -72,6 +74,7 @@ class ParametersDialog(QDialog):
         modular.addWidget(self.amps, 2, 1, alignment=Qt.AlignmentFlag.AlignTop)
         modular.addWidget(self.spaces, 2, 2, alignment=Qt.AlignmentFlag.AlignTop)
         modular.addWidget(self.hybrids, 2, 3, alignment=Qt.AlignmentFlag.AlignTop)
+        modular.addWidget(self.areal, 2, 4, alignment=Qt.AlignmentFlag.AlignTop)
         self.setLayout(modular)
 
         self.button_select_all.clicked.connect(self.select_all_parameters)
@@ -88,6 +91,7 @@ class ParametersDialog(QDialog):
         self.params.update(self.amps.get_param_dictionary())
         self.params.update(self.spaces.get_param_dictionary())
         self.params.update(self.hybrids.get_param_dictionary())
+        self.params.update(self.areal.get_param_dictionary())
 
     def write_json_file(self, filename: str):
         with open(filename, 'w') as outfile:
@@ -135,6 +139,7 @@ class ParametersDialog(QDialog):
             self.amps.apply_config(config_dict)
             self.spaces.apply_config(config_dict)
             self.hybrids.apply_config(config_dict)
+            self.areal.apply_config(config_dict)
 
     def get_all_selected_params(self) -> list[str]:
         """Returns a list containing all names of parameters which
@@ -144,6 +149,7 @@ class ParametersDialog(QDialog):
         rtn.extend(self.amps.get_selected_params())
         rtn.extend(self.spaces.get_selected_params())
         rtn.extend(self.hybrids.get_selected_params())
+        rtn.extend(self.areal.get_selected_params())
         return rtn
 
     def select_all_parameters(self):
@@ -157,6 +163,7 @@ class ParametersDialog(QDialog):
         self.amps.set_checked_all(is_checked)
         self.spaces.set_checked_all(is_checked)
         self.hybrids.set_checked_all(is_checked)
+        self.areal.set_checked_all(is_checked)
 
     def open_window(self):
         if self.isVisible():
@@ -0,0 +1,131 @@
+import os
+from typing import Callable
+
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QCheckBox, QLabel, QPushButton, QTableWidget, \
+    QTableWidgetItem, QFileDialog
+
+from sicm_analyzer.instrumentation import Recorder, RECORDER, summarize
+
+REFRESH_INTERVAL = 1000  # ms
+COLUMNS = ("Call", "Category", "Calls", "Total [ms]", "Mean [ms]", "Max [ms]", "Peak memory [MB]",
+           "Largest data [MB]", "Errors")
+
+
+def _to_megabytes(size: int | None) -> float | str:
+    return "" if size is None else size / 2 ** 20
+
+
+class PerformanceWindow(QWidget):
+    """
+    This window shows the calls recorded by the instrumentation
+    (see instrumentation.py) summarized per call.
+
+    Recording and memory tracing can be switched on and off here.
+    The records can be exported as JSON or as Chrome trace.
+    The table is refreshed every second while the window is visible.
+    """
+
+    def __init__(self, recorder: Recorder = RECORDER, parent=None):
+        super().__init__()
+        self.recorder = recorder
+        self.parent = parent
+        self.setWindowTitle("Performance")
+        self.resize(900, 500)
+
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        options = QHBoxLayout()
+        self.checkbox_record = QCheckBox("Record calls")
+        self.checkbox_record.setChecked(recorder.enabled)
+        self.checkbox_record.toggled.connect(lambda _: self.set_recording())
+        self.checkbox_memory = QCheckBox("Trace peak memory (slow)")
+        self.checkbox_memory.setChecked(recorder.measure_memory)
+        self.checkbox_memory.toggled.connect(lambda _: self.set_recording())
+        self.label_records = QLabel()
+        options.addWidget(self.checkbox_record)
+        options.addWidget(self.checkbox_memory)
+        options.addStretch()
+        options.addWidget(self.label_records)
+        layout.addLayout(options)
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.setAlternatingRowColors(True)
+        self.table.setSortingEnabled(True)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table)
+
+        buttons = QHBoxLayout()
+        self.button_clear = QPushButton("Clear")
+        self.button_clear.clicked.connect(self.clear)
+        self.button_export_json = QPushButton("Export JSON...")
+        self.button_export_json.clicked.connect(lambda: self.export(self.recorder.write_json, "JSON (*.json)"))
+        self.button_export_trace = QPushButton("Export Chrome trace...")
+        self.button_export_trace.clicked.connect(
+            lambda: self.export(self.recorder.write_chrome_trace, "Chrome trace (*.json)")
+        )
+        self.button_close = QPushButton("Close")
+        self.button_close.clicked.connect(self.close)
+        for button in (self.button_clear, self.button_export_json, self.button_export_trace, self.button_close):
+            buttons.addWidget(button)
+        layout.addLayout(buttons)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(REFRESH_INTERVAL)
+        self.timer.timeout.connect(self.refresh)
+        self.refresh()
+
+    def showEvent(self, event):
+        self.refresh()
+        self.timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def set_recording(self):
+        if self.checkbox_record.isChecked():
+            self.recorder.enable(measure_memory=self.checkbox_memory.isChecked())
+        else:
+            self.recorder.disable()
+
+    def clear(self):
+        self.recorder.clear()
+        self.refresh()
+
+    def refresh(self):
+        summary = summarize(self.recorder.get_records())
+        self.label_records.setText("%i of at most %i calls recorded" % (len(self.recorder.records),
+                                                                          self.recorder.capacity))
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(summary))
+        for row, call in enumerate(summary):
+            values = (call["name"], call["category"], call["calls"], call["total"] * 1000, call["mean"] * 1000,
+                      call["max"] * 1000, _to_megabytes(call["max_peak_memory"]),
+                      _to_megabytes(call["max_nbytes"]), call["errors"])
+            for column, value in enumerate(values):
+                item = QTableWidgetItem()
+                if isinstance(value, float):
+                    # numbers are sorted by value
+                    item.setData(Qt.ItemDataRole.DisplayRole, round(value, 2))
+                elif isinstance(value, int):
+                    item.setData(Qt.ItemDataRole.DisplayRole, value)
+                else:
+                    item.setText(str(value))
+                self.table.setItem(row, column, item)
+        self.table.setSortingEnabled(True)
+        self.table.resizeColumnsToContents()
+
+    def export(self, write: Callable[[str], None], file_filter: str):
+        file_path, _ = QFileDialog.getSaveFileName(self, "Export performance records", os.getcwd(), file_filter)
+        if not file_path:
+            return
+        if not file_path.endswith(".json"):
+            file_path += ".json"
+        try:
+            write(file_path)
+        except OSError as e:
+            print("Performance records could not be exported: %s" % e)
@@ -0,0 +1,367 @@
+"""This module provides processing pipelines which can be saved and applied later.
+
+A pipeline is a list of steps. Each step refers to a function in the
+registry MANIPULATIONS of manipulate_data by name and stores its keyword
+arguments, so that pipelines can be written to JSON or TOML files:
+
+    {
+        "version": 1,
+        "steps": [
+            {"name": "crop", "action_name": "Crop data", "arguments": {"point1": [0, 0], "point2": [50, 50]}},
+            {"name": "level_data", "action_name": "Leveling (plane)", "arguments": {}}
+        ]
+    }
+
+Pipelines are created from the undo stack of a scan in the GUI (see
+get_pipeline_from_undo_stack()) and are applied to any number of scans
+in the GUI or by the batch processor (batch.py). Results can be cached
+on disk (see pipeline_cache.py).
+"""
+import copy
+import enum
+import hashlib
+import inspect
+import json
+import math
+import os
+import tracemalloc
+from typing import NamedTuple
+
+import numpy as np
+
+from sicm_analyzer.manipulate_data import MANIPULATIONS, IN_PLACE_MANIPULATIONS
+from sicm_analyzer.pipeline_cache import PipelineCache, get_content_digest, is_cacheable
+from sicm_analyzer.sicm_data import SICMdata
+
+try:
+    import tomllib
+except ImportError:
+    # Python < 3.11
+    tomllib = None
+
+PIPELINE_VERSION = 1
+JSON = ".json"
+TOML = ".toml"
+RESET_ACTION_NAME = "Reset data"
+
+
+class PipelineError(ValueError):
+    """Raised for pipelines which can not be serialized, loaded or validated."""
+
+
+def _to_serializable(value):
+    """Converts argument values to types supported by JSON and TOML.
+    Tuples (points) become lists and enums their values."""
+    if isinstance(value, enum.Enum):
+        return _to_serializable(value.value)
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (tuple, list)):
+        return [_to_serializable(v) for v in value]
+    if isinstance(value, (str, bool, int, float)):
+        return value
+    raise PipelineError("Argument of type %s can not be stored in a pipeline." % type(value).__name__)
+
+
+def _from_serializable(value):
+    """Converts lists back to tuples, which manipulations expect for points."""
+    if isinstance(value, list):
+        return tuple(_from_serializable(v) for v in value)
+    return value
+
+
+class PipelineStep(NamedTuple):
+    """A manipulation of a pipeline.
+
+    name is a key of MANIPULATIONS, arguments are the keyword arguments
+    of the function apart from the data. action_name is shown in the undo
+    menu and stored in the Manipulations metadata of exported files.
+    """
+    name: str
+    arguments: dict
+    action_name: str
+
+    @property
+    def func(self):
+        return MANIPULATIONS[self.name]
+
+    def validate(self):
+        """Raises PipelineError if the function is unknown
+        or the arguments do not match its signature."""
+        if self.name not in MANIPULATIONS:
+            raise PipelineError("Unknown manipulation: %s" % self.name)
+        try:
+            inspect.signature(self.func).bind(None, **self.arguments)
+        except TypeError as e:
+            raise PipelineError("Invalid arguments for %s: %s" % (self.name, e))
+
+    def apply(self, data: SICMdata):
+        self.func(data, **self.arguments)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "action_name": self.action_name,
+            "arguments": {key: _to_serializable(value) for key, value in self.arguments.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, step: dict) -> "PipelineStep":
+        try:
+            name = step["name"]
+        except (KeyError, TypeError):
+            raise PipelineError("Pipeline step without name: %s" % step)
+        arguments = {key: _from_serializable(value) for key, value in step.get("arguments", {}).items()}
+        return cls(name, arguments, step.get("action_name", name))
+
+
+class Pipeline:
+    """An ordered list of PipelineSteps."""
+
+    def __init__(self, steps: list[PipelineStep] = None):
+        self.steps: list[PipelineStep] = list(steps or [])
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __eq__(self, other):
+        return isinstance(other, Pipeline) and self.to_dict() == other.to_dict()
+
+    @property
+    def action_names(self) -> list[str]:
+        return [step.action_name for step in self.steps]
+
+    def validate(self):
+        """Raises PipelineError if any step is invalid."""
+        for step in self.steps:
+            step.validate()
+
+    def apply(self, data: SICMdata):
+        """Applies all steps to data in place."""
+        for step in self.steps:
+            step.apply(data)
+        data.data_changed()
+
+    def to_dict(self) -> dict:
+        return {"version": PIPELINE_VERSION, "steps": [step.to_dict() for step in self.steps]}
+
+    @classmethod
+    def from_dict(cls, pipeline: dict) -> "Pipeline":
+        """Returns a validated pipeline."""
+        if not isinstance(pipeline, dict):
+            raise PipelineError("A pipeline must be a table with a list of steps.")
+        version = pipeline.get("version", PIPELINE_VERSION)
+        if version > PIPELINE_VERSION:
+            raise PipelineError("Pipeline version %s is not supported." % version)
+        result = cls([PipelineStep.from_dict(step) for step in pipeline.get("steps", [])])
+        result.validate()
+        return result
+
+
+def get_pipeline_from_undo_stack(items: list) -> Pipeline:
+    """Returns a pipeline of the undoable manipulations of a scan
+    (see DataManager.get_undoable_manipulation_items_list()).
+
+    Positional arguments are converted to keyword arguments. Steps before
+    the last reset are discarded, since the reset undoes them.
+    Raises PipelineError for manipulations which are not registered
+    in MANIPULATIONS or arguments which can not be serialized.
+    """
+    names = {func: name for name, func in MANIPULATIONS.items()}
+    steps = []
+    for item in items:
+        if item.name == RESET_ACTION_NAME:
+            steps.clear()
+            continue
+        if item.func is run_pipeline_fused:
+            steps.extend(item.arguments["kwargs"]["pipeline"].steps)
+            continue
+        name = names.get(item.func)
+        if name is None:
+            raise PipelineError("%s can not be stored in a pipeline." % item.name)
+        try:
+            bound = inspect.signature(item.func).bind(
+                None, *item.arguments.get("args", ()), **item.arguments.get("kwargs", {})
+            )
+        except TypeError as e:
+            raise PipelineError("Invalid arguments for %s: %s" % (item.name, e))
+        # the first argument is the data
+        arguments = dict(list(bound.arguments.items())[1:])
+        for value in arguments.values():
+            _to_serializable(value)
+        steps.append(PipelineStep(name, arguments, item.name))
+    return Pipeline(steps)
+
+
+def get_spec_digest(steps: list[PipelineStep]) -> str:
+    """Returns a digest of the names and arguments of steps.
+    Action names do not change results and are ignored."""
+    spec = [[step.name, step.to_dict()["arguments"]] for step in steps]
+    return hashlib.blake2b(json.dumps(spec, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+
+def _get_cache_keys(data: SICMdata, pipeline: Pipeline, cache: PipelineCache | None) -> list[str | None]:
+    """Returns the cache keys of the results after each step
+    or None for results which are not cached."""
+    if cache is None or not is_cacheable(data, [step.name for step in pipeline.steps]):
+        return [None] * len(pipeline)
+    content_digest = get_content_digest(data)
+    return [cache.get_key(content_digest, get_spec_digest(pipeline.steps[:i + 1]), data)
+            for i in range(len(pipeline))]
+
+
+def apply_pipeline_steps(data: SICMdata, pipeline: Pipeline, cache: PipelineCache = None) -> list[SICMdata]:
+    """Applies the steps of pipeline to a copy of data and returns the state
+    of the data after each step, which the batch mode puts on the undo stack.
+
+    States are loaded from and stored in the cache if one is given.
+    This function runs in worker processes. Data versions of the returned
+    states are only valid in this process and must be renewed by the caller.
+    Raises PipelineError with the action name of the failed step.
+    """
+    states = []
+    keys = _get_cache_keys(data, pipeline, cache)
+    for step, key in zip(pipeline.steps, keys):
+        cached = cache.load(key, data) if key else None
+        if cached is not None:
+            data = cached
+        else:
+            data = copy.deepcopy(data)
+            try:
+                step.apply(data)
+            except Exception as e:
+                raise PipelineError("%s failed: %s" % (step.action_name, e))
+            if key:
+                cache.save(key, data)
+        states.append(data)
+    return states
+
+
+class PipelineRun(NamedTuple):
+    """Result of run_pipeline_fused(). peak_memory is the peak of memory
+    allocated while the pipeline was running in bytes or None if it was
+    not measured. cached is True if the result was loaded from a cache."""
+    data: SICMdata
+    peak_memory: int | None = None
+    cached: bool = False
+
+
+def run_pipeline_fused(data: SICMdata, pipeline: Pipeline, copy_data: bool = True,
+                       measure_memory: bool = False, cache: PipelineCache = None) -> PipelineRun:
+    """Applies all steps of pipeline on a single working copy of data
+    without keeping intermediate states.
+
+    Steps with an in-place variant (see IN_PLACE_MANIPULATIONS) write into
+    the z array of the working copy instead of allocating a new array.
+    If the result is a view of a larger array (e.g. after cropping), it is
+    copied at the end, so that the larger array can be freed.
+
+    If a cache is given, the longest cached part of the pipeline is loaded
+    instead of being applied and the result is stored in the cache.
+
+    :param copy_data: if False, data is changed instead of a copy. Only use it
+                      for data which is not referenced elsewhere.
+    :param measure_memory: measures the peak memory allocated by the steps with
+                           tracemalloc, which slows down the manipulations.
+    Raises PipelineError with the action name of the failed step.
+    """
+    tracing = measure_memory and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    if measure_memory:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+    try:
+        keys = _get_cache_keys(data, pipeline, cache)
+        start = 0
+        for i in reversed(range(len(keys))):
+            cached = cache.load(keys[i], data) if keys[i] else None
+            if cached is not None:
+                # the loaded arrays are not referenced elsewhere
+                data, start, copy_data = cached, i + 1, False
+                break
+        if copy_data:
+            data = copy.deepcopy(data)
+        for step in pipeline.steps[start:]:
+            in_place_func = IN_PLACE_MANIPULATIONS.get(step.name)
+            try:
+                if in_place_func is not None and data.z.flags.writeable:
+                    in_place_func(data, **step.arguments)
+                else:
+                    step.apply(data)
+            except Exception as e:
+                raise PipelineError("%s failed: %s" % (step.action_name, e))
+        if data.z.base is not None:
+            data.z = data.z.copy()
+        if start < len(keys) and keys[-1]:
+            cache.save(keys[-1], data)
+        data.data_changed()
+        peak_memory = tracemalloc.get_traced_memory()[1] - baseline if measure_memory else None
+    finally:
+        if tracing:
+            tracemalloc.stop()
+    return PipelineRun(data, peak_memory, cached=len(keys) > 0 and start == len(keys))
+
+
+def apply_pipeline_fused(data: SICMdata, pipeline: Pipeline, cache: PipelineCache = None) -> list[SICMdata]:
+    """Like apply_pipeline_steps(), but returns only the final state,
+    which is calculated by run_pipeline_fused()."""
+    return [run_pipeline_fused(data, pipeline, cache=cache).data]
+
+
+def _toml_value(value) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float):
+        if math.isnan(value):
+            return "nan"
+        if math.isinf(value):
+            return "inf" if value > 0 else "-inf"
+        return repr(value)
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, str):
+        # JSON strings are valid TOML basic strings
+        return json.dumps(value)
+    return "[%s]" % ", ".join(_toml_value(v) for v in value)
+
+
+def pipeline_to_toml(pipeline: Pipeline) -> str:
+    """Returns the pipeline as TOML document with an array of step tables."""
+    data = pipeline.to_dict()
+    lines = ["version = %i" % data["version"]]
+    for step in data["steps"]:
+        lines += ["", "[[steps]]", "name = %s" % _toml_value(step["name"]),
+                  "action_name = %s" % _toml_value(step["action_name"])]
+        if step["arguments"]:
+            lines.append("[steps.arguments]")
+            lines += ["%s = %s" % (key, _toml_value(value)) for key, value in step["arguments"].items()]
+    return "\n".join(lines) + "\n"
+
+
+def save_pipeline(file_path: str, pipeline: Pipeline):
+    """Writes the pipeline to a TOML file if the file name ends with .toml,
+    otherwise to a JSON file."""
+    with open(file_path, "w", encoding="utf-8") as f:
+        if file_path.lower().endswith(TOML):
+            f.write(pipeline_to_toml(pipeline))
+        else:
+            json.dump(pipeline.to_dict(), f, indent=4, ensure_ascii=False)
+
+
+def load_pipeline(file_path: str) -> Pipeline:
+    """Reads and validates a pipeline from a JSON or TOML file.
+    Raises PipelineError for invalid files."""
+    is_toml = file_path.lower().endswith(TOML)
+    if is_toml and tomllib is None:
+        raise PipelineError("Reading TOML files requires Python 3.11 or newer.")
+    try:
+        if is_toml:
+            with open(file_path, "rb") as f:
+                data = tomllib.load(f)
+        else:
+            with open(file_path, encoding="utf-8") as f:
+                data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise PipelineError("Pipeline %s could not be read: %s" % (os.path.basename(file_path), e))
+    return Pipeline.from_dict(data)
@@ -0,0 +1,145 @@
+"""This module provides an on-disk cache of pipeline results.
+
+Results are stored as .npz files with the z data, the x and y axes and the
+dimensions of the processed scan. The key of a result consists of digests
+of the input data, of the pipeline steps (names and arguments) and of the
+code version, which changes with the source of the manipulations and the
+versions of numpy, scipy and scikit-image. Results of older versions are
+therefore never used, but stay in the cache until they are evicted.
+
+The cache is bounded: when it grows larger than max_size, the least
+recently used results are deleted. Several processes may use the same
+cache directory.
+"""
+import copy
+import functools
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+from sicm_analyzer import data_fitting, manipulate_data, sicm_data
+from sicm_analyzer.sicm_data import SICMdata, ScanBackstepMode, get_data_digest
+
+DEFAULT_CACHE_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "sicm_analyzer", "pipelines")
+DEFAULT_MAX_CACHE_SIZE = 2 * 2 ** 30
+CACHE_FILE_EXTENSION = ".npz"
+
+# manipulations which change more than the z data and the dimensions of
+# a scan: fit_data stores the fit results in the data
+UNCACHED_MANIPULATIONS = {"fit_data"}
+
+# metadata of the result which is stored with the arrays
+DIMENSIONS = ("x_px", "y_px", "x_size", "y_size")
+# metadata of the input which affects the result
+CONTENT_DIMENSIONS = DIMENSIONS + ("x_px_raw", "y_px_raw", "x_size_raw", "y_size_raw", "extended")
+
+
+@functools.lru_cache(maxsize=None)
+def get_code_version() -> str:
+    """Returns a digest of the source of the modules which calculate
+    pipeline results and of the versions of numerical libraries."""
+    import scipy
+    import skimage
+
+    digest = hashlib.blake2b(digest_size=8)
+    for module in (manipulate_data, data_fitting, sicm_data):
+        with open(module.__file__, "rb") as f:
+            digest.update(f.read())
+    digest.update(str((np.__version__, scipy.__version__, skimage.__version__)).encode())
+    return digest.hexdigest()
+
+
+def get_content_digest(data: ScanBackstepMode) -> str:
+    """Returns a digest of the z data, the x and y axes and the dimensions
+    of data. Crops and transpositions calculate the size of the result
+    from the raw dimensions, therefore they are part of the digest."""
+    digest = hashlib.blake2b(digest_size=16)
+    for array in (data.z, data.x_axis, data.y_axis):
+        digest.update(get_data_digest(array).encode())
+    digest.update(repr(tuple(getattr(data, name) for name in CONTENT_DIMENSIONS)).encode())
+    return digest.hexdigest()
+
+
+def is_cacheable(data: SICMdata, step_names: list[str]) -> bool:
+    return isinstance(data, ScanBackstepMode) and not UNCACHED_MANIPULATIONS.intersection(step_names)
+
+
+class PipelineCache:
+    """Stores pipeline results as .npz files in a directory.
+
+    Files are written to a temporary file first and then renamed, so
+    results can be stored by several processes.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIRECTORY, max_size: int = DEFAULT_MAX_CACHE_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+
+    def get_key(self, content_digest: str, spec_digest: str, data: SICMdata) -> str:
+        """Returns the key of the result of the pipeline with spec_digest
+        applied to data with content_digest (see get_content_digest())."""
+        dtype = np.dtype(data.storage_dtype).str if data.storage_dtype is not None else "any"
+        return f"{content_digest}_{spec_digest}_{get_code_version()}_{dtype.strip('<>=|')}"
+
+    def get_path(self, key: str) -> str:
+        return os.path.join(self.directory, key + CACHE_FILE_EXTENSION)
+
+    def load(self, key: str, data: ScanBackstepMode) -> ScanBackstepMode | None:
+        """Returns a copy of data with the cached result or None if there is none.
+        data is the input of the pipeline and provides the other metadata."""
+        path = self.get_path(key)
+        try:
+            with np.load(path, allow_pickle=False) as f:
+                z, x_axis, y_axis = f["z"], f["x_axis"], f["y_axis"]
+                dimensions = json.loads(str(f["dimensions"]))
+            # the modification time marks recently used results
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            return None
+        result = copy.copy(data)
+        result.z = z
+        result.x_axis, result.y_axis = x_axis, y_axis
+        result.metadata = result.metadata.replace(**dimensions)
+        return result
+
+    def save(self, key: str, data: ScanBackstepMode):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            temporary_path = self.get_path(key) + ".%i.%i.tmp" % (os.getpid(), threading.get_ident())
+            with open(temporary_path, "wb") as f:
+                np.savez(f, z=data.z, x_axis=data.x_axis, y_axis=data.y_axis,
+                         dimensions=np.array(json.dumps({name: getattr(data, name) for name in DIMENSIONS})))
+            os.replace(temporary_path, self.get_path(key))
+        except (OSError, TypeError) as e:
+            print("Pipeline result could not be cached: %s" % e)
+            return
+        self.prune()
+
+    def prune(self):
+        """Deletes the least recently used results until the size
+        of the cache is at most max_size."""
+        files = []
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.name.endswith(CACHE_FILE_EXTENSION):
+                        try:
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        files.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            return
+        size = sum(file[1] for file in files)
+        for _, file_size, path in sorted(files):
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # removed by another process
+                pass
+            size -= file_size
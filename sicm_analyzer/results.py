@@ -1,7 +1,7 @@
 import csv
 import os
 
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal
 from PyQt6.QtWidgets import QWidget, QPushButton, QVBoxLayout, QPlainTextEdit, QTableWidget, QTableWidgetItem, \
     QApplication, QMenu, QFileDialog
 from sicm_analyzer.sicm_data import SICMdata
@@ -9,12 +9,60 @@ from sicm_analyzer.measurements import get_roughness
 import numpy as np
 
 
+def get_results_text(data: SICMdata) -> str:
+    """Returns the results shown in SingleResultsWindow as text."""
+    roughness = get_roughness(data)
+    text = ""
+    text = text + f"Roughness: {roughness} µm\n"
+    text = text + f"Minimum value: {np.min(data.z)} µm\n"
+    text = text + f"Maximum value: {np.max(data.z)} µm\n"
+    text = text + "\n\n"
+    text = text + "Fit Results:\n"
+    text = text + str(data.fit_results)
+
+    return text
+
+
+class ResultsWorkerSignals(QObject):
+    """Signals of ResultsWorker. QRunnable is not a QObject and can not emit signals."""
+    finished = pyqtSignal(int, str)
+
+
+class ResultsWorker(QRunnable):
+    """Calculates results of a SICMdata object in a thread of the global thread pool.
+
+    finished is emitted with the data version and the results text.
+
+    Data manipulations are performed on a copy of the data (see DataManager),
+    therefore the data object is not changed during the calculation.
+    """
+
+    def __init__(self, data: SICMdata):
+        super().__init__()
+        self.data = data
+        self.version = data.version
+        self.signals = ResultsWorkerSignals()
+        # the worker is owned by SingleResultsWindow.workers
+        self.setAutoDelete(False)
+
+    def run(self):
+        try:
+            text = get_results_text(self.data)
+        except Exception as e:
+            text = "Results could not be calculated: %s" % e
+        self.signals.finished.emit(self.version, text)
+
+
 class SingleResultsWindow(QWidget):
     """
     This window will show the results of one sicm data object.
 
     At the moment, it will only display roughness and some information
     about the polynomial fit used to calculate the roughness.
+
+    Results are calculated in a background thread and only if the
+    version of the data has changed. Results of outdated versions
+    are discarded.
     """
 
     def __init__(self, data: SICMdata, parent=None, size=(500, 600)):
@@ -33,27 +81,38 @@ class SingleResultsWindow(QWidget):
         self.text.setReadOnly(True)
         layout.addWidget(self.text)
 
-        self.text.insertPlainText(self.get_results(data))
+        # version of the data whose results are shown or being calculated
+        self.version: int | None = None
+        # keep references to running workers
+        self.workers: set[ResultsWorker] = set()
+        self.update_results(data)
 
         self.button_close = QPushButton("Close")
         self.button_close.clicked.connect(self.close)
         layout.addWidget(self.button_close)
 
     def get_results(self, data: SICMdata):
-        roughness = get_roughness(data)
-        text = ""
-        text = text + f"Roughness: {roughness} µm\n"
-        text = text + f"Minimum value: {np.min(data.z)} µm\n"
-        text = text + f"Maximum value: {np.max(data.z)} µm\n"
-        text = text + "\n\n"
-        text = text + "Fit Results:\n"
-        text = text + str(data.fit_results)
-
-        return text
+        return get_results_text(data)
 
     def update_results(self, data: SICMdata):
+        """Starts the calculation of results if the data has changed
+        since the last call."""
+        if data.version == self.version:
+            return
+        self.version = data.version
         self.text.clear()
-        self.text.insertPlainText(self.get_results(data))
+        self.text.insertPlainText("Calculating results...")
+
+        worker = ResultsWorker(data)
+        worker.signals.finished.connect(lambda version, text: self._show_results(worker, version, text))
+        self.workers.add(worker)
+        QThreadPool.globalInstance().start(worker)
+
+    def _show_results(self, worker: ResultsWorker, version: int, text: str):
+        self.workers.discard(worker)
+        if version == self.version:
+            self.text.clear()
+            self.text.insertPlainText(text)
 
 
 class TableResultsWindow(QWidget):
@@ -0,0 +1,65 @@
+"""This module provides regions of interest (ROI) for measurements.
+
+An ROI is either
+    - a rectangle given by two corner points. Points can be tuples (x, y)
+      or QPoint objects. Both corner pixels belong to the rectangle, which
+      is the area drawn when selecting an ROI with the mouse.
+    - a boolean mask with the same shape as the z array. True marks
+      pixels which belong to the ROI.
+
+Measurements do not crop the data to an ROI. A rectangle is applied as a
+slice, which returns a view of the z array. A mask is applied to a view of
+its bounding box as a numpy masked array. In both cases, the z data of the
+scan is not copied.
+"""
+import numpy as np
+
+
+def _get_xy(point) -> tuple[int, int]:
+    # QPoint provides x() and y() methods, tuples are indexed
+    if callable(getattr(point, "x", None)):
+        return int(point.x()), int(point.y())
+    return int(point[0]), int(point[1])
+
+
+def is_mask(roi) -> bool:
+    """Returns True if the ROI is a boolean mask."""
+    return isinstance(roi, np.ndarray) and roi.dtype == bool
+
+
+def get_rectangle_slices(point1, point2) -> tuple[slice, slice]:
+    """Returns row and column slices of the rectangle spanned by two points.
+
+    Note: the shape in 2D arrays is defined as Y * X.
+    """
+    x1, y1 = _get_xy(point1)
+    x2, y2 = _get_xy(point2)
+    # negative start indices would count from the end of the array
+    return slice(max(min(y1, y2), 0), max(y1, y2) + 1), slice(max(min(x1, x2), 0), max(x1, x2) + 1)
+
+
+def get_roi_z(z: np.ndarray, roi=None) -> np.ndarray | np.ma.MaskedArray:
+    """Returns the z values of an ROI without copying them.
+
+    :param z: 2-dimensional z array of a scan
+    :param roi: None, a rectangle (two points) or a boolean mask.
+        If roi is None, z is returned unchanged.
+    :return: a view of z for rectangles or a masked array of the bounding
+        box view for masks. Pixels outside the mask are masked.
+    """
+    if roi is None:
+        return z
+
+    if is_mask(roi):
+        if roi.shape != z.shape:
+            raise ValueError("ROI mask of shape %s does not match z data of shape %s." % (roi.shape, z.shape))
+        rows = np.flatnonzero(np.any(roi, axis=1))
+        columns = np.flatnonzero(np.any(roi, axis=0))
+        if rows.size == 0:
+            raise ValueError("ROI mask is empty.")
+        box = (slice(rows[0], rows[-1] + 1), slice(columns[0], columns[-1] + 1))
+        return np.ma.MaskedArray(z[box], mask=~roi[box], copy=False)
+
+    point1, point2 = roi
+    return z[get_rectangle_slices(point1, point2)]
+
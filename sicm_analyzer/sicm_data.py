@@ -24,17 +24,20 @@ only approach curves and backstep scans are supported. A factory class which tak
 the file path as an argument enables import of .sicm files and returns an object
 of either ApproachCurve or ScanBackstepMode.
 """
-import copy
 import datetime
+import hashlib
+import itertools
 import os
 import tarfile
 import tempfile
 import time
 import traceback
+import types
 from tarfile import TarFile
 import json
 import numpy as np
 import struct
+from sicm_analyzer.instrumentation import instrumented, IO
 
 APPROACH = "approach"
 BACKSTEP = "backstepScan"
@@ -69,6 +72,8 @@ Y_size = "y-Size"
 Y_size_raw = "y-Size-raw"
 Z_STEP_SIZE = "z_step_size_micrometer"
 Manipulations = "manipulations"
+# serialized steps of the manipulations (see pipeline.py)
+PIPELINE = "pipeline"
 
 Settings = [
     BACKSTEP_SIZE, BOOST, THRESHOLD, DELAY, FALL_RATE, FILTER,
@@ -77,6 +82,169 @@ Settings = [
     Z_STEP_SIZE
 ]
 
+# z data is stored with this type unless SICMdata.storage_dtype is changed.
+# float32 resolves heights of several µm to better than a nm. None keeps
+# the type of assigned arrays.
+DEFAULT_STORAGE_DTYPE = np.float32
+
+# Data versions are drawn from a single counter, so that a version identifies
+# z data across all SICMdata objects. Copies share the version of the original
+# until the data of one of them is changed.
+_data_versions = itertools.count(1)
+
+
+def get_data_digest(z: np.ndarray) -> str:
+    """Returns a digest of the shape, type and values of z. Unlike data
+    versions, digests are valid across processes and sessions."""
+    z = np.ascontiguousarray(z)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str((z.shape, z.dtype.str)).encode())
+    digest.update(z.data)
+    return digest.hexdigest()
+
+
+def _get_hashable(value):
+    """Returns a hashable equivalent of value for ScanMetadata.__hash__.
+    Mappings become tuples of items sorted by key, so that equal mappings
+    with a different insertion order get the same hash."""
+    if isinstance(value, (dict, types.MappingProxyType)):
+        return tuple(sorted(((key, _get_hashable(item)) for key, item in value.items()), key=lambda item: item[0]))
+    if isinstance(value, (list, tuple)):
+        return tuple(_get_hashable(item) for item in value)
+    if isinstance(value, set):
+        return frozenset(_get_hashable(item) for item in value)
+    return value
+
+
+def _freeze_mapping(mapping) -> types.MappingProxyType:
+    """Returns a read-only copy of mapping. Lists are converted to tuples."""
+    return types.MappingProxyType(
+        {key: tuple(value) if isinstance(value, list) else value for key, value in dict(mapping).items()}
+    )
+
+
+class ScanMetadata:
+    """Immutable record of the metadata of a scan.
+
+    Metadata does not change when z data is manipulated, apart from
+    dimensions after crops or transpositions. Undo states therefore share
+    the record of the original data by reference. Changing a field creates
+    a new record (see replace()), which leaves all other states unchanged.
+
+    Records are hashable and compare equal if all fields are equal, so that
+    scans can be indexed by their metadata. settings and info are read-only
+    mappings.
+    """
+
+    __slots__ = (
+        "scan_mode", "extended",
+        "x_px", "y_px", "x_px_raw", "y_px_raw",
+        "x_size", "y_size", "z_size", "x_size_raw", "y_size_raw",
+        "threshold", "backstep", "x_offset", "y_offset", "filter",
+        "fall_rate", "delay_after_retraction", "boost",
+        "settings", "info", "previous_manipulations",
+        "_hash"
+    )
+
+    def __init__(self,
+                 scan_mode: str = "",
+                 extended: bool = False,
+                 x_px: int = 0,
+                 y_px: int = 0,
+                 x_px_raw: int = 0,
+                 y_px_raw: int = 0,
+                 x_size: int or float = 0,
+                 y_size: int or float = 0,
+                 z_size: int or float = 0,
+                 x_size_raw: int or float = 0,
+                 y_size_raw: int or float = 0,
+                 threshold: int or float = 0,
+                 backstep: int or float = 0,
+                 x_offset: int or float = 0,
+                 y_offset: int or float = 0,
+                 filter: float = 0.0,
+                 fall_rate: int or float = 0,
+                 delay_after_retraction: float = 0.0,
+                 boost: int = 0,
+                 settings: dict = None,
+                 info: dict = None,
+                 previous_manipulations: tuple[str, ...] = ()
+                 ):
+        fields = locals()
+        # all fields apart from the mappings, previous_manipulations and the cached hash
+        for name in self.__slots__[:-4]:
+            object.__setattr__(self, name, fields[name])
+        object.__setattr__(self, "settings", _freeze_mapping(settings or {}))
+        object.__setattr__(self, "info", _freeze_mapping(info or {}))
+        object.__setattr__(self, "previous_manipulations", tuple(previous_manipulations))
+        object.__setattr__(self, "_hash", None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ScanMetadata is immutable, use replace() to change %s" % name)
+
+    def __delattr__(self, name):
+        raise AttributeError("ScanMetadata is immutable")
+
+    def as_dict(self) -> dict:
+        """Returns all fields as a dict."""
+        return {name: getattr(self, name) for name in self.__slots__[:-1]}
+
+    def replace(self, **changes) -> "ScanMetadata":
+        """Returns a new record with the given fields changed."""
+        fields = self.as_dict()
+        fields.update(changes)
+        return ScanMetadata(**fields)
+
+    def _key(self) -> tuple:
+        return _get_hashable(tuple(self.as_dict().values()))
+
+    def __eq__(self, other):
+        if not isinstance(other, ScanMetadata):
+            return NotImplemented
+        return self is other or self.as_dict() == other.as_dict()
+
+    def __hash__(self):
+        if self._hash is None:
+            try:
+                value = hash(self._key())
+            except TypeError:
+                # settings values which are neither hashable nor containers, e.g. arrays
+                value = hash(json.dumps(_get_hashable(self.as_dict()), default=repr))
+            object.__setattr__(self, "_hash", value)
+        return self._hash
+
+    def __repr__(self):
+        return "ScanMetadata(%s)" % ", ".join("%s=%r" % item for item in self.as_dict().items())
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        fields = self.as_dict()
+        fields["settings"] = dict(self.settings)
+        fields["info"] = dict(self.info)
+        return _restore_metadata, (fields,)
+
+
+def _restore_metadata(fields: dict) -> ScanMetadata:
+    return ScanMetadata(**fields)
+
+
+def _metadata_property(name: str) -> property:
+    """Returns a property of SICMdata which reads the field name of the
+    metadata record and replaces the record when it is set."""
+
+    def get_field(self):
+        return getattr(self.metadata, name)
+
+    def set_field(self, value):
+        self.metadata = self.metadata.replace(**{name: value})
+
+    return property(get_field, set_field, doc="%s of the metadata record" % name)
+
 
 class SICMdata:
     """
@@ -90,44 +258,82 @@ class SICMdata:
 
     set_data() and get_data() should be overridden in the subclass to set the correct data fields.
     Data fields in all three dimensions are represented as numpy arrays.
+
+    Each assignment to z changes the data version (see version). If z is
+    modified in place, data_changed() must be called.
+
+    Assigned z data is converted to storage_dtype. Set the class attribute
+    (or the attribute of a single object) to np.float64 or None to keep
+    double precision. Reductions like means and sums accumulate in float64
+    regardless of the storage type.
     """
 
+    storage_dtype: type | None = DEFAULT_STORAGE_DTYPE
+
+    # metadata fields
+    scan_mode = _metadata_property("scan_mode")
+    extended = _metadata_property("extended")
+    x_px = _metadata_property("x_px")
+    y_px = _metadata_property("y_px")
+    x_px_raw = _metadata_property("x_px_raw")
+    y_px_raw = _metadata_property("y_px_raw")
+    x_size = _metadata_property("x_size")
+    y_size = _metadata_property("y_size")
+    z_size = _metadata_property("z_size")
+    x_size_raw = _metadata_property("x_size_raw")
+    y_size_raw = _metadata_property("y_size_raw")
+    threshold = _metadata_property("threshold")
+    backstep = _metadata_property("backstep")
+    x_offset = _metadata_property("x_offset")
+    y_offset = _metadata_property("y_offset")
+    filter = _metadata_property("filter")
+    _filter = _metadata_property("filter")
+    fall_rate = _metadata_property("fall_rate")
+    delay_after_retraction = _metadata_property("delay_after_retraction")
+    boost = _metadata_property("boost")
+    settings = _metadata_property("settings")
+    info = _metadata_property("info")
+    previous_manipulations = _metadata_property("previous_manipulations")
+
     def __init__(self, extended: bool = False):
+        self._version: int = next(_data_versions)
+        # metadata fields are stored in an immutable record
+        # which is shared by copies (see ScanMetadata)
+        self.metadata: ScanMetadata = ScanMetadata(extended=extended)
         # data containing fields
         self.x: np.ndarray = np.zeros((1, 1))
         self.y: np.ndarray = np.zeros((1, 1))
         self.z: np.ndarray = np.zeros((1, 1))
-        # metadata fields
-        self.x_size: int or float = 0
-        self.y_size: int or float = 0
-        self.z_size: int or float = 0
-        self.x_px: int = 0
-        self.y_px: int = 0
-
-        self.x_px_raw: int = 0
-        self.y_px_raw: int = 0
-        self.x_size_raw: int = 0
-        self.y_size_raw: int = 0
-        self.threshold: int or float = 0
-        self.backstep: int or float = 0
-        self.x_offset: int or float = 0
-        self.y_offset: int or float = 0
-        self.filter: float = 0.0
-        self.fall_rate: int or float = 0
-        self.delay_after_retraction: float = 0.0
-        self.boost: int = 0
-        self._filter: float = 0.0
-        self.scan_mode: str = ""
-
-        self.info: dict = {}
-        self.settings: dict = {}
-        self.previous_manipulations: list[str] = []
 
         # result fields
         self.fit_results = None
         self.roughness = None
 
-        self.extended = extended
+    @property
+    def z(self) -> np.ndarray:
+        return self._z
+
+    @z.setter
+    def z(self, z: np.ndarray):
+        self._z = self.as_storage_dtype(z)
+        self.data_changed()
+
+    def as_storage_dtype(self, array) -> np.ndarray:
+        """Returns array converted to storage_dtype. Arrays of the
+        storage type (and masked arrays) are not copied."""
+        if self.storage_dtype is None:
+            return np.asanyarray(array)
+        return np.asanyarray(array).astype(self.storage_dtype, copy=False)
+
+    @property
+    def version(self) -> int:
+        """Version of the z data. Results calculated from z data
+        are valid as long as the version does not change."""
+        return self._version
+
+    def data_changed(self):
+        """Assigns a new data version."""
+        self._version = next(_data_versions)
 
     def set_settings(self, settings: dict):
         """Sets metadata obtained from settings.json
@@ -149,49 +355,55 @@ class SICMdata:
                                y_size: float = 0.0,
                                z_step_size: float = 0.0
                                ):
-        self.settings[BACKSTEP_SIZE] = backstep_size
-        self.settings[BOOST] = boost
-        self.settings[DELAY] = delay_after_retraction
-        self.settings[FALL_RATE] = fall_rate
-        self.settings[FILTER] = _filter
-        self.settings[THRESHOLD] = threshold
-        self.settings[X_OFFSET] = x_offset
-        self.settings[Xpx] = x_px
-        self.settings[Xpx_raw] = x_px
-        self.settings[X_size] = x_size
-        self.settings[X_size_raw] = x_size
-        self.settings[Y_OFFSET] = y_offset
-        self.settings[Ypx] = y_px
-        self.settings[Ypx_raw] = y_px
-        self.settings[Y_size] = y_size
-        self.settings[Y_size_raw] = y_size
-        self.settings[Z_STEP_SIZE] = z_step_size
-
-        self.x_px = x_px
-        self.x_px_raw = x_px
-        self.y_px = y_px
-        self.y_px_raw = y_px
-        self.backstep = backstep_size
-        self.boost = boost
-        self.delay_after_retraction = delay_after_retraction
-        self.fall_rate = fall_rate
-        self._filter = _filter
-        self.threshold = threshold
-        self.x_offset = x_offset
-        self.x_size = x_size
-        self.x_size_raw = x_size
-        self.y_offset = y_offset
-        self.y_size = y_size
-        self.y_size_raw = y_size
-        self.z_size = z_step_size
+        settings = dict(self.settings)
+        settings[BACKSTEP_SIZE] = backstep_size
+        settings[BOOST] = boost
+        settings[DELAY] = delay_after_retraction
+        settings[FALL_RATE] = fall_rate
+        settings[FILTER] = _filter
+        settings[THRESHOLD] = threshold
+        settings[X_OFFSET] = x_offset
+        settings[Xpx] = x_px
+        settings[Xpx_raw] = x_px
+        settings[X_size] = x_size
+        settings[X_size_raw] = x_size
+        settings[Y_OFFSET] = y_offset
+        settings[Ypx] = y_px
+        settings[Ypx_raw] = y_px
+        settings[Y_size] = y_size
+        settings[Y_size_raw] = y_size
+        settings[Z_STEP_SIZE] = z_step_size
+
+        self.metadata = self.metadata.replace(
+            settings=settings,
+            x_px=x_px,
+            x_px_raw=x_px,
+            y_px=y_px,
+            y_px_raw=y_px,
+            backstep=backstep_size,
+            boost=boost,
+            delay_after_retraction=delay_after_retraction,
+            fall_rate=fall_rate,
+            filter=_filter,
+            threshold=threshold,
+            x_offset=x_offset,
+            x_size=x_size,
+            x_size_raw=x_size,
+            y_offset=y_offset,
+            y_size=y_size,
+            y_size_raw=y_size,
+            z_size=z_step_size
+        )
 
     def add_date_and_time_info(self, scan_date: str, scan_start: float, scan_end: float):
-        self.info[SCAN_DATE] = scan_date
+        info = dict(self.info)
+        info[SCAN_DATE] = scan_date
         _start = int(round(scan_start * 1000))
         _end = int(round(scan_end * 1000))
-        self.info[START_TIME] = _start
-        self.info[END_TIME] = _end
-        self.info[DURATION] = _end - _start
+        info[START_TIME] = _start
+        info[END_TIME] = _end
+        info[DURATION] = _end - _start
+        self.info = info
 
     def get_data(self):
         """Returns a tuple containing x and z data for ApproachCurves and
@@ -245,11 +457,38 @@ class ApproachCurve(SICMdata):
 
 
 class ScanBackstepMode(SICMdata):
-    """A class for 3-dimensional SICM scans."""
+    """A class for 3-dimensional SICM scans.
+
+    Pixel coordinates are stored as 1-dimensional axes x_axis and y_axis.
+    x and y are read-only meshgrid views of these axes with the shape
+    (y_px, x_px), which do not need memory of their own.
+    """
 
     def __init__(self):
+        self.x_axis: np.ndarray = np.zeros(1)
+        self.y_axis: np.ndarray = np.zeros(1)
         super(ScanBackstepMode, self).__init__()
 
+    @property
+    def x(self) -> np.ndarray:
+        return np.broadcast_to(self.x_axis, (self.y_axis.size, self.x_axis.size))
+
+    @x.setter
+    def x(self, x: np.ndarray):
+        """Sets the x axis. x is either an axis or a meshgrid."""
+        x = np.asarray(x)
+        self.x_axis = x[0, :] if x.ndim == 2 else x
+
+    @property
+    def y(self) -> np.ndarray:
+        return np.broadcast_to(self.y_axis[:, np.newaxis], (self.y_axis.size, self.x_axis.size))
+
+    @y.setter
+    def y(self, y: np.ndarray):
+        """Sets the y axis. y is either an axis or a meshgrid."""
+        y = np.asarray(y)
+        self.y_axis = y[:, 0] if y.ndim == 2 else y
+
     def set_settings(self, settings: dict):
         super().set_settings(settings)
         self.x_px = int(settings[Xpx])
@@ -274,21 +513,23 @@ class ScanBackstepMode(SICMdata):
         self.previous_manipulations = settings.get(Manipulations, [])
 
     def __set_extended_settings(self):
-        self.backstep = self.settings.get(BACKSTEP_SIZE, 0.0)
-        self.boost = self.settings.get(BOOST, 0)
-        self.delay_after_retraction = self.settings.get(DELAY, 0.0)
-        self.fall_rate = self.settings.get(FALL_RATE, 0)
-        self._filter = self.settings.get(FILTER, 0.0)
-        self.threshold = self.settings.get(THRESHOLD, 0.0)
-        self.x_px_raw = self.x_px
-        self.x_size = self.settings.get(X_size, 0.0)
-        self.x_size_raw = self.settings.get(X_size_raw, 0.0)
-        self.x_offset = self.settings.get(X_OFFSET, 0.0)
-        self.y_px_raw = self.y_px
-        self.y_size = self.settings.get(Y_size, 0.0)
-        self.y_size_raw = self.settings.get(Y_size_raw, 0.0)
-        self.y_offset = self.settings.get(Y_OFFSET, 0.0)
-        self.z_size = self.settings.get(Z_STEP_SIZE, 0.0)
+        self.metadata = self.metadata.replace(
+            backstep=self.settings.get(BACKSTEP_SIZE, 0.0),
+            boost=self.settings.get(BOOST, 0),
+            delay_after_retraction=self.settings.get(DELAY, 0.0),
+            fall_rate=self.settings.get(FALL_RATE, 0),
+            filter=self.settings.get(FILTER, 0.0),
+            threshold=self.settings.get(THRESHOLD, 0.0),
+            x_px_raw=self.x_px,
+            x_size=self.settings.get(X_size, 0.0),
+            x_size_raw=self.settings.get(X_size_raw, 0.0),
+            x_offset=self.settings.get(X_OFFSET, 0.0),
+            y_px_raw=self.y_px,
+            y_size=self.settings.get(Y_size, 0.0),
+            y_size_raw=self.settings.get(Y_size_raw, 0.0),
+            y_offset=self.settings.get(Y_OFFSET, 0.0),
+            z_size=self.settings.get(Z_STEP_SIZE, 0.0)
+        )
 
     def get_valid_int_from_field(self, value: str, default_value: int = 0) -> int:
         """This function returns an integer converted from a string value.
@@ -301,14 +542,17 @@ class ScanBackstepMode(SICMdata):
 
     def set_data(self, data: list[int]):
         """Rearranges scan data for 3-dimensional plotting."""
+        z = np.reshape(self.as_storage_dtype(data), (self.y_px, self.x_px))
         if self.extended:
-            self.z = np.reshape(data, (self.y_px, self.x_px))
+            self.z = z
         else:
-            self.z = np.reshape(data, (self.y_px, self.x_px)) / 1000  # to have z data in µm instead of nm
+            self.z = z / 1000  # to have z data in µm instead of nm
         self.reshape_xy_meshgrids()
 
     def reshape_xy_meshgrids(self):
-        self.x, self.y = np.meshgrid(range(self.x_px), range(self.y_px))
+        """Sets the x and y axes to the pixel indices."""
+        self.x_axis = np.arange(self.x_px)
+        self.y_axis = np.arange(self.y_px)
 
     def get_data(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
         """Return x, y, and z data."""
@@ -365,6 +609,7 @@ class ScanBackstepMode(SICMdata):
             return 1
 
 
+@instrumented(IO)
 def get_sicm_data(file_path: str) -> SICMdata:
     """Read all data from the tar.gz-like .sicm-file format and stores it in
     an instance of SICMdata.
@@ -442,14 +687,21 @@ def get_data_as_bytes(data: SICMdata) -> list[bytes]:
 
     If negative values exist all z_data will be adjusted by the
     largest negative number.
+
+    Approach curves are raw values and are packed without conversion.
     """
     if data.extended:
         z_data = data.z.flatten("C")
         byte_data = __pack_bytes(z_data, "f")
+    elif isinstance(data, ApproachCurve):
+        z_data = np.rint(data.z.astype(np.float64)).astype(int)
+        byte_data = __pack_bytes(z_data, "<H")
     else:
-        z_data = data.z.flatten("C") * 1000
+        # converted in float64 and rounded, since heights in µm stored
+        # as float32 are not exactly a multiple of 1 nm
+        z_data = data.z.flatten("C").astype(np.float64) * 1000
         z_data = z_data - np.min(z_data)
-        z_data = z_data.astype(int)
+        z_data = np.rint(z_data).astype(int)
         byte_data = __pack_bytes(z_data, "<H")
         # byte_data = []
         # for pixel in z_data:
@@ -464,10 +716,16 @@ def __pack_bytes(data, byte_format: str = "<H") -> list[bytes]:
     return byte_data
 
 
-def export_sicm_file(file_path: str, sicm_data: SICMdata, manipulations: list[str]):
+@instrumented(IO)
+def export_sicm_file(file_path: str, sicm_data: SICMdata, manipulations: list[str],
+                     pipeline_steps: list[dict] | None = None):
     """
     Export an instance of SICMdata as a .sicm file.
 
+    The names of manipulations are appended to the Manipulations metadata.
+    If pipeline_steps (see Pipeline.to_dict()) are given, they are appended
+    to the pipeline metadata, so that the manipulations can be repeated.
+
     This file will be readable by the MATLAB SICMapp written
     by Patrick Happel and by pySICM_analyzer.
 
@@ -491,7 +749,7 @@ def export_sicm_file(file_path: str, sicm_data: SICMdata, manipulations: list[st
         file_names.append(file_name)
         file_name = _write_mode_file(path_temp_dir, sicm_data)
         file_names.append(file_name)
-        file_name = _write_settings_file(path_temp_dir, sicm_data, manipulations)
+        file_name = _write_settings_file(path_temp_dir, sicm_data, manipulations, pipeline_steps)
         file_names.append(file_name)
 
         create_targz_from_list_of_files(file_path, file_names)
@@ -538,7 +796,7 @@ def _write_data_info_file(path: str, sicm_data: SICMdata) -> str:
     :return: full path to the file as a string.
     """
     with open(os.path.join(path, "data.info"), "w") as f:
-        json.dump(sicm_data.info, f, indent=4, sort_keys=True)
+        json.dump(dict(sicm_data.info), f, indent=4, sort_keys=True)
         f.close()
     return f.name
 
@@ -557,17 +815,19 @@ def _write_mode_file(path: str, sicm_data: SICMdata) -> str:
     return f.name
 
 
-def _write_settings_file(path: str, sicm_data: SICMdata, manipulations: list[str]) -> str:
+def _write_settings_file(path: str, sicm_data: SICMdata, manipulations: list[str],
+                         pipeline_steps: list[dict] | None = None) -> str:
     """
     Creates a file in the given directory path containing the scan settings
     and metadata of the SICMdata instance.
 
     :param str path: path to a directory
     :param list[str] manipulations: a list of strings describing manipulations of the data
+    :param pipeline_steps: serialized pipeline steps of the manipulations or None
     :return: full path to the file as a string.
     """
-    settings_copy = copy.deepcopy(sicm_data.settings)
-    _add_matedata_fields(settings_copy, sicm_data, manipulations)
+    settings_copy = dict(sicm_data.settings)
+    _add_matedata_fields(settings_copy, sicm_data, manipulations, pipeline_steps)
 
     sjson = json.dumps(settings_copy, separators=(',', ':'), indent=4, sort_keys=True)
     with open(os.path.join(path, "settings.json"), "w") as f:
@@ -576,10 +836,14 @@ def _write_settings_file(path: str, sicm_data: SICMdata, manipulations: list[str
     return f.name
 
 
-def _add_matedata_fields(settings_copy: dict, sicm_data: SICMdata, manipulations: list[str]):
+def _add_matedata_fields(settings_copy: dict, sicm_data: SICMdata, manipulations: list[str],
+                         pipeline_steps: list[dict] | None = None):
     """
     Adds metadata fields to a copy of the settings dictionary. If the field exists
     it is updated.
+
+    Without pipeline_steps the pipeline field is removed, since it would
+    not describe all manipulations.
     """
     if not sicm_data.extended:
         settings_copy[Xpx] = str(sicm_data.x_px)
@@ -590,7 +854,11 @@ def _add_matedata_fields(settings_copy: dict, sicm_data: SICMdata, manipulations
         settings_copy[Y_size] = str(sicm_data.y_size)
         settings_copy[X_size_raw] = str(sicm_data.x_size_raw)
         settings_copy[Y_size_raw] = str(sicm_data.y_size_raw)
-    settings_copy[Manipulations] = sicm_data.previous_manipulations + manipulations
+    settings_copy[Manipulations] = list(sicm_data.previous_manipulations) + manipulations
+    if pipeline_steps is None:
+        settings_copy.pop(PIPELINE, None)
+    else:
+        settings_copy[PIPELINE] = list(sicm_data.settings.get(PIPELINE, ())) + pipeline_steps
 
 
 def create_targz_from_list_of_files(export_filename: str, files: list[str]):
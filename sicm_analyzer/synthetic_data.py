@@ -0,0 +1,259 @@
+"""Synthetic .sicm files for load tests and benchmarks.
+
+Scans are generated from a model of a cell culture: a tilted and curved
+substrate with cells (flat domes with a nucleus), gaussian noise and
+outliers, i.e. single pixels at which the pipette stopped too early or
+too late. Approach curves are ion currents which drop when the pipette
+approaches the surface.
+
+Files are written with export_sicm_file() in the legacy format (heights as
+unsigned 16-bit integers in nm, approach curves as raw 16-bit values) or
+in the extended format (32-bit floats). Data generated with the same seed
+is identical. Run from the repository root:
+
+    python -m sicm_analyzer.synthetic_data output_dir --count 10 --size 1024 --extended
+    python -m sicm_analyzer.synthetic_data output_dir --mode approach --points 20000
+"""
+import argparse
+import datetime
+import os
+import sys
+
+import numpy as np
+
+from sicm_analyzer.sicm_data import ScanBackstepMode, ApproachCurve, export_sicm_file
+from sicm_analyzer.sicm_data import APPROACH, BACKSTEP, FLOATING_BACKSTEP
+from sicm_analyzer.sicm_data import SCAN_DATE, START_TIME, END_TIME, DURATION
+from sicm_analyzer.sicm_data import BACKSTEP_SIZE, BOOST, THRESHOLD, DELAY, FALL_RATE, FILTER
+from sicm_analyzer.sicm_data import X_OFFSET, Xpx, X_size, X_size_raw, Y_OFFSET, Ypx, Y_size, Y_size_raw, Z_STEP_SIZE
+
+SCAN_MODES = (BACKSTEP, FLOATING_BACKSTEP, APPROACH)
+# largest height difference (µm) which can be stored in legacy files
+LEGACY_MAX_HEIGHT = 65.535
+LEGACY_MAX_VALUE = 2 ** 16 - 1
+# scans are dated to this time, so that files are reproducible
+SCAN_START = datetime.datetime(2024, 1, 15, 9, 30)
+# time per pixel or point in ms
+PIXEL_TIME = 20
+
+DEFAULT_SIZE = 256
+DEFAULT_SCAN_SIZE = 50.0
+DEFAULT_POINTS = 4000
+
+
+def get_surface(x_px: int, y_px: int, x_size: float, y_size: float,
+                tilt: tuple[float, float] = (0.02, -0.01), curvature: float = 0.0005,
+                cells: int = 3, cell_height: float = 3.0, cell_radius: float | None = None,
+                substrate_height: float = 1.0, noise: float = 0.02, outliers: float = 0.001,
+                outlier_height: float = 2.0, rng: np.random.Generator | None = None) -> np.ndarray:
+    """Returns heights in µm of a y_px x x_px scan of x_size x y_size µm.
+
+    :param tilt: slopes of the substrate in x and y direction (µm per µm)
+    :param curvature: curvature of the substrate (1/µm), positive values form a bowl
+    :param cells: number of cells, which are placed randomly
+    :param cell_height: mean height of cells in µm
+    :param cell_radius: mean radius of cells in µm, by default a sixth of the scan size
+    :param noise: standard deviation of gaussian noise in µm
+    :param outliers: fraction of pixels which are outliers
+    :param outlier_height: height of outliers above or below the surface in µm
+    """
+    rng = rng or np.random.default_rng()
+    x = np.linspace(0.0, x_size, x_px, endpoint=False)
+    y = np.linspace(0.0, y_size, y_px, endpoint=False)[:, np.newaxis]
+    z = substrate_height + tilt[0] * x + tilt[1] * y
+    z = z + curvature * ((x - x_size / 2) ** 2 + (y - y_size / 2) ** 2)
+
+    cell_radius = cell_radius or min(x_size, y_size) / 6
+    cell_z = np.zeros((y_px, x_px))
+    for _ in range(cells):
+        center_x, center_y = rng.uniform(0.0, x_size), rng.uniform(0.0, y_size)
+        radius = cell_radius * rng.uniform(0.7, 1.3)
+        # cells are elongated ellipses with a random orientation
+        elongation = rng.uniform(1.0, 1.8)
+        angle = rng.uniform(0.0, np.pi)
+        height = cell_height * rng.uniform(0.7, 1.3)
+
+        # only the bounding box of the cell is calculated
+        extent = radius * elongation
+        columns = slice(*np.searchsorted(x, [center_x - extent, center_x + extent]))
+        rows = slice(*np.searchsorted(y[:, 0], [center_y - extent, center_y + extent]))
+        dx, dy = x[columns] - center_x, y[rows] - center_y
+        u = (dx * np.cos(angle) + dy * np.sin(angle)) / (radius * elongation)
+        v = (dy * np.cos(angle) - dx * np.sin(angle)) / radius
+        r2 = u ** 2 + v ** 2
+        dome = np.clip(1.0 - r2, 0.0, None) ** 1.5 + 0.4 * np.exp(-r2 / 0.08)
+        dome[r2 > 1.0] = 0.0
+        cell_z[rows, columns] = np.maximum(cell_z[rows, columns], height * dome / 1.4)
+    z = z + cell_z
+
+    z = z + rng.normal(scale=noise, size=z.shape) if noise > 0 else z
+    if outliers > 0:
+        mask = rng.random(z.shape) < outliers
+        z[mask] += rng.choice([-outlier_height, outlier_height], size=np.count_nonzero(mask))
+    return z
+
+
+def get_approach_current(points: int = DEFAULT_POINTS, baseline: float = 35500.0, drop: float = 0.03,
+                         decay: float = 0.05, noise: float = 250.0,
+                         rng: np.random.Generator | None = None) -> np.ndarray:
+    """Returns the ion current of an approach curve in raw values.
+
+    The current is constant far away from the surface and drops by the
+    fraction drop at the end of the approach. decay is the fraction of
+    the approach in which the current drops.
+    """
+    rng = rng or np.random.default_rng()
+    distance = np.linspace(1.0, 0.0, points)
+    current = baseline * (1.0 - drop * np.exp(-distance / decay))
+    if noise > 0:
+        current = current + rng.normal(scale=noise, size=points)
+    return current
+
+
+def _get_info(pixels: int) -> dict:
+    start = SCAN_START.timestamp() * 1000
+    duration = pixels * PIXEL_TIME
+    return {
+        # pySICM writes the date with microseconds, see SICMdata.get_scan_date
+        SCAN_DATE: SCAN_START.strftime("%Y-%m-%d %H:%M:%S.%f"),
+        START_TIME: int(start),
+        END_TIME: int(start + duration),
+        DURATION: duration,
+    }
+
+
+def create_scan(x_px: int = DEFAULT_SIZE, y_px: int | None = None,
+                x_size: float = DEFAULT_SCAN_SIZE, y_size: float | None = None,
+                scan_mode: str = BACKSTEP, extended: bool = False, seed: int | None = None,
+                **surface_parameters) -> ScanBackstepMode:
+    """Returns a synthetic scan. See get_surface() for surface_parameters.
+
+    Heights of legacy scans are rounded to nm and start at 0 like heights
+    read from legacy files. Legacy sizes are integers.
+    Raises ValueError if the heights can not be stored in a legacy file.
+    """
+    if scan_mode not in (BACKSTEP, FLOATING_BACKSTEP):
+        raise ValueError("unknown scan mode: %s" % scan_mode)
+    y_px = y_px or x_px
+    y_size = y_size or x_size * y_px / x_px
+    if not extended:
+        x_size, y_size = round(x_size), round(y_size)
+    z = get_surface(x_px, y_px, x_size, y_size, rng=np.random.default_rng(seed), **surface_parameters)
+
+    if extended:
+        settings = {
+            Xpx: x_px, Ypx: y_px, X_size: x_size, Y_size: y_size, X_size_raw: x_size, Y_size_raw: y_size,
+            X_OFFSET: 0.0, Y_OFFSET: 0.0, BACKSTEP_SIZE: 5.0, BOOST: 1, THRESHOLD: 0.99, DELAY: 10.0,
+            FALL_RATE: 50, FILTER: 1.3, Z_STEP_SIZE: 0.001,
+        }
+    else:
+        z = z - np.min(z)
+        if np.max(z) > LEGACY_MAX_HEIGHT:
+            raise ValueError("heights span %.1f µm, legacy files store at most %.3f µm"
+                             % (np.max(z), LEGACY_MAX_HEIGHT))
+        z = np.rint(z * 1000) / 1000
+        settings = {
+            Xpx: str(x_px), Ypx: str(y_px), X_size: str(x_size), Y_size: str(y_size),
+            X_OFFSET: "0", Y_OFFSET: "0", BACKSTEP_SIZE: "5", BOOST: "1", THRESHOLD: "99",
+            FALL_RATE: "50", FILTER: "1.3", "Sensitivity": "1", "LateralSpeed": "100",
+        }
+
+    scan = ScanBackstepMode()
+    scan.extended = extended
+    scan.scan_mode = scan_mode
+    scan.set_settings(settings)
+    scan.info = _get_info(x_px * y_px)
+    scan.z = z
+    scan.reshape_xy_meshgrids()
+    return scan
+
+
+def create_approach_curve(points: int = DEFAULT_POINTS, extended: bool = False, seed: int | None = None,
+                          **current_parameters) -> ApproachCurve:
+    """Returns a synthetic approach curve. See get_approach_current() for current_parameters.
+    Currents of legacy approach curves are rounded to 16-bit integers."""
+    current = get_approach_current(points, rng=np.random.default_rng(seed), **current_parameters)
+    if not extended:
+        current = np.clip(np.rint(current), 0, LEGACY_MAX_VALUE)
+    settings = {FALL_RATE: "50", "Sensitivity": "1", FILTER: "1.3", THRESHOLD: "99", "Retract": "1", BOOST: "1"}
+
+    curve = ApproachCurve()
+    curve.extended = extended
+    curve.scan_mode = APPROACH
+    curve.set_settings(settings)
+    curve.info = _get_info(points)
+    curve.set_data(current)
+    return curve
+
+
+def generate_files(directory: str, count: int = 1, scan_mode: str = BACKSTEP, extended: bool = False,
+                   seed: int = 0, **parameters) -> list[str]:
+    """Writes count synthetic files to directory and returns their paths.
+    File i is generated with the seed seed + i. parameters are passed to
+    create_scan() or create_approach_curve()."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(count):
+        if scan_mode == APPROACH:
+            data = create_approach_curve(extended=extended, seed=seed + i, **parameters)
+        else:
+            data = create_scan(scan_mode=scan_mode, extended=extended, seed=seed + i, **parameters)
+        path = os.path.join(directory, "synthetic_%s_%s_%04i.sicm"
+                            % (scan_mode, "extended" if extended else "legacy", seed + i))
+        export_sicm_file(path, data, [])
+        paths.append(path)
+    return paths
+
+
+def get_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m sicm_analyzer.synthetic_data",
+                                     description="Writes synthetic scans or approach curves as .sicm files.")
+    parser.add_argument("directory", help="output directory")
+    parser.add_argument("-n", "--count", type=int, default=1, help="number of files (default: %(default)s)")
+    parser.add_argument("--mode", choices=SCAN_MODES, default=BACKSTEP, help="scan mode (default: %(default)s)")
+    parser.add_argument("--extended", action="store_true", help="write the extended (float) format")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first file (default: %(default)s)")
+
+    scan = parser.add_argument_group("scans")
+    scan.add_argument("--size", type=int, nargs="+", metavar="PX", default=[DEFAULT_SIZE],
+                      help="pixels in x and optionally y (default: %(default)s)")
+    scan.add_argument("--scan-size", type=float, default=DEFAULT_SCAN_SIZE, metavar="µm",
+                      help="size in x in µm (default: %(default)s)")
+    scan.add_argument("--tilt", type=float, nargs=2, metavar=("X", "Y"), help="slopes of the substrate")
+    scan.add_argument("--curvature", type=float, help="curvature of the substrate in 1/µm")
+    scan.add_argument("--cells", type=int, help="number of cells")
+    scan.add_argument("--cell-height", type=float, help="mean height of cells in µm")
+    scan.add_argument("--cell-radius", type=float, help="mean radius of cells in µm")
+    scan.add_argument("--noise", type=float, help="standard deviation of the noise in µm (raw values for approach curves)")
+    scan.add_argument("--outliers", type=float, help="fraction of outlier pixels")
+
+    approach = parser.add_argument_group("approach curves")
+    approach.add_argument("--points", type=int, default=DEFAULT_POINTS, help="number of points (default: %(default)s)")
+    approach.add_argument("--drop", type=float, help="fraction by which the current drops")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = get_argument_parser()
+    args = parser.parse_args(argv)
+
+    if args.mode == APPROACH:
+        parameters = {"points": args.points, "noise": args.noise, "drop": args.drop}
+    else:
+        parameters = {
+            "x_px": args.size[0], "y_px": args.size[-1], "x_size": args.scan_size, "tilt": args.tilt,
+            "curvature": args.curvature, "cells": args.cells, "cell_height": args.cell_height,
+            "cell_radius": args.cell_radius, "noise": args.noise, "outliers": args.outliers,
+        }
+    # options which are not given keep their defaults
+    parameters = {key: value for key, value in parameters.items() if value is not None}
+    try:
+        paths = generate_files(args.directory, args.count, args.mode, args.extended, args.seed, **parameters)
+    except ValueError as e:
+        parser.error(str(e))
+    print("Wrote %i file(s) to %s." % (len(paths), args.directory))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
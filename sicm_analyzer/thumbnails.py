@@ -0,0 +1,192 @@
+"""This module provides thumbnails of scans for the list of imported files.
+
+Thumbnails are small raster images of the z data. They are generated from
+decimated data (see level_of_detail.py), so the time per thumbnail hardly
+depends on the size of the scan.
+
+Thumbnails are cached on disk. The key of a thumbnail consists of digests of
+the z data and of the colors of the color map, and the thumbnail size.
+The digest takes the place of the data version, which is only valid as
+long as the program runs. Digests are therefore stored per data version
+and only calculated once for each version. Only the digests of recent
+versions are kept.
+
+The cache is bounded like the pipeline cache (see pipeline_cache.py): when
+it grows larger than max_size, the least recently used thumbnails are deleted.
+"""
+import hashlib
+import math
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from matplotlib.colors import Colormap, Normalize
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+
+from sicm_analyzer.level_of_detail import decimate, MEAN
+from sicm_analyzer.sicm_data import SICMdata, get_data_digest
+
+# maximum width and height of thumbnails in pixels
+THUMBNAIL_SIZE = 48
+DEFAULT_CACHE_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "sicm_analyzer", "thumbnails")
+# a thumbnail takes about 9 KiB
+DEFAULT_MAX_CACHE_SIZE = 64 * 2 ** 20
+CACHE_FILE_EXTENSION = ".npy"
+# the cache is pruned after this many thumbnails have been saved,
+# since listing the directory takes longer than saving a thumbnail
+PRUNE_INTERVAL = 32
+# number of data versions whose digests are kept
+MAX_DIGESTS = 256
+
+
+def get_thumbnail(z: np.ndarray, color_map: Colormap, size: int = THUMBNAIL_SIZE) -> np.ndarray:
+    """Returns a thumbnail of z as RGBA array of uint8 with at most
+    size x size pixels. Blocks of pixels are averaged, NaN values are ignored.
+
+    Like in raster images, the first row of z is at the bottom of the thumbnail.
+    """
+    factor = math.ceil(max(z.shape) / size)
+    small = decimate(np.asarray(z, dtype=float), factor, MEAN)
+    finite = small[np.isfinite(small)]
+    if finite.size > 0:
+        norm = Normalize(vmin=np.min(finite), vmax=np.max(finite))
+    else:
+        norm = Normalize(vmin=0.0, vmax=1.0)
+    rgba = color_map(norm(small), bytes=True)
+    return np.ascontiguousarray(rgba[::-1])
+
+
+def get_color_map_digest(color_map: Colormap) -> str:
+    """Returns a digest of the colors of color_map. Custom color maps
+    may have the same name but different colors."""
+    colors = color_map(np.append(np.linspace(0.0, 1.0, color_map.N), np.nan), bytes=True)
+    return hashlib.blake2b(colors.tobytes(), digest_size=8).hexdigest()
+
+
+class ThumbnailCache:
+    """Stores thumbnails as .npy files in a directory.
+
+    Files are written to a temporary file first and then renamed, so
+    thumbnails can be generated in several threads.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIRECTORY, size: int = THUMBNAIL_SIZE,
+                 max_size: int = DEFAULT_MAX_CACHE_SIZE):
+        self.directory = directory
+        self.size = size
+        self.max_size = max_size
+        # digests of the z data by data version, least recently used first
+        self.digests: OrderedDict[int, str] = OrderedDict()
+        self.saved_count = 0
+        self.lock = threading.Lock()
+
+    def get_key(self, data: SICMdata, color_map: Colormap) -> str:
+        with self.lock:
+            digest = self.digests.get(data.version)
+            if digest is not None:
+                self.digests.move_to_end(data.version)
+        if digest is None:
+            digest = get_data_digest(data.z)
+            with self.lock:
+                self.digests[data.version] = digest
+                if len(self.digests) > MAX_DIGESTS:
+                    self.digests.popitem(last=False)
+        return f"{digest}_{get_color_map_digest(color_map)}_{self.size}"
+
+    def get_path(self, key: str) -> str:
+        return os.path.join(self.directory, key + CACHE_FILE_EXTENSION)
+
+    def load(self, key: str) -> np.ndarray | None:
+        path = self.get_path(key)
+        try:
+            thumbnail = np.load(path)
+            # the modification time marks recently used thumbnails
+            os.utime(path)
+            return thumbnail
+        except (OSError, ValueError):
+            return None
+
+    def save(self, key: str, thumbnail: np.ndarray):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            temporary_path = self.get_path(key) + ".%i.%i.tmp" % (os.getpid(), threading.get_ident())
+            with open(temporary_path, "wb") as f:
+                np.save(f, thumbnail)
+            os.replace(temporary_path, self.get_path(key))
+        except OSError as e:
+            print("Thumbnail could not be cached: %s" % e)
+            return
+        with self.lock:
+            self.saved_count += 1
+            prune = self.saved_count % PRUNE_INTERVAL == 0
+        if prune:
+            self.prune()
+
+    def prune(self):
+        """Deletes the least recently used thumbnails until the size
+        of the cache is at most max_size."""
+        files = []
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.name.endswith(CACHE_FILE_EXTENSION):
+                        try:
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        files.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            return
+        size = sum(file[1] for file in files)
+        for _, file_size, path in sorted(files):
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # removed by another thread or process
+                pass
+            size -= file_size
+
+    def get_thumbnail(self, data: SICMdata, color_map: Colormap) -> np.ndarray:
+        """Returns the cached thumbnail or generates and caches it."""
+        key = self.get_key(data, color_map)
+        thumbnail = self.load(key)
+        if thumbnail is None:
+            thumbnail = get_thumbnail(data.z, color_map, self.size)
+            self.save(key, thumbnail)
+        return thumbnail
+
+
+class ThumbnailWorkerSignals(QObject):
+    """Signals of ThumbnailWorker. QRunnable is not a QObject and can not emit signals."""
+    finished = pyqtSignal(str, object)
+
+
+class ThumbnailWorker(QRunnable):
+    """Loads or generates the thumbnail of a SICMdata object in a thread of
+    the global thread pool.
+
+    finished is emitted with the key of the data (file path) and the thumbnail,
+    or None if the thumbnail could not be generated.
+
+    The worker is owned and deleted by the thread pool, since thumbnails
+    may still be generated when the list has already been cleared.
+    """
+
+    def __init__(self, key: str, data: SICMdata, color_map: Colormap, cache: ThumbnailCache):
+        super().__init__()
+        self.key = key
+        self.data = data
+        self.color_map = color_map
+        self.cache = cache
+        self.signals = ThumbnailWorkerSignals()
+
+    def run(self):
+        try:
+            thumbnail = self.cache.get_thumbnail(self.data, self.color_map)
+        except Exception as e:
+            print("Thumbnail could not be generated: %s" % e)
+            thumbnail = None
+        self.signals.finished.emit(self.key, thumbnail)
@@ -18,10 +18,12 @@ class View:
         self.color_bar_shown: bool = True
         self.aspect_ratio: tuple[int, int, int] = (4, 4, 3)  # Default value by matplotlib
         self.color_map = DEFAULT_COLOR_MAP
-        self.rois = (QPoint(), QPoint())
+        # rectangles spanned by two points, see roi.py
+        self.rois: list[tuple[QPoint, QPoint]] = []
         self.azim: float = -60.0
         self.elev: float = 30.0
-        # rasterized is used as a workaround to get rid of edges in pcolormesh
+        # rasterized is used to hide the pixel grid of raster images
+        # (originally a workaround to get rid of edges in pcolormesh)
         self.rasterized: bool = False  # False means show edges
         self.x_limits: tuple[float, float] | None = None
         self.y_limits: tuple[float, float] | None = None
@@ -1,2 +1,18 @@
 import sys
 sys.path.append("")
+
+import numpy as np
+
+from sicm_analyzer.sicm_data import ScanBackstepMode
+
+
+def get_scan(z: np.ndarray, x_size: float = 0, y_size: float = 0) -> ScanBackstepMode:
+    """Returns a scan of z with consistent dimensions. x_size and y_size are
+    the raw sizes in µm, which default to one µm per pixel."""
+    scan = ScanBackstepMode()
+    scan.z = z
+    scan.y_px_raw, scan.x_px_raw = scan.z.shape
+    scan.x_size_raw = x_size or scan.x_px_raw
+    scan.y_size_raw = y_size or scan.y_px_raw
+    scan.update_dimensions()
+    return scan
@@ -0,0 +1,62 @@
+from unittest import TestCase
+import numpy as np
+from sicm_analyzer.areal_parameters import get_areal_parameters, AREAL_PARAMETERS
+from sicm_analyzer.areal_parameters import get_root_mean_square_height, get_developed_interfacial_area_ratio
+from sicm_analyzer.parameters import ArealParameters, AREAL_PARAMETER_SYMBOLS, IMPLEMENTED_PARAMETERS
+from tests import get_scan
+
+
+class ArealParameterTests(TestCase):
+
+    def test_all_parameters_are_returned(self):
+        results = get_areal_parameters(get_scan(np.random.default_rng(1).normal(size=(32, 32))))
+        self.assertEqual(set(results.keys()), set(AREAL_PARAMETERS.keys()))
+
+    def test_all_enums_are_registered(self):
+        for name in ArealParameters.list():
+            self.assertIn(name, IMPLEMENTED_PARAMETERS)
+            self.assertIn(AREAL_PARAMETER_SYMBOLS[name], AREAL_PARAMETERS)
+
+    def test_height_parameters_of_sine_wave(self):
+        x = np.linspace(0, 8 * np.pi, 400, endpoint=False)
+        z = np.tile(2.0 * np.sin(x), (20, 1))
+        results = get_areal_parameters(get_scan(z))
+        self.assertAlmostEqual(results["Sq"], 2.0 / np.sqrt(2), places=6)
+        self.assertAlmostEqual(results["Sa"], 4.0 / np.pi, places=3)
+        self.assertAlmostEqual(results["Ssk"], 0.0, places=6)
+        self.assertAlmostEqual(results["Sku"], 1.5, places=6)
+        self.assertAlmostEqual(results["Sz"], 4.0, places=3)
+
+    def test_height_parameters_ignore_offset_and_nan(self):
+        z = np.random.default_rng(2).normal(size=(16, 16))
+        z_with_nan = z + 10.0
+        z_with_nan[3, 4] = np.nan
+        scan = get_scan(z_with_nan)
+        stored = np.asarray(scan.z, dtype=np.float64) - 10.0
+        self.assertAlmostEqual(
+            get_root_mean_square_height(scan),
+            np.std(np.delete(stored.flatten(), 3 * 16 + 4)),
+            places=6
+        )
+
+    def test_developed_interfacial_area_ratio_of_tilted_plane(self):
+        x, y = np.meshgrid(range(10), range(10))
+        scan = get_scan(0.75 * x, x_size=20, y_size=20)
+        # slope of 0.75 µm per 2 µm
+        expected = (np.sqrt(1 + 0.375 ** 2) - 1) * 100
+        self.assertAlmostEqual(get_developed_interfacial_area_ratio(scan), expected)
+
+    def test_functional_parameters_of_uniform_distribution(self):
+        z = np.linspace(-1, 1, 10000).reshape((100, 100))
+        results = get_areal_parameters(get_scan(z))
+        self.assertAlmostEqual(results["Sk"], 2.0, places=2)
+        self.assertAlmostEqual(results["Spk"], 0.0, places=2)
+        self.assertAlmostEqual(results["Svk"], 0.0, places=2)
+        self.assertLess(results["Smr1"], 1.0)
+        self.assertGreater(results["Smr2"], 99.0)
+
+    def test_texture_aspect_ratio(self):
+        noise = np.random.default_rng(3).normal(size=(64, 64))
+        stripes = np.tile(np.sin(np.linspace(0, 8 * np.pi, 64)), (64, 1))
+        self.assertGreater(get_areal_parameters(get_scan(noise))["Str"], 0.5)
+        self.assertLess(get_areal_parameters(get_scan(stripes))["Str"], 0.3)
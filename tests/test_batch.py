@@ -0,0 +1,173 @@
+import csv
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest import TestCase, mock
+
+from sicm_analyzer import areal_parameters
+from sicm_analyzer.batch import parse_step, get_parameter_name, find_files, process_files, main
+from sicm_analyzer.manipulate_data import crop, flip_z_data, filter_median_spatial, MirrorAxis
+from sicm_analyzer.parameters import IMPLEMENTED_PARAMETERS
+from sicm_analyzer.pipeline import Pipeline, save_pipeline
+from sicm_analyzer.pipeline_cache import PipelineCache
+from sicm_analyzer.sicm_data import ScanBackstepMode, get_sicm_data
+
+SAMPLES = "./tests/sample_sicm_files"
+SCAN = os.path.join(SAMPLES, "Zelle1 PFA.sicm")
+APPROACH_CURVE = os.path.join(SAMPLES, "AC1PFA.sicm")
+
+
+class StepTests(TestCase):
+
+    def test_crop(self):
+        step = parse_step("crop=0,1,10,12")
+        self.assertIs(step.func, crop)
+        self.assertEqual(step.arguments, {"point1": (0, 1), "point2": (10, 12)})
+        self.assertEqual(step.action_name, "Crop data")
+
+    def test_filter_with_default_radius(self):
+        step = parse_step("filter=median_spatial")
+        self.assertIs(step.func, filter_median_spatial)
+        self.assertEqual(step.arguments, {"px_radius": 1})
+        self.assertEqual(step.action_name, "Median (spatial) (px-size: 1)")
+
+    def test_flip(self):
+        step = parse_step("flip=y")
+        self.assertIs(step.func, flip_z_data)
+        self.assertEqual(step.arguments, {"mirror_axis": MirrorAxis.Y_AXIS})
+
+    def test_invalid_steps(self):
+        for text in ("rotate", "crop=1,2", "filter=gauss", "threshold", "level=1", "flip=z"):
+            with self.subTest(step=text):
+                with self.assertRaises(ValueError):
+                    parse_step(text)
+
+    def test_parameter_names(self):
+        self.assertEqual(get_parameter_name("Sq"), "Root mean square height (S_q)")
+        self.assertEqual(get_parameter_name("max"), "max [µm]")
+        self.assertEqual(get_parameter_name("R_a"), "2.1 Arithmetic average height (R_a)")
+        with self.assertRaises(ValueError):
+            get_parameter_name("height")
+
+
+class BatchTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.output_dir = os.path.join(self.directory.name, "processed")
+        self.csv_path = os.path.join(self.directory.name, "results.csv")
+        self.cache_dir = os.path.join(self.directory.name, "cache")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_batch(self, argv: list[str]) -> int:
+        return main(argv + ["--cache-dir", self.cache_dir])
+
+    def test_find_files_in_directory(self):
+        files = find_files([SAMPLES])
+        self.assertIn(os.path.join(SAMPLES, "Zelle1 PFA.sicm"), files)
+        self.assertEqual(len(files), len(set(files)))
+
+    def test_processed_scan_is_exported(self):
+        exit_code = self.run_batch([SCAN, "-s", "crop=0,0,10,8", "-s", "level", "-s", "transpose",
+                          "-o", self.output_dir, "-j", "1"])
+        self.assertEqual(exit_code, 0)
+        exported = get_sicm_data(os.path.join(self.output_dir, "Zelle1 PFA.sicm"))
+        self.assertEqual(exported.z.shape, (10, 8))
+        self.assertEqual(exported.previous_manipulations[-3:], ("Crop data", "Leveling (plane)", "Transpose z"))
+
+    def test_pipeline_file(self):
+        pipeline_path = os.path.join(self.directory.name, "pipeline.toml")
+        save_pipeline(pipeline_path, Pipeline([parse_step("crop=0,0,8,6")]))
+        self.run_batch([SCAN, "--pipeline", pipeline_path, "-s", "flip=x", "-o", self.output_dir, "-j", "1"])
+        exported = get_sicm_data(os.path.join(self.output_dir, "Zelle1 PFA.sicm"))
+        self.assertEqual(exported.z.shape, (6, 8))
+        self.assertEqual([step["name"] for step in exported.settings["pipeline"]], ["crop", "flip_z_data"])
+
+    def test_parameters_are_written_to_csv(self):
+        exit_code = self.run_batch([SCAN, APPROACH_CURVE, "--csv", self.csv_path, "-p", "min", "Sq", "-j", "1"])
+        # approach curves are reported as failed
+        self.assertEqual(exit_code, 1)
+        with open(self.csv_path, newline="") as file:
+            rows = list(csv.reader(file))
+        self.assertEqual(rows[0], ["scan", "scan date", "min [µm]", "Root mean square height (S_q)"])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][0], SCAN)
+
+    def test_files_with_the_same_name_are_exported_to_subdirectories(self):
+        for day in ("day1", "day2"):
+            os.makedirs(os.path.join(self.directory.name, "scans", day))
+            shutil.copy(SCAN, os.path.join(self.directory.name, "scans", day))
+        inputs = [os.path.join(self.directory.name, "scans", day) for day in ("day1", "day2")]
+        self.assertEqual(self.run_batch(inputs + ["-s", "crop=0,0,8,6", "-o", self.output_dir, "-j", "1"]), 0)
+        for day in ("day1", "day2"):
+            exported = get_sicm_data(os.path.join(self.output_dir, day, "Zelle1 PFA.sicm"))
+            self.assertEqual(exported.z.shape, (6, 8))
+
+    def test_failing_parameter_is_written_as_error(self):
+        def fail(data, roi=None):
+            raise ValueError("no profile")
+
+        with mock.patch.dict(IMPLEMENTED_PARAMETERS, {"min [µm]": fail}):
+            result, = process_files([SCAN], Pipeline(), parameters=["min [µm]", "max [µm]"], jobs=1)
+        self.assertIsNone(result.error)
+        self.assertEqual(result.parameters["min [µm]"], "error")
+        self.assertAlmostEqual(float(result.parameters["max [µm]"]), 46.24, places=3)
+
+    def test_unreadable_scan_date_does_not_fail_the_file(self):
+        with mock.patch.object(ScanBackstepMode, "get_scan_date", side_effect=ValueError("substring not found")):
+            result, = process_files([SCAN], Pipeline(), self.output_dir, parameters=["max [µm]"], jobs=1)
+        self.assertIsNone(result.error)
+        self.assertEqual(result.scan_date, "n/a")
+        self.assertIn("max [µm]", result.parameters)
+
+    def test_areal_parameters_are_calculated_once(self):
+        parameters = [get_parameter_name(symbol) for symbol in ("Sa", "Sq", "Sdr")]
+        with mock.patch.object(areal_parameters, "ArealSurface", wraps=areal_parameters.ArealSurface) as surface:
+            result, = process_files([SCAN], Pipeline(), parameters=parameters, jobs=1)
+        self.assertEqual(surface.call_count, 1)
+        self.assertNotIn("error", result.parameters.values())
+
+    def test_array_parameter_is_written_to_one_cell(self):
+        parameter = get_parameter_name("R_ti")
+        self.run_batch([SCAN, "--csv", self.csv_path, "-p", parameter, "-j", "1"])
+        with open(self.csv_path, newline="") as file:
+            rows = list(csv.reader(file))
+        values = rows[1][2].split(";")
+        self.assertEqual(len(values), get_sicm_data(SCAN).z.shape[0])
+        self.assertGreaterEqual(float(values[0]), 0)
+
+    def test_peak_memory_is_written_to_csv(self):
+        self.run_batch([SCAN, "-s", "level", "--csv", self.csv_path, "-p", "Sq", "--memory", "-j", "1"])
+        with open(self.csv_path, newline="") as file:
+            rows = list(csv.reader(file))
+        self.assertEqual(rows[0][-1], "peak memory [MiB]")
+        self.assertGreater(float(rows[1][-1]), 0)
+
+    def test_results_are_cached(self):
+        argv = [SCAN, "-s", "crop=0,0,8,6", "-s", "level", "-o", self.output_dir, "-j", "1"]
+        self.run_batch(argv)
+        first = get_sicm_data(os.path.join(self.output_dir, "Zelle1 PFA.sicm"))
+        results = process_files([SCAN], Pipeline([parse_step("crop=0,0,8,6"), parse_step("level")]),
+                                cache=PipelineCache(self.cache_dir))
+        self.assertTrue(results[0].cached)
+        self.assertEqual(self.run_batch(argv + ["--no-cache"]), 0)
+        second = get_sicm_data(os.path.join(self.output_dir, "Zelle1 PFA.sicm"))
+        self.assertEqual(first.z.tolist(), second.z.tolist())
+
+    def test_parallel_results_are_in_input_order(self):
+        files = find_files([os.path.join(SAMPLES, "Zelle*.sicm")])[:3]
+        pipeline = Pipeline([parse_step("filter=average_spatial,1")])
+        serial = process_files(files, pipeline, parameters=["max [µm]"], jobs=1)
+        parallel = process_files(files, pipeline, parameters=["max [µm]"], jobs=2)
+        self.assertEqual([result.path for result in parallel], files)
+        self.assertEqual([r.parameters for r in parallel], [r.parameters for r in serial])
+
+    def test_no_gui_modules_are_imported(self):
+        code = ("import sys, sicm_analyzer.batch; "
+                "print([m for m in sys.modules if m.startswith(('PyQt6', 'matplotlib.backends', 'matplotlib.pyplot'))])")
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.strip(), "[]")
@@ -0,0 +1,129 @@
+import os
+import sys
+import tempfile
+import time
+from unittest import TestCase
+
+import numpy as np
+from PyQt6.QtWidgets import QApplication
+
+from sicm_analyzer.batch_mode import BatchJob, create_batch_executor
+from sicm_analyzer.data_manager import DataManager, UndoRedoData
+from sicm_analyzer.pipeline import Pipeline, PipelineStep, PipelineError, apply_pipeline_steps
+from sicm_analyzer.pipeline_cache import PipelineCache
+from sicm_analyzer.sicm_data import get_sicm_data
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+SCAN = "./tests/sample_sicm_files/Zelle1 PFA.sicm"
+APPROACH_CURVE = "./tests/sample_sicm_files/AC1PFA.sicm"
+PIPELINE = Pipeline([
+    PipelineStep("crop", {"point1": (0, 0), "point2": (8, 6)}, "Crop data"),
+    PipelineStep("transpose_z_data", {}, "Transpose z"),
+])
+
+
+def wait_for(job: BatchJob, timeout: float = 60):
+    start = time.monotonic()
+    while not job.is_finished and time.monotonic() - start < timeout:
+        app.processEvents()
+        time.sleep(0.01)
+    app.processEvents()
+
+
+class ApplyPipelineStepsTests(TestCase):
+
+    def test_states_after_each_step(self):
+        data = get_sicm_data(SCAN)
+        states = apply_pipeline_steps(data, PIPELINE)
+        self.assertEqual([state.z.shape for state in states], [(6, 8), (8, 6)])
+        # the input is not changed
+        self.assertEqual(data.z.shape, (10, 10))
+
+    def test_failed_step(self):
+        with self.assertRaises(PipelineError) as context:
+            apply_pipeline_steps(get_sicm_data(APPROACH_CURVE), PIPELINE)
+        self.assertIn("Crop data failed", str(context.exception))
+
+    def test_results_are_undoable(self):
+        manager = DataManager()
+        data = get_sicm_data(SCAN)
+        manager.add_data_object("scan", ([UndoRedoData(data, name="raw_data")], []))
+        manager.add_pipeline_results("scan", PIPELINE, apply_pipeline_steps(data, PIPELINE))
+        self.assertEqual(manager.get_undoable_manipulation_names_list("scan"), ["Crop data", "Transpose z"])
+        self.assertEqual(manager.get_data("scan").z.shape, (8, 6))
+        manager.undo_manipulation("scan")
+        self.assertEqual(manager.get_data("scan").z.shape, (6, 8))
+
+
+class BatchJobTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.executor = create_batch_executor(max_workers=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.executor.shutdown()
+
+    def test_results_and_failures(self):
+        data = {"scan": get_sicm_data(SCAN), "curve": get_sicm_data(APPROACH_CURVE)}
+        job = BatchJob(self.executor, data, PIPELINE)
+        results, progress = {}, []
+        job.scan_finished.connect(lambda key, states: results.update({key: states}))
+        job.progress.connect(progress.append)
+        job.start()
+        wait_for(job)
+
+        self.assertTrue(job.is_finished)
+        self.assertEqual(list(results), ["scan"])
+        self.assertEqual(list(job.failures), ["curve"])
+        self.assertEqual(progress, [1, 2])
+        expected = apply_pipeline_steps(data["scan"], PIPELINE)[-1].z
+        np.testing.assert_array_equal(results["scan"][-1].z, expected)
+
+    def test_versions_are_renewed(self):
+        data = {"scan": get_sicm_data(SCAN)}
+        job = BatchJob(self.executor, data, PIPELINE)
+        results = []
+        job.scan_finished.connect(lambda key, states: results.extend(states))
+        job.start()
+        wait_for(job)
+        versions = [state.version for state in results] + [data["scan"].version]
+        self.assertEqual(len(set(versions)), 3)
+        self.assertGreater(min(versions[:-1]), data["scan"].version)
+
+    def test_fused_job_with_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            results = []
+            for _ in range(2):
+                job = BatchJob(self.executor, {"scan": get_sicm_data(SCAN)}, PIPELINE,
+                               fused=True, cache=PipelineCache(directory))
+                job.scan_finished.connect(lambda key, states: results.append(states))
+                job.start()
+                wait_for(job)
+            self.assertEqual(len(os.listdir(directory)), 1)
+        self.assertEqual([len(states) for states in results], [1, 1])
+        np.testing.assert_array_equal(results[0][0].z, results[1][0].z)
+        self.assertEqual(results[1][0].z.shape, (8, 6))
+
+    def test_cancel(self):
+        data = {str(i): get_sicm_data(SCAN) for i in range(8)}
+        job = BatchJob(self.executor, data, PIPELINE)
+        results, finished = [], []
+        job.scan_finished.connect(lambda key, states: results.append(key))
+        job.finished.connect(lambda: finished.append(True))
+        job.start()
+        job.cancel()
+        wait_for(job)
+
+        self.assertEqual(finished, [True])
+        self.assertEqual(results, [])
+        self.assertEqual(job.skipped, len(data))
+
+    def test_empty_job(self):
+        job = BatchJob(self.executor, {}, PIPELINE)
+        finished = []
+        job.finished.connect(lambda: finished.append(True))
+        job.start()
+        self.assertEqual(finished, [True])
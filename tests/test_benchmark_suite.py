@@ -0,0 +1,29 @@
+from unittest import TestCase
+
+from benchmarks.benchmark_suite import get_cases, run_benchmarks, compare_results
+
+
+class BenchmarkSuiteTests(TestCase):
+
+    def test_results(self):
+        cases = [case for case in get_cases() if case.name in ("manipulate: crop", "filter: median_spatial")]
+        results = run_benchmarks(cases, [16, 512], min_time=0.0)
+        self.assertEqual([(r["case"], r["size"]) for r in results],
+                         [("manipulate: crop", 16), ("filter: median_spatial", 16),
+                          ("manipulate: crop", 512), ("filter: median_spatial", 512)])
+        self.assertEqual(results[0]["repeats"], 3)
+        self.assertLessEqual(results[0]["min"], results[0]["median"])
+        self.assertTrue(results[3]["skipped"])
+
+    def test_errors_are_reported(self):
+        case = get_cases()[0]._replace(name="broken", run=lambda data: 1 / 0, setup=None)
+        self.assertIn("ZeroDivisionError", run_benchmarks([case], [16])[0]["error"])
+
+    def test_regressions(self):
+        baseline = [{"case": "a", "size": 64, "median": 0.010}, {"case": "b", "size": 64, "median": 0.010},
+                    {"case": "c", "size": 64, "median": 0.00001}]
+        results = [{"case": "a", "size": 64, "median": 0.011}, {"case": "b", "size": 64, "median": 0.020},
+                   {"case": "c", "size": 64, "median": 0.00005}, {"case": "d", "size": 64, "median": 1.0}]
+        regressions = compare_results(baseline, results, threshold=1.25)
+        self.assertEqual([r["case"] for r in regressions], ["b"])
+        self.assertAlmostEqual(regressions[0]["ratio"], 2.0)
@@ -0,0 +1,85 @@
+import os
+import tempfile
+from unittest import TestCase
+import numpy as np
+from sicm_analyzer.chunked_statistics import MomentAccumulator, QuantileSketch, iter_row_chunks
+from sicm_analyzer.measurements import get_chunked_statistics, get_outlier_limits_of_chunks
+from sicm_analyzer.measurements import get_lower_and_upper_limit_for_outlier_determination
+from sicm_analyzer.measurements import get_root_mean_sq_roughness, get_skewness, get_kurtosis_coefficient
+from sicm_analyzer.sicm_data import ScanBackstepMode
+
+
+class MomentAccumulatorTests(TestCase):
+
+    def test_merged_moments_equal_moments_of_whole_array(self):
+        values = np.random.default_rng(0).normal(loc=1000.0, scale=0.01, size=(100, 37))
+        accumulator = MomentAccumulator()
+        for chunk in iter_row_chunks(values, chunk_rows=7):
+            accumulator.add(chunk)
+
+        diff = values - np.mean(values)
+        self.assertEqual(accumulator.n, values.size)
+        self.assertAlmostEqual(accumulator.mean, np.mean(values), places=10)
+        self.assertAlmostEqual(accumulator.central_moment(2) / np.mean(diff ** 2), 1.0, places=8)
+        self.assertAlmostEqual(accumulator.central_moment(3) / np.mean(diff ** 3), 1.0, places=6)
+        self.assertAlmostEqual(accumulator.central_moment(4) / np.mean(diff ** 4), 1.0, places=8)
+        self.assertEqual(accumulator.minimum, np.min(values))
+        self.assertEqual(accumulator.maximum, np.max(values))
+
+    def test_nan_values_are_ignored(self):
+        accumulator = MomentAccumulator()
+        accumulator.add(np.array([[1.0, np.nan], [3.0, 5.0]]))
+        self.assertEqual(accumulator.n, 3)
+        self.assertAlmostEqual(accumulator.mean, 3.0)
+
+
+class QuantileSketchTests(TestCase):
+
+    def test_quantiles_are_approximated(self):
+        values = np.random.default_rng(1).normal(size=200000)
+        sketch = QuantileSketch(size=512, seed=2)
+        for chunk in np.array_split(values, 50):
+            sketch.add(chunk)
+        self.assertLess(sum(level.size for level in sketch.levels), 512 * 12)
+        for q in (0.25, 0.5, 0.75):
+            rank = np.mean(values <= sketch.quantile(q))
+            self.assertAlmostEqual(rank, q, delta=0.02)
+
+    def test_small_inputs_are_exact(self):
+        sketch = QuantileSketch()
+        sketch.add(np.arange(1, 101))
+        self.assertEqual(sketch.percentile(50), 50)
+
+
+class ChunkedMeasurementTests(TestCase):
+
+    def setUp(self):
+        self.z = np.random.default_rng(3).gamma(2.0, size=(300, 200))
+        self.data = ScanBackstepMode()
+        self.data.z = self.z
+        self.z = self.data.z
+
+    def test_chunked_statistics_match_in_memory_functions(self):
+        results = get_chunked_statistics(self.data, chunk_rows=32)
+        self.assertAlmostEqual(results["Rq"], get_root_mean_sq_roughness(self.data), places=10)
+        self.assertAlmostEqual(results["skewness"], get_skewness(self.data), places=10)
+        self.assertAlmostEqual(results["kurtosis"], get_kurtosis_coefficient(self.data), places=10)
+        self.assertEqual(results["min"], np.min(self.z))
+        self.assertEqual(results["max"], np.max(self.z))
+
+    def test_memory_mapped_source(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "z.npy")
+            np.save(path, self.z)
+            z_mapped = np.load(path, mmap_mode="r")
+            results = get_chunked_statistics(z_mapped, chunk_rows=64)
+            del z_mapped
+        self.assertEqual(results["n"], self.z.size)
+        self.assertAlmostEqual(results["mean"], np.mean(self.z, dtype=np.float64), places=10)
+
+    def test_row_chunk_iterator_source(self):
+        chunks = (self.z[i:i + 10] for i in range(0, self.z.shape[0], 10))
+        lower, upper = get_outlier_limits_of_chunks(chunks)
+        expected_lower, expected_upper = get_lower_and_upper_limit_for_outlier_determination(self.z)
+        self.assertAlmostEqual(lower, expected_lower, delta=0.05)
+        self.assertAlmostEqual(upper, expected_upper, delta=0.1)
@@ -0,0 +1,59 @@
+import sys
+import tempfile
+from unittest import TestCase
+
+from PyQt6.QtWidgets import QApplication
+
+from sicm_analyzer.colormap_dialog import ColorModule, CustomColorMapDialog, get_color_icons, get_color_model
+from sicm_analyzer.gui_main import MainWindow
+from sicm_analyzer.main import Controller
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+
+class ColorIconTests(TestCase):
+
+    def test_icons_are_shared(self):
+        self.assertIs(get_color_icons(), get_color_icons())
+        first, second = ColorModule(1), ColorModule(2)
+        self.assertIs(first.combobox_predefined.model(), get_color_model())
+        self.assertIs(second.combobox_predefined.model(), get_color_model())
+        self.assertEqual(first.combobox_predefined.count(), len(get_color_icons()))
+
+    def test_selection_is_per_module(self):
+        dialog = CustomColorMapDialog()
+        dialog.color1.combobox_predefined.setCurrentText("red")
+        dialog.color2.combobox_predefined.setCurrentText("blue")
+        self.assertEqual(dialog.get_dynamic_color_text()[:2], ["red", "blue"])
+        self.assertFalse(dialog.color1.combobox_predefined.itemIcon(0).isNull())
+
+
+class DeferredDialogTests(TestCase):
+
+    def setUp(self):
+        self.thumbnail_directory = tempfile.TemporaryDirectory()
+        self.controller = Controller(MainWindow(), self.thumbnail_directory.name)
+
+    def tearDown(self):
+        # widgets without parent must be deleted before the application
+        for dialog in (self.controller.cmap_dialog, self.controller.results_dialog):
+            if dialog is not None:
+                dialog.close()
+                dialog.deleteLater()
+        app.processEvents()
+        self.thumbnail_directory.cleanup()
+
+    def test_dialogs_are_created_on_first_open(self):
+        self.assertIsNone(self.controller.cmap_dialog)
+        self.assertIsNone(self.controller.results_dialog)
+        self.controller.open_color_map_dialog()
+        self.controller.open_results_dialog()
+        cmap_dialog, results_dialog = self.controller.cmap_dialog, self.controller.results_dialog
+        self.assertTrue(cmap_dialog.isVisible())
+
+        # opening again keeps the dialogs open and reuses them
+        self.controller.open_color_map_dialog()
+        self.controller.open_results_dialog()
+        self.assertIs(self.controller.cmap_dialog, cmap_dialog)
+        self.assertIs(self.controller.results_dialog, results_dialog)
+        self.assertTrue(cmap_dialog.isVisible())
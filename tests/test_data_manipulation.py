@@ -1,9 +1,10 @@
 import unittest
+from unittest import mock
 
 import numpy as np
 
 from sicm_analyzer.manipulate_data import filter_median_spatial, filter_average_spatial, filter_average_temporal, filter_median_temporal
-from sicm_analyzer.manipulate_data import transpose_z_data
+from sicm_analyzer.manipulate_data import transpose_z_data, level_data
 from sicm_analyzer.sicm_data import ScanBackstepMode
 from sicm_analyzer.view import View
 
@@ -126,6 +127,16 @@ class DataManipulationFilterTests(unittest.TestCase):
         filter_average_spatial(self.test_data, 2)
         np.testing.assert_array_equal(self.test_data.z, self.expected_data.z)
 
+    def test_filters_calculate_in_float32(self):
+        # without conversion by the z setter, the output has the type of the filter buffer
+        with mock.patch.object(ScanBackstepMode, "storage_dtype", None):
+            for func in (filter_median_temporal, filter_average_temporal,
+                         filter_median_spatial, filter_average_spatial):
+                with self.subTest(filter=func.__name__):
+                    self.test_data.z = np.arange(12, dtype=np.float32).reshape(3, 4)
+                    func(self.test_data, 2)
+                    self.assertEqual(self.test_data.z.dtype, np.float32)
+
 
 class DataManipulationSimpleTests(unittest.TestCase):
     def setUp(self):
@@ -195,3 +206,41 @@ class DataManipulationSimpleTests(unittest.TestCase):
         transpose_z_data(self.test_data)
 
         np.testing.assert_array_equal(self.test_data.z, self.expected_data.z)
+
+
+class MeshgridTests(unittest.TestCase):
+
+    def setUp(self):
+        self.scan = ScanBackstepMode()
+        self.scan.x_px, self.scan.y_px = 4, 3
+        self.scan.set_data(list(range(12)))
+
+    def test_meshgrids_equal_numpy_meshgrids(self):
+        x, y = np.meshgrid(range(4), range(3))
+        np.testing.assert_array_equal(self.scan.x, x)
+        np.testing.assert_array_equal(self.scan.y, y)
+
+    def test_meshgrids_are_read_only_views(self):
+        for grid in self.scan.get_data()[:2]:
+            self.assertEqual(grid.shape, (3, 4))
+            self.assertFalse(grid.flags.writeable)
+            self.assertEqual(0, min(grid.strides))
+        self.assertEqual(self.scan.x_axis.shape, (4,))
+
+    def test_meshgrids_follow_dimensions(self):
+        transpose_z_data(self.scan)
+        self.assertEqual(self.scan.x.shape, (4, 3))
+        self.assertEqual(self.scan.y.shape, (4, 3))
+
+    def test_assign_meshgrid(self):
+        x, y = np.meshgrid(np.arange(4) * 2.0, np.arange(3) * 0.5)
+        self.scan.x, self.scan.y = x, y
+        np.testing.assert_array_equal(self.scan.x, x)
+        np.testing.assert_array_equal(self.scan.y, y)
+
+    def test_level_data(self):
+        x, y = np.meshgrid(range(20), range(10))
+        self.scan.z = 0.5 * x - 0.2 * y + 3.0
+        self.scan.update_dimensions()
+        level_data(self.scan)
+        np.testing.assert_allclose(self.scan.z, 0.0, atol=1e-5)
@@ -3,6 +3,8 @@ from os.path import join
 import sys
 from unittest import TestCase
 import os
+import tempfile
+from PyQt6.QtCore import QThreadPool
 from PyQt6.QtWidgets import QApplication
 
 from sicm_analyzer.gui_main import MainWindow
@@ -21,29 +23,57 @@ def get_filenames():
     return files
 
 
-class PlotTests(TestCase):
+def import_files(controller, files):
+    """Imports files and waits until the imported data has been added."""
+    controller.add_files_to_list(files)
+    controller.io_service.wait_for_done()
+    app.processEvents()
+
+
+class ControllerTestCase(TestCase):
+
+    def tearDown(self):
+        # thumbnails may still be generated
+        QThreadPool.globalInstance().waitForDone()
+        self.thumbnail_directory.cleanup()
+
+
+class PlotTests(ControllerTestCase):
 
     def setUp(self):
         app.setApplicationName("pySICM TestSuite")
         window = MainWindow()
-        self.controller = Controller(window)
+        # thumbnails are not written to the cache of the user
+        self.thumbnail_directory = tempfile.TemporaryDirectory()
+        self.controller = Controller(window, self.thumbnail_directory.name)
         self.controller.add_canvases_to_main_window()
         self.controller.connect_actions()
 
     def test_file_import(self):
-        self.controller.add_files_to_list(get_filenames())
+        import_files(self.controller, get_filenames())
         self.assertEqual(self.controller.main_window.imported_files_list.count(), 11)
 
+    def test_thumbnails_are_shown(self):
+        import_files(self.controller, get_filenames())
+        QThreadPool.globalInstance().waitForDone()
+        app.processEvents()
+        files_list = self.controller.main_window.imported_files_list
+        icons = [not files_list.item(i).icon().isNull() for i in range(files_list.count())]
+        # approach curves have no thumbnails
+        self.assertTrue(any(icons))
+
 
-class GuiInteractionTests(TestCase):
+class GuiInteractionTests(ControllerTestCase):
 
     def setUp(self):
         app.setApplicationName("pySICM TestSuite")
         window = MainWindow()
-        self.controller = Controller(window)
+        # thumbnails are not written to the cache of the user
+        self.thumbnail_directory = tempfile.TemporaryDirectory()
+        self.controller = Controller(window, self.thumbnail_directory.name)
         self.controller.add_canvases_to_main_window()
         self.controller.connect_actions()
-        self.controller.add_files_to_list(get_filenames())
+        import_files(self.controller, get_filenames())
 
     def test_switch_from_px_to_micron_and_back(self):
 
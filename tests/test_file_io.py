@@ -0,0 +1,141 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+from unittest import TestCase
+
+from PyQt6.QtCore import QThreadPool
+from PyQt6.QtWidgets import QApplication
+
+from sicm_analyzer.file_io import FileIOService, IOState
+from sicm_analyzer.gui_main import MainWindow
+from sicm_analyzer.main import Controller
+from sicm_analyzer.sicm_data import get_sicm_data
+from sicm_analyzer.synthetic_data import generate_files
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+SAMPLE_FILES_DIR = "./tests/sample_sicm_files"
+
+
+def wait_for(condition, timeout: float = 60):
+    start = time.monotonic()
+    while not condition() and time.monotonic() - start < timeout:
+        app.processEvents()
+        time.sleep(0.01)
+    app.processEvents()
+
+
+def fail(message):
+    raise OSError(message)
+
+
+class FileIOServiceTests(TestCase):
+
+    def setUp(self):
+        self.service = FileIOService(max_threads=1)
+        self.progress = []
+        self.service.progress.connect(lambda finished, submitted: self.progress.append((finished, submitted)))
+
+    def tearDown(self):
+        self.service.cancel_all()
+        self.service.wait_for_done()
+        app.processEvents()
+
+    def test_result(self):
+        finished = []
+        future = self.service.submit("Import", get_sicm_data, os.path.join(SAMPLE_FILES_DIR, "Zelle1 PFA.sicm"))
+        future.finished.connect(finished.append)
+        wait_for(lambda: self.service.is_idle)
+        self.assertEqual(finished, [future])
+        self.assertTrue(future.succeeded)
+        self.assertEqual(future.result.z.shape, (10, 10))
+        self.assertEqual(self.progress, [(0, 1), (1, 1)])
+
+    def test_failure(self):
+        future = self.service.submit("Fail", fail, "disk full")
+        wait_for(future.done)
+        self.assertEqual(future.state, IOState.FAILED)
+        self.assertEqual(future.error, "OSError: disk full")
+        self.assertIsNone(future.result)
+
+    def test_cancel(self):
+        release = threading.Event()
+        running = self.service.submit("Block", release.wait)
+        pending = [self.service.submit("Pending", time.sleep, 0) for _ in range(3)]
+        idle = []
+        self.service.idle.connect(lambda: idle.append(True))
+        wait_for(lambda: running.state == IOState.RUNNING)
+
+        # pending requests are cancelled immediately
+        self.service.cancel(pending[0])
+        self.assertTrue(pending[0].cancelled)
+        self.service.cancel_all()
+        self.assertTrue(all(future.cancelled for future in pending))
+        self.assertEqual(running.state, IOState.RUNNING)
+        self.assertEqual(self.progress[-1], (3, 4))
+
+        # results of running requests are discarded
+        release.set()
+        wait_for(lambda: self.service.is_idle)
+        self.assertTrue(running.cancelled)
+        self.assertIsNone(running.result)
+        self.assertEqual(idle, [True])
+        self.assertEqual((self.service.finished, self.service.submitted), (0, 0))
+
+
+class ControllerImportTests(TestCase):
+
+    def setUp(self):
+        self.window = MainWindow()
+        self.thumbnail_directory = tempfile.TemporaryDirectory()
+        self.controller = Controller(self.window, self.thumbnail_directory.name)
+        self.controller.add_canvases_to_main_window()
+        self.controller.connect_actions()
+
+    def tearDown(self):
+        # widgets without parent must be deleted before the application
+        self.controller.io_service.wait_for_done()
+        app.processEvents()
+        self.window.deleteLater()
+        app.processEvents()
+        QThreadPool.globalInstance().waitForDone()
+        self.thumbnail_directory.cleanup()
+
+    def wait_for_imports(self):
+        wait_for(lambda: not self.controller.pending_imports)
+
+    def test_files_are_listed_in_order(self):
+        files = sorted(os.path.abspath(os.path.join(SAMPLE_FILES_DIR, file))
+                       for file in os.listdir(SAMPLE_FILES_DIR) if file.endswith(".sicm"))
+        self.controller.add_files_to_list(files)
+        # duplicates of pending imports are skipped
+        self.controller.add_files_to_list(files[:2])
+        self.assertEqual(len(self.controller.pending_imports), len(files))
+        self.assertTrue(self.window.io_progress_bar.isVisibleTo(self.window))
+        self.wait_for_imports()
+
+        files_list = self.window.imported_files_list
+        self.assertEqual([files_list.item(i).text() for i in range(files_list.count())], files)
+        self.assertEqual(self.window.statusBar().currentMessage(), "Imported %i files." % len(files))
+        self.assertFalse(self.window.io_progress_bar.isVisibleTo(self.window))
+        self.assertEqual(self.controller.data_manager.get_data(files[0]).z.shape,
+                         get_sicm_data(files[0]).z.shape)
+
+    def test_import_directory_and_export(self):
+        with tempfile.TemporaryDirectory() as directory:
+            generate_files(directory, count=3, seed=1)
+            self.controller.import_files_by_drag_and_drop([directory])
+            wait_for(lambda: self.window.imported_files_list.count() == 3)
+            self.assertEqual(self.window.imported_files_list.count(), 3)
+
+            # selecting a scan shows its metadata
+            self.controller.item_selection_changed_event(self.window.imported_files_list.item(0))
+            key = self.window.imported_files_list.item(0).text()
+            self.assertEqual(self.controller.current_selection, key)
+            path = os.path.join(directory, "exported.sicm")
+            self.controller._submit_sicm_export(path, self.controller.data_manager.get_data(key), [], None)
+            wait_for(lambda: self.controller.io_service.is_idle)
+            self.assertEqual(self.window.statusBar().currentMessage(), f"Data exported as: {path}")
+            self.assertEqual(get_sicm_data(path).z.shape, self.controller.data_manager.get_data(key).z.shape)
@@ -0,0 +1,249 @@
+import sys
+from unittest import TestCase, mock
+
+import matplotlib
+import numpy as np
+from PyQt6.QtCore import QThreadPool
+from PyQt6.QtWidgets import QApplication
+
+from sicm_analyzer.graph_canvas import GraphCanvas, OffscreenGraphCanvas, RASTER_IMAGE, SURFACE_PLOT, \
+    INTERACTIVE_SURFACE_FACES
+from sicm_analyzer.view import View
+from tests import get_scan
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+
+class RasterImageTests(TestCase):
+
+    def setUp(self):
+        self.canvas = GraphCanvas()
+        self.scan = get_scan(np.arange(12.0).reshape(3, 4))
+        self.view = View()
+        self.canvas.draw_graph(self.scan, RASTER_IMAGE, self.view)
+        self.image = self.canvas.raster_image
+
+    def test_image_is_reused_for_new_color_map_and_limits(self):
+        self.view.color_map = matplotlib.colormaps["viridis"]
+        self.view.z_limits = (2.0, 5.0)
+        self.canvas.draw_graph(self.scan, RASTER_IMAGE, self.view)
+        self.assertIs(self.canvas.raster_image, self.image)
+        self.assertEqual(self.image.get_cmap(), self.view.color_map)
+        self.assertEqual(self.image.get_clim(), (2.0, 5.0))
+
+    def test_image_is_reused_for_new_data_of_same_shape(self):
+        self.scan.z = self.scan.z * 2
+        self.canvas.draw_graph(self.scan, RASTER_IMAGE, self.view)
+        self.assertIs(self.canvas.raster_image, self.image)
+        self.assertEqual(self.image.get_clim(), (0.0, 22.0))
+        np.testing.assert_array_equal(np.ravel(self.image.get_array()), self.scan.z.ravel())
+
+    def test_image_is_created_for_new_shape(self):
+        self.canvas.draw_graph(get_scan(np.ones((5, 5))), RASTER_IMAGE, self.view)
+        self.assertIsNot(self.canvas.raster_image, self.image)
+
+    def test_image_is_created_after_changing_axes(self):
+        self.view.toggle_axes()
+        self.canvas.draw_graph(self.scan, RASTER_IMAGE, self.view)
+        self.assertIsNot(self.canvas.raster_image, self.image)
+
+    def test_overlays_are_removed(self):
+        rect = self.canvas.get_rectangle(origin=(0, 0), width=2, height=2)
+        self.canvas.add_rectangle_to_raster_image(rectangles=[rect])
+        self.assertEqual(len(self.image.axes.patches), 1)
+        self.canvas.draw_graph(self.scan, RASTER_IMAGE, self.view)
+        self.assertIs(self.canvas.raster_image, self.image)
+        self.assertEqual(len(self.image.axes.patches), 0)
+        self.assertEqual(len(self.image.axes.texts), 0)
+
+
+class OverlayBlittingTests(TestCase):
+
+    def setUp(self):
+        self.canvas = GraphCanvas()
+        self.scan = get_scan(np.arange(12.0).reshape(3, 4))
+        self.canvas.draw_graph(self.scan, RASTER_IMAGE, View())
+        self.full_draws = 0
+        self.canvas.mpl_connect("draw_event", self.count_draw)
+
+    def count_draw(self, event):
+        self.full_draws += 1
+
+    def test_background_is_cached_after_draw(self):
+        self.assertIsNotNone(self.canvas.overlay_background)
+
+    def test_moving_a_rectangle_does_not_draw_the_figure(self):
+        for i in range(3):
+            rect = self.canvas.get_rectangle(origin=(i, 0), width=1, height=2)
+            self.canvas.add_rectangle_to_raster_image(rectangles=[rect])
+        self.assertEqual(self.full_draws, 0)
+        # one rectangle and two annotations of the last call
+        self.assertEqual(len(self.canvas.overlay_artists), 3)
+        self.assertTrue(all(artist.get_animated() for artist in self.canvas.overlay_artists))
+        self.assertEqual(len(self.canvas.raster_image.axes.patches), 1)
+
+    def test_clear_overlays(self):
+        rect = self.canvas.get_rectangle(origin=(0, 0), width=1, height=2)
+        self.canvas.add_rectangle_to_raster_image(rectangles=[rect])
+        self.canvas.clear_overlays()
+        self.assertEqual(self.canvas.overlay_artists, [])
+        self.assertEqual(len(self.canvas.raster_image.axes.patches), 0)
+
+    def test_raster_image_is_drawn_if_background_is_missing(self):
+        self.canvas.clear_figure()
+        rect = self.canvas.get_rectangle(origin=(0, 0), width=1, height=2)
+        self.canvas.add_rectangle_to_raster_image(rectangles=[rect])
+        self.assertEqual(self.full_draws, 1)
+        self.assertIsNotNone(self.canvas.raster_image)
+
+
+class ImageRendererTests(TestCase):
+
+    def setUp(self):
+        self.canvas = GraphCanvas()
+        self.scan = get_scan(np.arange(12.0).reshape(3, 4))
+        self.view = View()
+
+    def test_image_covers_pixel_edges(self):
+        self.canvas.draw_graph(self.scan, RASTER_IMAGE, self.view)
+        image = self.canvas.raster_image
+        self.assertEqual(tuple(image.get_extent()), (0, 4, 0, 3))
+        self.assertEqual(image.origin, "lower")
+        self.assertEqual(list(image.axes.get_xticks()), [0, 2, 4])
+
+    def test_same_ticks_as_pcolormesh(self):
+        self.view.show_as_px = False
+        self.canvas.draw_graph(self.scan, RASTER_IMAGE, self.view)
+        image_labels = [label.get_text() for label in self.canvas.raster_image.axes.get_xticklabels()]
+
+        mesh_canvas = GraphCanvas()
+        mesh_canvas.use_image_renderer = False
+        mesh_canvas.draw_graph(self.scan, RASTER_IMAGE, self.view)
+        mesh_labels = [label.get_text() for label in mesh_canvas.raster_image.axes.get_xticklabels()]
+        self.assertEqual(image_labels, mesh_labels)
+
+    def test_grid_is_drawn_for_small_scans(self):
+        self.canvas.draw_graph(self.scan, RASTER_IMAGE, self.view)
+        grid = self.canvas.raster_image.axes.collections
+        self.assertEqual(len(grid), 1)
+        # 5 vertical and 4 horizontal lines
+        self.assertEqual(len(grid[0].get_segments()), 9)
+
+    def test_grid_is_hidden_if_rasterized(self):
+        self.view.toggle_edges()
+        self.canvas.draw_graph(self.scan, RASTER_IMAGE, self.view)
+        self.assertEqual(len(self.canvas.raster_image.axes.collections), 0)
+
+    def test_no_grid_for_large_scans(self):
+        self.canvas.draw_graph(get_scan(np.zeros((200, 200))), RASTER_IMAGE, self.view)
+        self.assertEqual(len(self.canvas.raster_image.axes.collections), 0)
+
+
+class SurfaceLevelOfDetailTests(TestCase):
+
+    def setUp(self):
+        self.canvas = GraphCanvas()
+        z = np.zeros((200, 200))
+        z[100, 100] = 7.0
+        self.scan = get_scan(z)
+        self.canvas.draw_graph(self.scan, SURFACE_PLOT, View())
+
+    def test_surface_is_decimated(self):
+        self.assertGreater(self.canvas.surface_decimation_factor, 1)
+
+    def test_limits_and_norm_use_full_data(self):
+        self.assertEqual(self.canvas.surface_norm.vmax, 7.0)
+        self.assertGreaterEqual(self.canvas.surface_axes.get_xlim()[1], 199)
+
+    def test_interactive_and_refined_surface(self):
+        idle_factor = self.canvas.surface_decimation_factor
+        self.canvas.draw_surface(INTERACTIVE_SURFACE_FACES)
+        self.assertGreaterEqual(self.canvas.surface_decimation_factor, idle_factor)
+        self.canvas.refine_surface()
+        self.assertEqual(self.canvas.surface_decimation_factor, idle_factor)
+        self.assertEqual(len(self.canvas.surface_axes.collections), 1)
+
+    def test_full_resolution(self):
+        self.canvas.refine_surface_to_full_resolution = True
+        self.canvas.refine_surface()
+        self.assertEqual(self.canvas.surface_decimation_factor, 1)
+
+
+def wait_for_rendering():
+    QThreadPool.globalInstance().waitForDone()
+    app.processEvents()
+
+
+class BackgroundRenderingTests(TestCase):
+
+    def setUp(self):
+        self.canvas = GraphCanvas()
+        self.canvas.resize(400, 300)
+        self.scan = get_scan(np.arange(12.0).reshape(3, 4))
+        self.view = View()
+
+    def test_rendered_figure_replaces_figure(self):
+        figure = self.canvas.figure
+        self.canvas.draw_graph_in_background(self.scan, SURFACE_PLOT, self.view)
+        self.assertIs(self.canvas.figure, figure)
+        self.assertTrue(self.canvas.render_pending)
+        wait_for_rendering()
+        self.assertIsNot(self.canvas.figure, figure)
+        self.assertIs(self.canvas.figure.canvas, self.canvas)
+        self.assertIs(self.canvas.current_data, self.scan)
+        self.assertIn(self.canvas.surface_axes, self.canvas.figure.get_axes())
+        self.assertIsNotNone(self.canvas.overlay_background)
+        self.assertFalse(self.canvas.render_pending)
+
+    def test_rendered_image_is_shown(self):
+        self.canvas.draw_graph_in_background(self.scan, RASTER_IMAGE, self.view)
+        wait_for_rendering()
+        shown = np.asarray(self.canvas.get_renderer().buffer_rgba()).copy()
+        self.canvas.draw()
+        np.testing.assert_array_equal(shown, np.asarray(self.canvas.get_renderer().buffer_rgba()))
+
+    def test_failed_rendering_finishes_request(self):
+        figure = self.canvas.figure
+        with mock.patch.object(OffscreenGraphCanvas, "plot_graph", side_effect=RuntimeError("no memory")):
+            self.canvas.draw_graph_in_background(self.scan, SURFACE_PLOT, self.view)
+            wait_for_rendering()
+        self.assertFalse(self.canvas.render_pending)
+        self.assertIs(self.canvas.figure, figure)
+        # the canvas is updated by later requests
+        self.canvas.draw_graph_in_background(self.scan, SURFACE_PLOT, self.view)
+        wait_for_rendering()
+        self.assertIsNot(self.canvas.figure, figure)
+
+    def test_only_latest_request_is_shown(self):
+        other = get_scan(np.ones((5, 5)))
+        self.canvas.draw_graph_in_background(other, RASTER_IMAGE, self.view)
+        self.canvas.draw_graph_in_background(self.scan, RASTER_IMAGE, self.view)
+        wait_for_rendering()
+        self.assertIs(self.canvas.current_data, self.scan)
+        self.assertEqual(self.canvas.raster_image.get_array().shape, (3, 4))
+        self.assertEqual(self.canvas.render_workers, {})
+
+    def test_draw_graph_cancels_requests(self):
+        self.canvas.draw_graph_in_background(self.scan, SURFACE_PLOT, self.view)
+        self.canvas.draw_graph(self.scan, RASTER_IMAGE, self.view)
+        image = self.canvas.raster_image
+        wait_for_rendering()
+        self.assertIs(self.canvas.raster_image, image)
+        self.assertIsNone(self.canvas.surface)
+
+    def test_reusable_raster_image_is_updated_immediately(self):
+        self.canvas.draw_graph(self.scan, RASTER_IMAGE, self.view)
+        image = self.canvas.raster_image
+        self.view.color_map = matplotlib.colormaps["viridis"]
+        self.canvas.draw_graph_in_background(self.scan, RASTER_IMAGE, self.view)
+        self.assertFalse(self.canvas.render_pending)
+        self.assertIs(self.canvas.raster_image, image)
+        self.assertEqual(image.get_cmap(), self.view.color_map)
+
+    def test_mouse_events_are_bound_to_new_figure(self):
+        calls = []
+        self.canvas.draw_rectangle_on_raster_image(self.scan, self.view, func=lambda p1, p2: calls.append((p1, p2)))
+        self.canvas.draw_graph_in_background(self.scan, RASTER_IMAGE, self.view)
+        wait_for_rendering()
+        self.assertIn(self.canvas._draw_rectangle_and_call_func,
+                      [ref() for ref in self.canvas.callbacks.callbacks["button_press_event"].values()])
@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+from unittest import TestCase
+
+# packages which must not be imported at startup (see data_fitting.py)
+DEFERRED_PACKAGES = ("symfit", "sympy", "lmfit", "skimage", "scipy")
+# budget for the cumulative import time of sicm_analyzer.main in s,
+# which is generous since matplotlib and PyQt6 alone take about 0.6 s
+IMPORT_TIME_BUDGET = 3.0
+
+
+def get_import_times(module: str) -> dict[str, float]:
+    """Returns the cumulative import times in s of all modules imported
+    by importing module in a new interpreter (python -X importtime)."""
+    environment = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", "import %s" % module],
+                             capture_output=True, text=True, env=environment, check=True)
+    times = {}
+    for line in process.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+class ImportTimeTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.import_times = get_import_times("sicm_analyzer.main")
+
+    def test_heavy_packages_are_deferred(self):
+        imported = sorted(name for name in self.import_times if name.split(".")[0] in DEFERRED_PACKAGES)
+        self.assertEqual(imported, [])
+
+    def test_import_time_budget(self):
+        self.assertLess(self.import_times["sicm_analyzer.main"], IMPORT_TIME_BUDGET)
+
+    def test_deferred_packages_are_imported_on_use(self):
+        # the lazily imported functions still work
+        from sicm_analyzer.data_fitting import poly_xx_fit
+        from sicm_analyzer.sicm_data import get_sicm_data
+        data = get_sicm_data("./tests/sample_sicm_files/Zelle1 PFA.sicm")
+        fitted_z, report = poly_xx_fit(data)
+        self.assertEqual(fitted_z.shape, data.z.shape)
+        self.assertIn("lmfit", sys.modules)
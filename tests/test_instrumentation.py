@@ -0,0 +1,134 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+from unittest import TestCase
+
+import numpy as np
+from PyQt6.QtWidgets import QApplication
+
+from sicm_analyzer.data_manager import DataManager, UndoRedoData
+from sicm_analyzer.instrumentation import Recorder, RECORDER, instrumented, summarize, get_chrome_trace
+from sicm_analyzer.instrumentation import IO, MANIPULATION, MEASUREMENT
+from sicm_analyzer.manipulate_data import subtract_z_minimum
+from sicm_analyzer.performance_window import PerformanceWindow
+from sicm_analyzer.sicm_data import get_sicm_data
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+SCAN = "./tests/sample_sicm_files/Zelle1 PFA.sicm"
+
+
+class RecorderTests(TestCase):
+
+    def setUp(self):
+        self.recorder = Recorder(capacity=5)
+        self.recorder.enable()
+
+    def tearDown(self):
+        self.recorder.disable()
+
+    def test_disabled_recorder_records_nothing(self):
+        self.recorder.disable()
+        with self.recorder.measure("call", IO):
+            pass
+        self.assertEqual(self.recorder.get_records(), [])
+
+    def test_records(self):
+        z = np.zeros((20, 10))
+        with self.recorder.measure("call", MANIPULATION, z):
+            pass
+        with self.assertRaises(ValueError):
+            with self.recorder.measure("failing call", MEASUREMENT):
+                raise ValueError("no data")
+        first, second = self.recorder.get_records()
+        self.assertEqual((first.name, first.category, first.shape, first.nbytes), ("call", MANIPULATION, (20, 10), 1600))
+        self.assertIsNone(first.peak_memory)
+        self.assertGreaterEqual(first.duration, 0)
+        self.assertEqual(first.thread_id, threading.get_ident())
+        self.assertEqual(second.error, "ValueError: no data")
+
+    def test_ring_buffer(self):
+        for i in range(8):
+            with self.recorder.measure(str(i), IO):
+                pass
+        self.assertEqual([record.name for record in self.recorder.get_records()], ["3", "4", "5", "6", "7"])
+        self.recorder.set_capacity(2)
+        self.assertEqual([record.name for record in self.recorder.get_records()], ["6", "7"])
+
+    def test_peak_memory_of_nested_calls(self):
+        self.recorder.enable(measure_memory=True)
+        with self.recorder.measure("outer", MANIPULATION):
+            with self.recorder.measure("inner", MANIPULATION):
+                array = np.ones(2 ** 20)
+                del array
+            with self.recorder.measure("small", MANIPULATION):
+                array = np.ones(10)
+        inner, outer, small = sorted(self.recorder.get_records(), key=lambda record: record.name)
+        self.assertGreaterEqual(inner.peak_memory, 8 * 2 ** 20)
+        self.assertGreaterEqual(outer.peak_memory, inner.peak_memory)
+        self.assertLess(small.peak_memory, 2 ** 20)
+
+    def test_summary_and_exports(self):
+        for name in ("a", "b", "a"):
+            with self.recorder.measure(name, IO, np.zeros(4)):
+                pass
+        summary = summarize(self.recorder.get_records())
+        self.assertEqual({row["name"]: row["calls"] for row in summary}, {"a": 2, "b": 1})
+        self.assertEqual(summary[0]["max_nbytes"], 32)
+
+        trace = get_chrome_trace(self.recorder.get_records())
+        self.assertEqual(len(trace["traceEvents"]), 3)
+        self.assertEqual(trace["traceEvents"][0]["ph"], "X")
+        self.assertEqual(trace["traceEvents"][0]["args"], {"shape": (4,), "nbytes": 32})
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "records.json")
+            self.recorder.write_json(path)
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(len(json.load(f)["records"]), 3)
+            self.recorder.write_chrome_trace(path)
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(json.load(f)["traceEvents"][1]["name"], "b")
+
+
+class InstrumentedCallsTests(TestCase):
+
+    def setUp(self):
+        RECORDER.clear()
+        RECORDER.enable()
+
+    def tearDown(self):
+        RECORDER.disable()
+        RECORDER.clear()
+
+    def test_decorator(self):
+        @instrumented(MEASUREMENT, "double")
+        def double(array):
+            return array * 2
+
+        np.testing.assert_array_equal(double(np.ones(3)), 2)
+        record, = RECORDER.get_records()
+        self.assertEqual((record.name, record.shape), ("double", (3,)))
+
+    def test_import_and_manipulation(self):
+        data = get_sicm_data(SCAN)
+        manager = DataManager()
+        manager.add_data_object("scan", ([UndoRedoData(data, name="raw_data")], []))
+        manager.execute_func_on_current_data(subtract_z_minimum, "scan", "Subtract minimum")(data)
+
+        records = RECORDER.get_records()
+        self.assertEqual([record.name for record in records],
+                         ["get_sicm_data", "Copy for undo", "Subtract minimum"])
+        self.assertEqual(records[0].shape, (10, 10))
+
+    def test_performance_window(self):
+        with RECORDER.measure("call", IO):
+            pass
+        window = PerformanceWindow()
+        self.assertEqual(window.table.rowCount(), 1)
+        window.checkbox_record.setChecked(False)
+        self.assertFalse(RECORDER.enabled)
+        window.clear()
+        self.assertEqual(window.table.rowCount(), 0)
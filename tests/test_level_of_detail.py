@@ -0,0 +1,45 @@
+from unittest import TestCase
+import numpy as np
+from sicm_analyzer.level_of_detail import get_decimation_factor, decimate, decimate_surface, MAX, MEAN
+
+
+class DecimationTests(TestCase):
+
+    def test_decimation_factor(self):
+        self.assertEqual(get_decimation_factor((51, 51), 2500), 1)
+        self.assertEqual(get_decimation_factor((101, 101), 2500), 2)
+        self.assertEqual(get_decimation_factor((1024, 1024), None), 1)
+
+    def test_decimated_surface_fits_budget(self):
+        for shape in [(64, 64), (300, 200), (1024, 1024), (1000, 7)]:
+            factor = get_decimation_factor(shape, 2500)
+            rows, columns = decimate(np.zeros(shape), factor).shape
+            self.assertLessEqual((rows - 1) * (columns - 1), 2500)
+
+    def test_max_preserves_peaks(self):
+        z = np.zeros((9, 9))
+        z[4, 7] = 5.0
+        decimated = decimate(z, 3, MAX)
+        self.assertEqual(decimated.shape, (3, 3))
+        self.assertEqual(decimated[1, 2], 5.0)
+        self.assertEqual(np.max(decimated), np.max(z))
+
+    def test_mean_of_blocks(self):
+        z = np.arange(16.0).reshape(4, 4)
+        np.testing.assert_array_equal(decimate(z, 2, MEAN), [[2.5, 4.5], [10.5, 12.5]])
+
+    def test_shape_not_a_multiple_of_factor(self):
+        z = np.arange(15.0).reshape(3, 5)
+        decimated = decimate(z, 2, MEAN)
+        np.testing.assert_array_equal(decimated, [[3.0, 5.0, 6.5], [10.5, 12.5, 14.0]])
+
+    def test_decimate_surface_uses_block_centers(self):
+        x, y = np.meshgrid(range(4), range(4))
+        z = np.ones((4, 4))
+        dx, dy, dz = decimate_surface(x, y, z, 2)
+        np.testing.assert_array_equal(dx, [[0.5, 2.5], [0.5, 2.5]])
+        np.testing.assert_array_equal(dy, [[0.5, 0.5], [2.5, 2.5]])
+
+    def test_factor_1_returns_data(self):
+        z = np.zeros((3, 3))
+        self.assertIs(decimate(z, 1), z)
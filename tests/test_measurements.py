@@ -1,7 +1,9 @@
 from unittest import TestCase
 import numpy as np
 from sicm_analyzer.measurements import get_roughness, root_mean_square_error
-from sicm_analyzer.sicm_data import SICMdata, get_sicm_data
+from sicm_analyzer.measurements import get_surface_area, get_volume
+from sicm_analyzer.parameters import IMPLEMENTED_PARAMETERS
+from sicm_analyzer.sicm_data import SICMdata, ScanBackstepMode, get_sicm_data
 
 
 class RoughnessTests(TestCase):
@@ -59,4 +61,63 @@ class RoughnessTests(TestCase):
     def test_calculate_roughness_4(self):
         path = "./tests/sample_sicm_files/Zelle2Membran PFA.sicm"
         sicm_data = get_sicm_data(path)
-        print(get_roughness(sicm_data))
\ No newline at end of file
+        print(get_roughness(sicm_data))
+
+
+class SurfaceAreaAndVolumeTests(TestCase):
+
+    def setUp(self):
+        self.sicm_data = ScanBackstepMode()
+        self.sicm_data.x_px_raw = 5
+        self.sicm_data.y_px_raw = 4
+        self.sicm_data.x_size_raw = 10
+        self.sicm_data.y_size_raw = 2
+
+    def test_surface_area_of_flat_scan(self):
+        self.sicm_data.z = np.ones((4, 5))
+        # 3 x 4 cells with a size of 2 µm x 0.5 µm
+        self.assertAlmostEqual(get_surface_area(self.sicm_data), 12.0)
+
+    def test_surface_area_of_tilted_plane(self):
+        x, y = np.meshgrid(range(5), range(4))
+        self.sicm_data.z = 1.5 * y
+        dx, dy = 2.0, 0.5
+        expected = 4 * 3 * dx * np.sqrt(dy ** 2 + 1.5 ** 2)
+        self.assertAlmostEqual(get_surface_area(self.sicm_data), expected, places=5)
+
+    def test_surface_area_ignores_triangles_with_nan(self):
+        z = np.ones((4, 5))
+        z[0, 0] = np.nan
+        self.sicm_data.z = z
+        # only one triangle of the corner cell touches the NaN value
+        self.assertAlmostEqual(get_surface_area(self.sicm_data), 11.5)
+
+    def test_volume(self):
+        self.sicm_data.z = np.full((4, 5), 2.0)
+        self.assertAlmostEqual(get_volume(self.sicm_data), 20 * 2.0 * 2.0 * 0.5)
+
+
+class StorageTypeTests(TestCase):
+
+    def setUp(self):
+        path = "./tests/sample_sicm_files/Zelle1 PFA.sicm"
+        self.single = get_sicm_data(path)
+        self.double = ScanBackstepMode()
+        self.double.storage_dtype = np.float64
+        self.double.z = np.asarray(self.single.z, dtype=np.float64)
+        self.double.x_px_raw, self.double.y_px_raw = self.single.x_px_raw, self.single.y_px_raw
+        self.double.x_size_raw, self.double.y_size_raw = self.single.x_size_raw, self.single.y_size_raw
+
+    def test_imported_data_is_float32(self):
+        self.assertEqual(self.single.z.dtype, np.float32)
+        self.assertEqual((self.single.z * 2).dtype, np.float32)
+
+    def test_assigned_data_is_converted(self):
+        self.single.z = np.ones((2, 2))
+        self.assertEqual(self.single.z.dtype, np.float32)
+        self.assertEqual(self.double.z.dtype, np.float64)
+
+    def test_parameters_match_double_precision(self):
+        for name, func in IMPLEMENTED_PARAMETERS.items():
+            with self.subTest(parameter=name):
+                np.testing.assert_allclose(func(self.single), func(self.double), rtol=1e-4, atol=1e-6)
@@ -0,0 +1,185 @@
+import copy
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from sicm_analyzer.data_manager import DataManager, UndoRedoData
+from sicm_analyzer.manipulate_data import crop, flip_z_data, filter_median_spatial, filter_single_outlier
+from sicm_analyzer.manipulate_data import MirrorAxis, MANIPULATIONS, IN_PLACE_MANIPULATIONS
+from sicm_analyzer.pipeline import Pipeline, PipelineStep, PipelineError, get_pipeline_from_undo_stack
+from sicm_analyzer.pipeline import apply_pipeline_steps, run_pipeline_fused
+from sicm_analyzer.pipeline import save_pipeline, load_pipeline, pipeline_to_toml
+from sicm_analyzer.sicm_data import get_sicm_data, export_sicm_file, PIPELINE
+from tests import get_scan
+
+
+class PipelineFromUndoStackTests(TestCase):
+
+    def setUp(self):
+        self.scan = get_scan(np.random.default_rng(4).normal(size=(12, 16)))
+        self.manager = DataManager()
+        self.manager.add_data_object("scan", ([UndoRedoData(self.scan, name="raw_data")], []))
+        # the same calls as in the GUI
+        self.execute(crop, "Crop data", point1=(1, 2), point2=(11, 10))
+        self.execute(flip_z_data, "Flip data in x direction", mirror_axis=MirrorAxis.X_AXIS)
+        self.execute(filter_median_spatial, "Median (spatial) (px-size: 1)", px_radius=1)
+        self.execute(filter_single_outlier, "Filtered single outlier", point=(3, 3))
+
+    def execute(self, func, action_name, **kwargs):
+        self.manager.execute_func_on_current_data(
+            func, "scan", action_name=action_name, **kwargs
+        )(self.manager.get_data("scan"), **kwargs)
+
+    def get_pipeline(self) -> Pipeline:
+        return get_pipeline_from_undo_stack(self.manager.get_undoable_manipulation_items_list("scan"))
+
+    def test_steps(self):
+        pipeline = self.get_pipeline()
+        self.assertEqual([step.name for step in pipeline.steps],
+                         ["crop", "flip_z_data", "filter_median_spatial", "filter_single_outlier"])
+        self.assertEqual(pipeline.action_names[0], "Crop data")
+        self.assertEqual(pipeline.steps[0].arguments, {"point1": (1, 2), "point2": (11, 10)})
+
+    def test_applying_pipeline_reproduces_manipulations(self):
+        data = copy.deepcopy(self.scan)
+        self.get_pipeline().apply(data)
+        np.testing.assert_array_equal(data.z, self.manager.get_data("scan").z)
+
+    def test_json_and_toml_round_trip(self):
+        pipeline = self.get_pipeline()
+        with tempfile.TemporaryDirectory() as directory:
+            for name in ("pipeline.json", "pipeline.toml"):
+                with self.subTest(file=name):
+                    path = os.path.join(directory, name)
+                    save_pipeline(path, pipeline)
+                    loaded = load_pipeline(path)
+                    self.assertEqual(loaded, pipeline)
+                    data = copy.deepcopy(self.scan)
+                    loaded.apply(data)
+                    np.testing.assert_array_equal(data.z, self.manager.get_data("scan").z)
+
+    def test_steps_before_reset_are_discarded(self):
+        self.manager.reset_manipulations("scan")
+        self.execute(flip_z_data, "Flip data in y direction", mirror_axis=MirrorAxis.Y_AXIS)
+        self.assertEqual(self.get_pipeline().action_names, ["Flip data in y direction"])
+
+    def test_unregistered_function(self):
+        self.execute(lambda data: None, "Something")
+        with self.assertRaises(PipelineError):
+            self.get_pipeline()
+
+    def test_execute_pipeline_adds_undoable_steps(self):
+        other = DataManager()
+        other.add_data_object("other", ([UndoRedoData(self.scan, name="raw_data")], []))
+        other.execute_pipeline("other", self.get_pipeline())
+        self.assertEqual(other.get_undoable_manipulation_names_list("other"),
+                         self.manager.get_undoable_manipulation_names_list("scan"))
+        np.testing.assert_array_equal(other.get_data("other").z, self.manager.get_data("scan").z)
+
+
+class PipelineValidationTests(TestCase):
+
+    def test_all_registered_names_are_function_names(self):
+        for name, func in MANIPULATIONS.items():
+            self.assertEqual(name, func.__name__)
+
+    def test_unknown_manipulation(self):
+        with self.assertRaises(PipelineError):
+            Pipeline.from_dict({"steps": [{"name": "rotate", "arguments": {}}]})
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(PipelineError):
+            Pipeline.from_dict({"steps": [{"name": "crop", "arguments": {"point1": [0, 0]}}]})
+
+    def test_unsupported_version(self):
+        with self.assertRaises(PipelineError):
+            Pipeline.from_dict({"version": 99, "steps": []})
+
+    def test_invalid_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "pipeline.json")
+            with open(path, "w") as f:
+                f.write("{")
+            with self.assertRaises(PipelineError):
+                load_pipeline(path)
+
+    def test_toml_document(self):
+        toml = pipeline_to_toml(Pipeline([PipelineStep("subtract_threshold", {"threshold": 0.5}, "Threshold")]))
+        self.assertIn('[[steps]]\nname = "subtract_threshold"', toml)
+        self.assertIn("[steps.arguments]\nthreshold = 0.5", toml)
+
+
+class PipelineExportTests(TestCase):
+
+    def test_pipeline_is_written_to_metadata(self):
+        scan = get_sicm_data("./tests/sample_sicm_files/Zelle1 PFA.sicm")
+        pipeline = Pipeline([PipelineStep("transpose_z_data", {}, "Transpose z")])
+        pipeline.apply(scan)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "export.sicm")
+            export_sicm_file(path, scan, pipeline.action_names, pipeline.to_dict()["steps"])
+            exported = get_sicm_data(path)
+            self.assertEqual(exported.previous_manipulations[-1], "Transpose z")
+            self.assertEqual(Pipeline.from_dict({"steps": json.loads(json.dumps(exported.settings[PIPELINE]))}),
+                             pipeline)
+
+            # without pipeline steps the metadata would be incomplete
+            export_sicm_file(path, exported, ["Something"])
+            self.assertNotIn(PIPELINE, get_sicm_data(path).settings)
+
+
+class FusedPipelineTests(TestCase):
+
+    def setUp(self):
+        self.scan = get_scan(np.random.default_rng(7).normal(size=(40, 30)))
+        self.pipeline = Pipeline([
+            PipelineStep("subtract_z_minimum", {}, "Subtract minimum"),
+            PipelineStep("invert_z_data", {}, "Invert z"),
+            PipelineStep("crop", {"point1": (2, 2), "point2": (28, 38)}, "Crop data"),
+            PipelineStep("flip_z_data", {"mirror_axis": MirrorAxis.Y_AXIS}, "Flip data in y direction"),
+            PipelineStep("filter_average_spatial", {"px_radius": 2}, "Average (spatial) (px-size: 2)"),
+            PipelineStep("subtract_threshold", {"threshold": -2.0}, "Subtract z threshold (-2.0)"),
+        ])
+
+    def test_same_result_as_step_by_step(self):
+        expected = apply_pipeline_steps(self.scan, self.pipeline)[-1]
+        result = run_pipeline_fused(self.scan, self.pipeline).data
+        np.testing.assert_array_equal(result.z, expected.z)
+        self.assertEqual((result.x_px, result.y_px), (expected.x_px, expected.y_px))
+        self.assertNotEqual(result.version, self.scan.version)
+
+    def test_input_is_not_changed(self):
+        z = self.scan.z.copy()
+        run_pipeline_fused(self.scan, self.pipeline)
+        np.testing.assert_array_equal(self.scan.z, z)
+
+    def test_in_place_steps_do_not_allocate_arrays(self):
+        pipeline = Pipeline([step for step in self.pipeline.steps if step.name in IN_PLACE_MANIPULATIONS])
+        scan = get_scan(np.random.default_rng(7).normal(size=(400, 300)))
+        z = scan.z
+        result = run_pipeline_fused(scan, pipeline, copy_data=False, measure_memory=True)
+        self.assertIs(result.data.z, z)
+        self.assertLess(result.peak_memory, z.nbytes)
+
+    def test_result_is_not_a_view(self):
+        result = run_pipeline_fused(self.scan, self.pipeline, copy_data=False).data
+        self.assertIsNone(result.z.base)
+
+    def test_failed_step(self):
+        pipeline = Pipeline([PipelineStep("filter_single_outlier", {"point": (100, 100)}, "Filtered single outlier")])
+        with self.assertRaises(PipelineError):
+            run_pipeline_fused(self.scan, pipeline)
+
+    def test_fused_undo_entry(self):
+        manager = DataManager()
+        manager.add_data_object("scan", ([UndoRedoData(self.scan, name="raw_data")], []))
+        manager.add_fused_pipeline_result("scan", self.pipeline, run_pipeline_fused(self.scan, self.pipeline).data)
+        self.assertEqual(len(manager.get_undoable_manipulation_names_list("scan")), 1)
+        # the steps are exported as single steps
+        self.assertEqual(get_pipeline_from_undo_stack(manager.get_undoable_manipulation_items_list("scan")),
+                         self.pipeline)
+        manager.undo_manipulation("scan")
+        np.testing.assert_array_equal(manager.get_data("scan").z, self.scan.z)
@@ -0,0 +1,106 @@
+import os
+import tempfile
+import time
+from unittest import TestCase
+
+import numpy as np
+
+from sicm_analyzer.pipeline import Pipeline, PipelineStep, apply_pipeline_steps, run_pipeline_fused
+from sicm_analyzer.pipeline_cache import PipelineCache, get_content_digest, is_cacheable
+from sicm_analyzer.sicm_data import get_sicm_data
+
+SCAN = "./tests/sample_sicm_files/Zelle1 PFA.sicm"
+CROP = PipelineStep("crop", {"point1": (1, 0), "point2": (9, 6)}, "Crop data")
+LEVEL = PipelineStep("level_data", {}, "Leveling (plane)")
+MINIMUM = PipelineStep("subtract_z_minimum", {}, "Subtract minimum")
+
+
+class PipelineCacheTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = PipelineCache(self.directory.name)
+        self.scan = get_sicm_data(SCAN)
+        self.pipeline = Pipeline([CROP, LEVEL, MINIMUM])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def assert_same_result(self, result, expected):
+        np.testing.assert_array_equal(result.z, expected.z)
+        self.assertEqual(result.z.dtype, expected.z.dtype)
+        np.testing.assert_array_equal(result.x_axis, expected.x_axis)
+        self.assertEqual((result.x_px, result.y_px, result.x_size, result.y_size),
+                         (expected.x_px, expected.y_px, expected.x_size, expected.y_size))
+
+    def test_cached_result_equals_computed_result(self):
+        expected = run_pipeline_fused(self.scan, self.pipeline).data
+        first = run_pipeline_fused(self.scan, self.pipeline, cache=self.cache)
+        second = run_pipeline_fused(self.scan, self.pipeline, cache=self.cache)
+        self.assertFalse(first.cached)
+        self.assertTrue(second.cached)
+        self.assert_same_result(second.data, expected)
+        self.assertEqual(second.data.previous_manipulations, self.scan.previous_manipulations)
+
+    def test_key_depends_on_content_and_steps(self):
+        run_pipeline_fused(self.scan, self.pipeline, cache=self.cache)
+
+        renamed = Pipeline([step._replace(action_name="Something") for step in self.pipeline.steps])
+        self.assertTrue(run_pipeline_fused(self.scan, renamed, cache=self.cache).cached)
+
+        other_arguments = Pipeline([CROP._replace(arguments={"point1": (0, 0), "point2": (9, 6)}), LEVEL, MINIMUM])
+        self.assertFalse(run_pipeline_fused(self.scan, other_arguments, cache=self.cache).cached)
+
+        changed = get_sicm_data(SCAN)
+        changed.z = changed.z + 1
+        self.assertNotEqual(get_content_digest(changed), get_content_digest(self.scan))
+        self.assertFalse(run_pipeline_fused(changed, self.pipeline, cache=self.cache).cached)
+
+    def test_key_depends_on_raw_dimensions(self):
+        pipeline = Pipeline([CROP])
+        run_pipeline_fused(self.scan, pipeline, cache=self.cache)
+        larger = get_sicm_data(SCAN)
+        larger.x_size_raw, larger.y_size_raw = larger.x_size_raw * 4, larger.y_size_raw * 4
+        self.assertNotEqual(get_content_digest(larger), get_content_digest(self.scan))
+
+        expected = run_pipeline_fused(larger, pipeline).data
+        result = run_pipeline_fused(larger, pipeline, cache=self.cache)
+        self.assertFalse(result.cached)
+        self.assert_same_result(result.data, expected)
+
+    def test_step_states_are_cached(self):
+        states = apply_pipeline_steps(self.scan, self.pipeline, self.cache)
+        # the states are also used by fused pipelines
+        self.assertTrue(run_pipeline_fused(self.scan, self.pipeline, cache=self.cache).cached)
+        cached_states = apply_pipeline_steps(self.scan, self.pipeline, self.cache)
+        for state, cached_state in zip(states, cached_states):
+            self.assert_same_result(cached_state, state)
+
+    def test_cached_prefix_is_continued(self):
+        run_pipeline_fused(self.scan, Pipeline([CROP, LEVEL]), cache=self.cache)
+        extended = run_pipeline_fused(self.scan, self.pipeline, cache=self.cache)
+        self.assertFalse(extended.cached)
+        self.assert_same_result(extended.data, run_pipeline_fused(self.scan, self.pipeline).data)
+
+    def test_input_is_not_changed(self):
+        z = self.scan.z.copy()
+        run_pipeline_fused(self.scan, Pipeline([CROP]), cache=self.cache)
+        run_pipeline_fused(self.scan, self.pipeline, cache=self.cache)
+        np.testing.assert_array_equal(self.scan.z, z)
+
+    def test_least_recently_used_results_are_evicted(self):
+        run_pipeline_fused(self.scan, Pipeline([CROP]), cache=self.cache)
+        size = sum(entry.stat().st_size for entry in os.scandir(self.directory.name))
+        old = time.time() - 100
+        for entry in os.scandir(self.directory.name):
+            os.utime(entry.path, (old, old))
+
+        self.cache.max_size = int(size * 1.5)
+        run_pipeline_fused(self.scan, Pipeline([LEVEL]), cache=self.cache)
+        self.assertEqual(len(os.listdir(self.directory.name)), 1)
+        self.assertTrue(run_pipeline_fused(self.scan, Pipeline([LEVEL]), cache=self.cache).cached)
+
+    def test_uncached_manipulations(self):
+        self.assertFalse(is_cacheable(self.scan, ["level_data", "fit_data"]))
+        self.assertFalse(is_cacheable(get_sicm_data("./tests/sample_sicm_files/AC1PFA.sicm"), ["crop"]))
+        self.assertTrue(is_cacheable(self.scan, ["level_data"]))
@@ -0,0 +1,85 @@
+import copy
+import sys
+from unittest import TestCase
+
+import numpy as np
+from PyQt6.QtCore import QThreadPool
+from PyQt6.QtWidgets import QApplication
+
+from sicm_analyzer.data_manager import DataManager, UndoRedoData
+from sicm_analyzer.manipulate_data import filter_single_outlier
+from sicm_analyzer.results import SingleResultsWindow
+from sicm_analyzer.sicm_data import ScanBackstepMode
+from tests import get_scan
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+
+def wait_for_workers():
+    QThreadPool.globalInstance().waitForDone()
+    app.processEvents()
+
+
+class DataVersionTests(TestCase):
+
+    def test_assigning_z_changes_version(self):
+        scan = get_scan(np.zeros((3, 3)))
+        version = scan.version
+        scan.z = np.ones((3, 3))
+        self.assertNotEqual(scan.version, version)
+
+    def test_versions_differ_between_objects(self):
+        self.assertNotEqual(ScanBackstepMode().version, ScanBackstepMode().version)
+
+    def test_copy_shares_version(self):
+        scan = get_scan(np.zeros((3, 3)))
+        self.assertEqual(copy.deepcopy(scan).version, scan.version)
+
+    def test_changing_view_settings_keeps_version(self):
+        scan = get_scan(np.zeros((3, 3)))
+        version = scan.version
+        scan.fit_results = "fit"
+        scan.x_size = 10
+        self.assertEqual(scan.version, version)
+
+    def test_in_place_manipulation_changes_version(self):
+        manager = DataManager()
+        manager.add_data_object("scan", ([UndoRedoData(get_scan(np.zeros((3, 3))), name="raw_data")], []))
+        version = manager.get_data("scan").version
+        manager.execute_func_on_current_data(
+            filter_single_outlier, "scan", action_name="Filtered single outlier"
+        )(manager.get_data("scan"), (1, 1))
+        self.assertNotEqual(manager.get_data("scan").version, version)
+        manager.undo_manipulation("scan")
+        self.assertEqual(manager.get_data("scan").version, version)
+
+
+class SingleResultsWindowTests(TestCase):
+
+    def setUp(self):
+        self.scan = get_scan(np.arange(16.0).reshape(4, 4))
+        self.window = SingleResultsWindow(self.scan)
+        wait_for_workers()
+
+    def test_results_are_shown(self):
+        self.assertIn("Maximum value: 15.0", self.window.text.toPlainText())
+
+    def test_results_are_not_recalculated_for_same_version(self):
+        self.window.text.clear()
+        self.window.update_results(self.scan)
+        wait_for_workers()
+        self.assertEqual(self.window.text.toPlainText(), "")
+
+    def test_results_are_recalculated_after_data_change(self):
+        self.scan.z = self.scan.z * 2
+        self.window.update_results(self.scan)
+        wait_for_workers()
+        self.assertIn("Maximum value: 30.0", self.window.text.toPlainText())
+        self.assertFalse(self.window.workers)
+
+    def test_outdated_results_are_discarded(self):
+        scan = get_scan(np.full((4, 4), 7.0))
+        self.window.update_results(scan)
+        self.window.update_results(self.scan)
+        wait_for_workers()
+        self.assertIn("Maximum value: 15.0", self.window.text.toPlainText())
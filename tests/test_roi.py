@@ -0,0 +1,83 @@
+from unittest import TestCase
+import numpy as np
+from PyQt6.QtCore import QPoint
+from sicm_analyzer.areal_parameters import get_maximum_peak_height
+from sicm_analyzer.measurements import get_third_point_height, get_surface_area
+from sicm_analyzer.measurements import get_minimum_value, get_maximum_value, get_root_mean_sq_roughness
+from sicm_analyzer.parameters import IMPLEMENTED_PARAMETERS
+from sicm_analyzer.roi import get_roi_z
+from tests import get_scan
+
+# width of pixels in µm, which differs from the height to detect swapped axes
+PIXEL_WIDTH = 2.0
+
+
+class ROITests(TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.scan = get_scan(rng.normal(5.0, 1.0, (20, 30)), x_size=30 * PIXEL_WIDTH)
+        # z is converted to the storage type of the scan
+        self.z = self.scan.z
+        # x from 4 to 15, y from 2 to 11 (corner pixels included)
+        self.rectangle = (QPoint(15, 11), QPoint(4, 2))
+        self.cropped = get_scan(self.z[2:12, 4:16].copy(), x_size=12 * PIXEL_WIDTH)
+
+    def test_rectangle_is_a_view(self):
+        roi_z = get_roi_z(self.z, self.rectangle)
+        self.assertTrue(np.shares_memory(roi_z, self.z))
+        np.testing.assert_array_equal(roi_z, self.cropped.z)
+
+    def test_rectangle_of_tuples(self):
+        np.testing.assert_array_equal(get_roi_z(self.z, ((4, 2), (15, 11))), self.cropped.z)
+
+    def test_mask_is_a_masked_view(self):
+        mask = np.zeros(self.z.shape, dtype=bool)
+        mask[3:5, 6:9] = True
+        mask[7, 10] = True
+        roi_z = get_roi_z(self.z, mask)
+        self.assertTrue(np.shares_memory(roi_z.data, self.z))
+        self.assertEqual(roi_z.shape, (5, 5))
+        self.assertEqual(roi_z.count(), 7)
+
+    def test_mask_of_wrong_shape(self):
+        with self.assertRaises(ValueError):
+            get_roi_z(self.z, np.ones((2, 2), dtype=bool))
+
+    def test_rectangle_equals_cropped_data(self):
+        for name, func in IMPLEMENTED_PARAMETERS.items():
+            with self.subTest(parameter=name):
+                np.testing.assert_allclose(func(self.scan, self.rectangle), func(self.cropped))
+
+    def test_mask_equals_rectangle(self):
+        mask = np.zeros(self.z.shape, dtype=bool)
+        mask[2:12, 4:16] = True
+        for name, func in IMPLEMENTED_PARAMETERS.items():
+            with self.subTest(parameter=name):
+                np.testing.assert_allclose(func(self.scan, mask), func(self.scan, self.rectangle))
+
+    def test_mask_excludes_values(self):
+        z = np.array(self.z)
+        z[0, 0] = 100.0
+        z[19, 29] = -100.0
+        mask = np.ones(z.shape, dtype=bool)
+        mask[0, 0] = mask[19, 29] = False
+        scan = get_scan(z, x_size=30 * PIXEL_WIDTH)
+        values = z[mask]
+        self.assertEqual(get_minimum_value(scan, mask), np.min(values))
+        self.assertEqual(get_maximum_value(scan, mask), np.max(values))
+        self.assertAlmostEqual(get_root_mean_sq_roughness(scan, mask), np.sqrt(np.mean(np.square(values, dtype=np.float64))))
+        self.assertLess(get_maximum_peak_height(scan, mask), 50)
+
+    def test_surface_area_of_mask(self):
+        scan = get_scan(np.ones((3, 3)), x_size=3 * PIXEL_WIDTH)
+        mask = np.ones((3, 3), dtype=bool)
+        mask[0, 0] = False
+        # one of eight triangles of 2 µm x 1 µm cells touches the excluded pixel
+        self.assertAlmostEqual(get_surface_area(scan, mask), 7.0)
+
+    def test_third_point_height_does_not_change_data(self):
+        z = self.z.copy()
+        get_third_point_height(self.scan)
+        get_third_point_height(self.scan, self.rectangle)
+        np.testing.assert_array_equal(self.scan.z, z)
@@ -0,0 +1,97 @@
+import copy
+import os
+import pickle
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from sicm_analyzer.data_manager import DataManager, UndoRedoData
+from sicm_analyzer.manipulate_data import transpose_z_data, filter_single_outlier
+from sicm_analyzer.sicm_data import ScanMetadata, get_sicm_data, export_sicm_file
+from sicm_analyzer.sicm_data import Manipulations, Xpx
+from tests import get_scan
+
+
+class ScanMetadataTests(TestCase):
+
+    def test_metadata_is_immutable(self):
+        metadata = ScanMetadata(x_px=3, settings={Xpx: 3})
+        with self.assertRaises(AttributeError):
+            metadata.x_px = 4
+        with self.assertRaises(TypeError):
+            metadata.settings[Xpx] = 4
+
+    def test_replace_returns_new_record(self):
+        metadata = ScanMetadata(x_px=3)
+        changed = metadata.replace(x_px=4)
+        self.assertEqual(metadata.x_px, 3)
+        self.assertEqual(changed.x_px, 4)
+
+    def test_equal_records_have_equal_hashes(self):
+        first = ScanMetadata(scan_mode="backstepScan", settings={Xpx: 3, Manipulations: ["crop"]})
+        second = ScanMetadata(scan_mode="backstepScan", settings={Xpx: 3, Manipulations: ["crop"]})
+        self.assertEqual(first, second)
+        self.assertEqual(len({first, second, first.replace(x_px=1)}), 2)
+        self.assertEqual({first: "scan"}[second], "scan")
+
+    def test_nested_settings_in_different_orders(self):
+        pipeline = [{"name": "crop", "arguments": {"point1": [0, 0], "point2": [8, 6]}}]
+        first = ScanMetadata(settings={"a": 1, "pipeline": pipeline})
+        second = ScanMetadata(settings={"pipeline": [{"arguments": {"point2": [8, 6], "point1": [0, 0]},
+                                                      "name": "crop"}], "a": 1})
+        self.assertEqual(first, second)
+        self.assertEqual(hash(first), hash(second))
+        self.assertEqual(len({first, second, first.replace(settings={"a": 2, "pipeline": pipeline})}), 2)
+
+    def test_pickle(self):
+        metadata = ScanMetadata(x_px=3, info={"client_duration": 1000})
+        self.assertEqual(pickle.loads(pickle.dumps(metadata)), metadata)
+
+    def test_setting_a_field_replaces_the_record(self):
+        scan = get_scan(np.zeros((3, 4)))
+        metadata = scan.metadata
+        scan.x_size_raw = 10
+        self.assertIsNot(scan.metadata, metadata)
+        self.assertEqual(scan.metadata.x_size_raw, 10)
+        self.assertEqual(metadata.x_size_raw, 4)
+
+
+class SharedMetadataTests(TestCase):
+
+    def setUp(self):
+        self.scan = get_scan(np.arange(12.0).reshape(3, 4))
+        self.manager = DataManager()
+        self.manager.add_data_object("scan", ([UndoRedoData(self.scan, name="raw_data")], []))
+
+    def test_copies_share_metadata(self):
+        self.assertIs(copy.deepcopy(self.scan).metadata, self.scan.metadata)
+        self.assertIsNot(copy.deepcopy(self.scan).z, self.scan.z)
+
+    def test_undo_states_share_metadata(self):
+        metadata = self.manager.get_data("scan").metadata
+        self.manager.execute_func_on_current_data(
+            filter_single_outlier, "scan", action_name="Filtered single outlier"
+        )(self.manager.get_data("scan"), (1, 1))
+        self.assertIs(self.manager.get_data("scan").metadata, metadata)
+
+    def test_changed_dimensions_do_not_affect_undo_states(self):
+        self.manager.execute_func_on_current_data(
+            transpose_z_data, "scan", action_name="Transposed"
+        )(self.manager.get_data("scan"))
+        self.assertEqual(self.manager.get_data("scan").get_pixel_dimensions(), (3, 4))
+        self.manager.undo_manipulation("scan")
+        self.assertEqual(self.manager.get_data("scan").get_pixel_dimensions(), (4, 3))
+
+
+class MetadataExportTests(TestCase):
+
+    def test_metadata_survives_export(self):
+        scan = get_sicm_data("./tests/sample_sicm_files/Zelle1 PFA.sicm")
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "export.sicm")
+            export_sicm_file(path, scan, ["crop"])
+            exported = get_sicm_data(path)
+        self.assertEqual(exported.info, scan.info)
+        self.assertEqual(exported.previous_manipulations, (*scan.previous_manipulations, "crop"))
+        self.assertEqual(exported.get_pixel_dimensions(), scan.get_pixel_dimensions())
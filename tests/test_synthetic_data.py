@@ -0,0 +1,89 @@
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from sicm_analyzer.sicm_data import get_sicm_data, ApproachCurve, ScanBackstepMode
+from sicm_analyzer.sicm_data import APPROACH, BACKSTEP, FLOATING_BACKSTEP
+from sicm_analyzer.synthetic_data import create_scan, create_approach_curve, generate_files, get_surface, main
+
+
+class SyntheticDataTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def assert_round_trip(self, scan_mode: str, extended: bool):
+        path = generate_files(self.directory.name, scan_mode=scan_mode, extended=extended, seed=5,
+                              **({} if scan_mode == APPROACH else {"x_px": 40, "y_px": 30}))[0]
+        data = get_sicm_data(path)
+        if scan_mode == APPROACH:
+            expected = create_approach_curve(extended=extended, seed=5)
+        else:
+            expected = create_scan(40, 30, scan_mode=scan_mode, extended=extended, seed=5)
+        self.assertEqual(data.scan_mode, scan_mode)
+        self.assertEqual(data.extended, extended)
+        self.assertEqual(data.z.shape, expected.z.shape)
+        np.testing.assert_allclose(data.z, expected.z, atol=1e-6)
+        return data
+
+    def test_legacy_scans(self):
+        for scan_mode in (BACKSTEP, FLOATING_BACKSTEP):
+            scan = self.assert_round_trip(scan_mode, extended=False)
+            self.assertIsInstance(scan, ScanBackstepMode)
+            self.assertEqual((scan.x_px, scan.y_px, scan.x_size, scan.y_size), (40, 30, 50, 38))
+            self.assertEqual(scan.z.min(), 0)
+
+    def test_extended_scans(self):
+        for scan_mode in (BACKSTEP, FLOATING_BACKSTEP):
+            scan = self.assert_round_trip(scan_mode, extended=True)
+            self.assertEqual((scan.x_px, scan.y_px, scan.x_size, scan.y_size), (40, 30, 50.0, 37.5))
+
+    def test_approach_curves(self):
+        for extended in (False, True):
+            curve = self.assert_round_trip(APPROACH, extended)
+            self.assertIsInstance(curve, ApproachCurve)
+            # the current drops at the end of the approach
+            self.assertLess(np.mean(curve.z[-20:]), np.mean(curve.z[:1000]) * 0.98)
+
+    def test_scan_date_and_time(self):
+        for scan_mode in (BACKSTEP, APPROACH):
+            data = get_sicm_data(generate_files(self.directory.name, scan_mode=scan_mode, seed=1)[0])
+            self.assertEqual(data.get_scan_date(), "2024-01-15 09:30:00")
+            self.assertNotEqual(data.get_scan_time(), "00:00:00")
+
+    def test_seed_is_reproducible(self):
+        np.testing.assert_array_equal(create_scan(32, seed=1).z, create_scan(32, seed=1).z)
+        self.assertFalse(np.array_equal(create_scan(32, seed=1).z, create_scan(32, seed=2).z))
+
+    def test_surface_parameters(self):
+        rng = np.random.default_rng(0)
+        plane = get_surface(50, 40, 10.0, 8.0, tilt=(0.5, 0.0), curvature=0.0, cells=0, noise=0.0, outliers=0.0,
+                            substrate_height=1.0, rng=rng)
+        np.testing.assert_allclose(plane[:, 0], 1.0)
+        np.testing.assert_allclose(plane[0, 1] - plane[0, 0], 0.1)
+
+        cells = get_surface(50, 40, 10.0, 8.0, tilt=(0.0, 0.0), curvature=0.0, cells=1, cell_height=3.0,
+                            noise=0.0, outliers=0.0, substrate_height=0.0, rng=rng)
+        self.assertGreater(cells.max(), 1.0)
+        self.assertEqual(cells.min(), 0.0)
+
+        outliers = get_surface(100, 100, 10.0, 10.0, tilt=(0.0, 0.0), curvature=0.0, cells=0, noise=0.0,
+                               outliers=0.1, outlier_height=2.0, substrate_height=5.0, rng=rng)
+        self.assertAlmostEqual(np.mean(outliers != 5.0), 0.1, delta=0.02)
+        self.assertEqual(set(np.unique(outliers)), {3.0, 5.0, 7.0})
+
+    def test_legacy_height_range(self):
+        with self.assertRaises(ValueError):
+            create_scan(16, cells=2, cell_height=100.0)
+        self.assertGreater(create_scan(16, cells=2, cell_height=100.0, extended=True).z.max(), 65.535)
+
+    def test_main(self):
+        self.assertEqual(main([self.directory.name, "--count", "3", "--size", "16", "8", "--noise", "0"]), 0)
+        files = sorted(os.listdir(self.directory.name))
+        self.assertEqual(len(files), 3)
+        self.assertEqual(get_sicm_data(os.path.join(self.directory.name, files[0])).z.shape, (8, 16))
@@ -0,0 +1,98 @@
+import os
+import sys
+import tempfile
+import time
+from unittest import TestCase
+
+import matplotlib
+import numpy as np
+from PyQt6.QtCore import QThreadPool
+from PyQt6.QtWidgets import QApplication
+
+from sicm_analyzer.thumbnails import get_thumbnail, ThumbnailCache, ThumbnailWorker, THUMBNAIL_SIZE
+from sicm_analyzer.thumbnails import MAX_DIGESTS, PRUNE_INTERVAL
+from tests import get_scan
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+
+class ThumbnailTests(TestCase):
+
+    def setUp(self):
+        self.color_map = matplotlib.colormaps["viridis"]
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = ThumbnailCache(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_thumbnail_is_decimated(self):
+        thumbnail = get_thumbnail(np.zeros((480, 240)), self.color_map)
+        self.assertEqual(thumbnail.shape, (THUMBNAIL_SIZE, 24, 4))
+        self.assertEqual(thumbnail.dtype, np.uint8)
+
+    def test_small_scans_are_not_decimated(self):
+        self.assertEqual(get_thumbnail(np.zeros((3, 4)), self.color_map).shape, (3, 4, 4))
+
+    def test_first_row_is_at_the_bottom(self):
+        z = np.zeros((4, 4))
+        z[0] = 1.0
+        thumbnail = get_thumbnail(z, self.color_map)
+        np.testing.assert_array_equal(thumbnail[-1, 0], self.color_map(1.0, bytes=True))
+
+    def test_thumbnail_is_cached(self):
+        scan = get_scan(np.arange(16.0).reshape(4, 4))
+        thumbnail = self.cache.get_thumbnail(scan, self.color_map)
+        self.assertEqual(len(os.listdir(self.directory.name)), 1)
+        # a new cache finds the thumbnail of the same data on disk
+        cache = ThumbnailCache(self.directory.name)
+        key = cache.get_key(get_scan(scan.z.copy()), self.color_map)
+        np.testing.assert_array_equal(cache.load(key), thumbnail)
+
+    def test_key_depends_on_data_and_color_map(self):
+        scan = get_scan(np.arange(16.0).reshape(4, 4))
+        key = self.cache.get_key(scan, self.color_map)
+        self.assertNotEqual(self.cache.get_key(scan, matplotlib.colormaps["magma"]), key)
+        scan.z = scan.z * 2
+        self.assertNotEqual(self.cache.get_key(scan, self.color_map), key)
+
+    def test_least_recently_used_thumbnails_are_pruned(self):
+        scans = [get_scan(np.full((4, 4), float(i))) for i in range(3)]
+        keys = []
+        for i, scan in enumerate(scans):
+            self.cache.get_thumbnail(scan, self.color_map)
+            keys.append(self.cache.get_key(scan, self.color_map))
+            # modification times of consecutive files may be equal
+            os.utime(self.cache.get_path(keys[-1]), (time.time() - 10 + i, time.time() - 10 + i))
+        # loading a thumbnail marks it as recently used
+        self.cache.load(keys[0])
+        self.cache.max_size = os.path.getsize(self.cache.get_path(keys[0])) * 2
+        self.cache.prune()
+        self.assertEqual(sorted(os.listdir(self.directory.name)), sorted(key + ".npy" for key in (keys[0], keys[2])))
+
+    def test_cache_is_pruned_while_saving(self):
+        self.cache.max_size = 0
+        for i in range(PRUNE_INTERVAL):
+            self.cache.get_thumbnail(get_scan(np.full((4, 4), float(i))), self.color_map)
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_digests_of_old_versions_are_dropped(self):
+        scan = get_scan(np.ones((4, 4)))
+        first_version = scan.version
+        self.cache.get_key(scan, self.color_map)
+        self.assertIn(first_version, self.cache.digests)
+        for i in range(MAX_DIGESTS):
+            scan.z = np.full((4, 4), float(i))
+            self.cache.get_key(scan, self.color_map)
+        self.assertEqual(len(self.cache.digests), MAX_DIGESTS)
+        self.assertNotIn(first_version, self.cache.digests)
+
+    def test_worker(self):
+        results = []
+        worker = ThumbnailWorker("scan", get_scan(np.ones((4, 4))), self.color_map, self.cache)
+        worker.signals.finished.connect(lambda key, thumbnail: results.append((key, thumbnail)))
+        QThreadPool.globalInstance().start(worker)
+        QThreadPool.globalInstance().waitForDone()
+        app.processEvents()
+        self.assertEqual(results[0][0], "scan")
+        self.assertEqual(results[0][1].shape, (4, 4, 4))